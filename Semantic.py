@@ -1,336 +1,601 @@
+import ast_nodes
+import parser
+from diagnostics import Diagnostics, ErrorLimitReached, SEMANTIC
+from lexer import TokenKind as K
+
+# Tipos de dato válidos en declaraciones y parámetros
+VALID_TYPES = frozenset(["int", "float", "double", "char", "bool", "string", "void"])
+
+_MATH_KINDS = frozenset((K.PLUS, K.MINUS, K.STAR, K.SLASH, K.PERCENT))
+_REL_KINDS = frozenset((K.EQ, K.NE, K.LT, K.GT, K.LE, K.GE))
+_LOG_KINDS = frozenset((K.AND, K.OR, K.NOT))
+_BOOL_LITERALS = frozenset(('true', 'false'))
+
+# Inferencia de tipos: los tipos de los operandos y las clases de operadores de
+# una expresión se juntan como bits
+_T_STRING, _T_INT, _T_FLOAT, _T_DOUBLE, _T_CHAR, _T_BOOL = 1, 2, 4, 8, 16, 32
+_TYPE_BITS = {'string': _T_STRING, 'int': _T_INT, 'float': _T_FLOAT,
+              'double': _T_DOUBLE, 'char': _T_CHAR, 'bool': _T_BOOL}
+_T_NUMERIC = _T_INT | _T_FLOAT | _T_DOUBLE
+_OP_MATH, _OP_REL, _OP_LOG = 1, 2, 4
+_OP_BITS = {**{k: _OP_MATH for k in _MATH_KINDS}, **{k: _OP_REL for k in _REL_KINDS},
+            **{k: _OP_LOG for k in _LOG_KINDS}}
+_LITERAL_BITS = {K.STRING: _T_STRING, K.CHAR_LITERAL: _T_CHAR}
+
+def _result_type(types, ops):
+    if ops & (_OP_REL | _OP_LOG): return 'bool'
+    elif types & _T_STRING: return 'string'
+    elif types & (_T_FLOAT | _T_DOUBLE): return 'float'
+    elif types & _T_INT: return 'int'
+    elif types & _T_CHAR: return 'char'
+    elif types & _T_BOOL: return 'bool'
+    return None
+
+# Tipo resultante para cada combinación de bits: _RESULT_TYPES[ops << 6 | types]
+_RESULT_TYPES = [_result_type(i & 63, i >> 6) for i in range(8 << 6)]
+
+# Acciones de la pila de trabajo de infer_expression_type (los nodos se apilan solos)
+_DIVISION, _ARGUMENT, _END_ARGUMENT, _CACHED_ARGUMENT = range(4)
+
+class SymbolRecord:
+    """Una declaración en el historial de la tabla: nombre, datos, ámbito y línea."""
+    __slots__ = ('name', 'info', 'scope', 'line')
+
+    def __init__(self, name, info, scope, line=None):
+        self.name = name
+        self.info = info        # {'tipo', 'alcance', ...} igual que lookup()
+        self.scope = scope      # Identificador del ámbito (0 = global)
+        self.line = line
+
 class SymbolTable:
+    """Tabla de símbolos con una pila de declaraciones por nombre.
+
+    `bindings` guarda para cada nombre las declaraciones visibles, la más
+    interna al final, junto con el ámbito que la declaró; así lookup e insert
+    son O(1) sin importar la profundidad. Cada ámbito abierto anota en
+    `undo` los nombres que declaró y pop_scope solo deshace esos. `history`
+    conserva todas las declaraciones en orden, aunque se oculten o se cierre
+    su ámbito.
+    """
     def __init__(self):
-        self.scopes = [{}]
-        self.all_symbols = {} 
+        self.bindings = {}      # nombre -> [(id de ámbito, datos), ...]
+        self.undo = [[]]        # Nombres declarados por cada ámbito abierto
+        self.scope_ids = [0]    # Ámbitos abiertos, el global primero
+        self.scope_count = 1    # Ámbitos creados hasta ahora (para numerarlos)
+        self.history = []       # SymbolRecord de cada declaración
+
+    @property
+    def depth(self):
+        return len(self.scope_ids)
 
     def push_scope(self):
-        self.scopes.append({})
+        self.scope_ids.append(self.scope_count)
+        self.scope_count += 1
+        self.undo.append([])
 
     def pop_scope(self):
-        if len(self.scopes) > 1:
-            self.scopes.pop()
+        if len(self.scope_ids) > 1:
+            self.scope_ids.pop()
+            bindings = self.bindings
+            for name in self.undo.pop():
+                stack = bindings[name]
+                stack.pop()
+                if not stack:
+                    del bindings[name]
 
-    def insert(self, name, symbol_type, extra_data=None):
-        current_scope = self.scopes[-1]
-        if name in current_scope:
-            return False 
-        
-        alcance = 'global' if len(self.scopes) == 1 else 'local'
+    def bind(self, name, info):
+        """Declara `name` en el ámbito actual; regresa False si ya está declarado en él."""
+        scope = self.scope_ids[-1]
+        stack = self.bindings.get(name)
+        if stack is None:
+            self.bindings[name] = [(scope, info)]
+        elif stack[-1][0] == scope:
+            return False
+        else:
+            stack.append((scope, info))
+        self.undo[-1].append(name)
+        return True
+
+    def insert(self, name, symbol_type, extra_data=None, line=None):
+        alcance = 'global' if len(self.scope_ids) == 1 else 'local'
         simbolo_info = {'tipo': symbol_type, 'alcance': alcance}
         
         if extra_data:
             simbolo_info.update(extra_data)
-            
-        current_scope[name] = simbolo_info
-        self.all_symbols[name] = simbolo_info 
+
+        if not self.bind(name, simbolo_info):
+            return False
+        self.history.append(SymbolRecord(name, simbolo_info, self.scope_ids[-1], line))
         return True
 
     def lookup(self, name):
-        for scope in reversed(self.scopes):
-            if name in scope:
-                return scope[name]
-        return None
+        stack = self.bindings.get(name)
+        return stack[-1][1] if stack else None
+
+    def load_globals(self, scope):
+        """Declara en el ámbito global los símbolos de `scope` sin anotarlos en el historial."""
+        for name, info in scope.items():
+            self.bind(name, info)
+
+    def globals(self):
+        """Símbolos del ámbito global como diccionario nombre -> datos."""
+        bindings = self.bindings
+        return {name: bindings[name][0][1] for name in self.undo[0]}
+
+    @property
+    def all_symbols(self):
+        """Última declaración de cada nombre (vista compacta del historial)."""
+        return {record.name: record.info for record in self.history}
+
+class CacheEntry:
+    __slots__ = ('deps', 'errors', 'symbols', 'scopes', 'classes')
+
+    def __init__(self, deps, errors, symbols, scopes, classes):
+        self.deps = deps        # (nombre, símbolo global o None, es clase) de cada identificador usado
+        self.errors = errors    # (código, línea relativa, argumentos) de cada error reportado
+        self.symbols = symbols  # (nombre, datos, ámbito relativo, línea relativa) del historial
+        self.scopes = scopes    # Ámbitos que abrió el cuerpo
+        self.classes = classes  # Clases anidadas que registró
+
+class SemanticCache:
+    """Resultados del análisis de los métodos y clases del nivel superior, entre un análisis y el siguiente.
+
+    La clave es el contenido del cuerpo: tipo, texto y línea relativa de cada
+    token, más el tipo de retorno del método. Una entrada solo se reutiliza
+    si los identificadores del cuerpo siguen resolviendo a las mismas firmas
+    globales y clases; si no, el cuerpo se analiza de nuevo. Las líneas y los
+    ámbitos se guardan relativos al inicio del cuerpo, así que mover un método
+    (por ejemplo, al agregar líneas antes) no invalida su entrada.
+    """
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
 
 class SemanticAnalyzer:
-    def __init__(self, tokens):
-        self.tokens = [t for t in tokens if t.type not in ('WHITESPACE', 'COMMENT')]
-        self.pos = 0
-        self.errors = []
+    """Analizador semántico sobre el árbol que construye el Parser.
+
+    Acepta el árbol (ast_nodes.Program) o, por compatibilidad, la lista de
+    tokens; en ese caso construye el árbol con parser.parse_tree(). Con un
+    SemanticCache los cuerpos que no cambiaron desde el análisis anterior no
+    se vuelven a revisar.
+    """
+    def __init__(self, program, diagnostics=None, cache=None):
+        if not isinstance(program, ast_nodes.Program):
+            program = parser.parse_tree(program)
+        self.program = program
+        self.tokens = program.tokens
+        self.diagnostics = diagnostics if diagnostics is not None else Diagnostics()
         self.sym_table = SymbolTable()
-        self.valid_types = ["int", "float", "double", "char", "bool", "string", "void"]
+        self.valid_types = VALID_TYPES
+        self.class_names = set()
         self.current_return_type = None
+        self.type_cache = {}    # (inicio, fin) de una expresión -> tipo inferido
+        self.cache = cache
+        self.cache_used = {}    # Entradas de la caché usadas o creadas en este análisis
+        self.recording = None   # Errores del cuerpo que se está guardando en la caché
+        self.recorded_classes = None  # y las clases que registró
+        # Despacho de sentencias por tipo de nodo
+        self.statement_checkers = {
+            ast_nodes.ClassDecl: self.check_class,
+            ast_nodes.MethodDecl: self.check_method,
+            ast_nodes.VarDecl: self.check_var_decl,
+            ast_nodes.Block: self.check_block,
+            ast_nodes.Assign: self.check_assign,
+            ast_nodes.ExprStmt: self.check_expr_stmt,
+            ast_nodes.If: self.check_if,
+            ast_nodes.While: self.check_while,
+            ast_nodes.DoWhile: self.check_do_while,
+            ast_nodes.For: self.check_for,
+            ast_nodes.Switch: self.check_switch,
+            ast_nodes.Return: self.check_return,
+        }
 
-    def peek(self, offset=0):
-        if self.pos + offset < len(self.tokens):
-            return self.tokens[self.pos + offset]
-        return None
+    def add_error(self, code, line, *args):
+        # Los mensajes semánticos solo indican la línea: la columna no distingue errores
+        if self.recording is not None:
+            self.recording.append((code, line, args))
+        self.diagnostics.add(SEMANTIC, code, line, None, *args)
+
+    @property
+    def errors(self):
+        return self.diagnostics.of_stage(SEMANTIC)
 
     def analyze(self):
-        while self.pos < len(self.tokens):
-            t = self.tokens[self.pos]
-
-            if t.value == '{':
-                self.sym_table.push_scope()
-                self.pos += 1
-                continue
-            if t.value == '}':
-                self.sym_table.pop_scope()
-                if len(self.sym_table.scopes) == 1: 
-                    self.current_return_type = None
-                self.pos += 1
-                continue
-
-            # --- VALIDACIÓN DE FLUJO LÓGICO Y ESTRUCTURAS ---
-            if t.value in ('if', 'while'):
-                self.pos += 1
-                if self.peek() and self.peek().value == '(':
-                    self.pos += 1
-                    cond_tokens = self.extract_until_matching_paren()
-                    cond_type = self.infer_expression_type(cond_tokens, t.line, t.column)
-                    if cond_type and cond_type != 'bool':
-                        err = f"Error Semántico: La condición en '{t.value}' debe ser una expresión booleana, se detectó '{cond_type}'. (Línea {t.line})"
-                        if err not in self.errors: self.errors.append(err)
-                continue
-
-            # --- VALIDACIÓN DE TIPOS DE RETORNO ---
-            if t.value == 'return':
-                self.pos += 1
-                ret_tokens = []
-                while self.pos < len(self.tokens) and self.tokens[self.pos].value != ';':
-                    ret_tokens.append(self.tokens[self.pos])
-                    self.pos += 1
-                
-                if self.current_return_type:
-                    if not ret_tokens and self.current_return_type != 'void':
-                        self.errors.append(f"Error Semántico: Método requiere retornar tipo '{self.current_return_type}', pero el return está vacío. (Línea {t.line})")
-                    elif ret_tokens:
-                        ret_type = self.infer_expression_type(ret_tokens, t.line, t.column)
-                        if ret_type and not self.types_are_compatible(self.current_return_type, ret_type):
-                            err = f"Error Semántico: Retorno incompatible. Se esperaba '{self.current_return_type}' pero se intenta retornar '{ret_type}'. (Línea {t.line})"
-                            if err not in self.errors: self.errors.append(err)
-                self.pos += 1
-                continue
-
-            # --- DEFINICIÓN DE MÉTODOS Y VARIABLES ---
-            if t.value in self.valid_types:
-                next_t = self.peek(1)
-                if next_t and next_t.type == 'IDENTIFIER':
-                    var_type = t.value
-                    var_name = next_t.value
-                    
-                    if self.peek(2) and self.peek(2).value == '(':
-                        self.current_return_type = var_type
-                        self.pos += 3
-                        
-                        params_esperados = []
-                        while self.pos < len(self.tokens) and self.tokens[self.pos].value != ')':
-                            pt = self.tokens[self.pos]
-                            if pt.value in self.valid_types:
-                                params_esperados.append(pt.value)
-                            self.pos += 1
-                            
-                        if not self.sym_table.insert(var_name, 'metodo', {'retorno': var_type, 'params': params_esperados}):
-                            self.errors.append(f"Error Semántico: El método '{var_name}' ya fue declarado. (Línea {next_t.line})")
-                        self.pos += 1
-                        continue
-                    else:
-                        if not self.sym_table.insert(var_name, var_type):
-                            self.errors.append(f"Error Semántico: El identificador '{var_name}' ya fue declarado. (Línea {next_t.line})")
-
-                        if self.peek(2) and self.peek(2).value == '=':
-                            self.pos += 2
-                            self.check_assignment(var_name, var_type, next_t.line, next_t.column)
-                            continue
-            
-            # --- LLAMADAS A MÉTODOS Y ASIGNACIONES ---
-            if t.type == 'IDENTIFIER':
-                var_name = t.value
-                symbol = self.sym_table.lookup(var_name)
-                next_t = self.peek(1)
-                
-                if next_t and next_t.value == '(':
-                    if not symbol:
-                        self.errors.append(f"Error Semántico: Método '{var_name}' no declarado. (Línea {t.line})")
-                        self.pos += 2
-                        self.extract_until_matching_paren()
-                        continue
-                    elif symbol['tipo'] != 'metodo':
-                        self.errors.append(f"Error Semántico: '{var_name}' no es un método. (Línea {t.line})")
-                    else:
-                        self.pos += 2
-                        argument_tokens_list = self.extract_arguments()
-                        params_requeridos = symbol.get('params', [])
-                        
-                        if len(argument_tokens_list) != len(params_requeridos):
-                            err = f"Error Semántico: Llamada al método '{var_name}' requiere {len(params_requeridos)} argumentos, se dieron {len(argument_tokens_list)}. (Línea {t.line})"
-                            if err not in self.errors: self.errors.append(err)
-                        else:
-                            for i, arg_tokens in enumerate(argument_tokens_list):
-                                arg_type = self.infer_expression_type(arg_tokens, t.line, t.column)
-                                if arg_type and not self.types_are_compatible(params_requeridos[i], arg_type):
-                                    err = f"Error Semántico: Argumento {i+1} de '{var_name}' debe ser '{params_requeridos[i]}', no '{arg_type}'. (Línea {t.line})"
-                                    if err not in self.errors: self.errors.append(err)
-                        continue
-                
+        try:
+            self.check_statements(self.program.body)
+        except ErrorLimitReached:
+            if self.cache is not None:
+                self.cache.entries.update(self.cache_used)
+        else:
+            # Solo se conservan los cuerpos que siguen en el programa
+            if self.cache is not None:
+                self.cache.entries = self.cache_used
+        return self.errors, self.sym_table
+
+    def check_statements(self, statements):
+        checkers = self.statement_checkers
+        for stmt in statements:
+            checker = checkers.get(type(stmt))
+            if checker:
+                checker(stmt)
+
+    def enter_scope(self):
+        self.sym_table.push_scope()
+
+    def exit_scope(self):
+        self.sym_table.pop_scope()
+        if self.sym_table.depth == 1: 
+            self.current_return_type = None
+
+    # --- BLOQUES, CLASES Y MÉTODOS ---
+    def check_block(self, block):
+        self.enter_scope()
+        self.check_statements(block.body)
+        self.exit_scope()
+
+    def check_class(self, node):
+        if self.recorded_classes is not None and node.name.value not in self.class_names:
+            self.recorded_classes.append(node.name.value)
+        self.class_names.add(node.name.value)
+        self.check_scope(node, node.body)
+
+    def check_method(self, node):
+        var_type = node.type.value
+        var_name = node.name.value
+        if node.type.kind == K.IDENTIFIER and var_type not in self.valid_types and var_type not in self.class_names:
+            self.add_error('undeclared', node.type.line, var_type)
+        self.current_return_type = var_type
+
+        params_esperados = [p.type.value for p in node.params]
+        if not self.sym_table.insert(var_name, 'metodo', {'retorno': var_type, 'params': params_esperados}, node.name.line):
+            self.add_error('method_redeclared', node.name.line, var_name)
+        self.check_scope(node.body, node.body.body, var_type)
+
+    # --- CACHÉ DE CUERPOS DEL NIVEL SUPERIOR ---
+    def check_scope(self, unit, statements, return_type=None):
+        """Revisa `statements` en un ámbito nuevo; en el nivel superior usa la caché si hay una."""
+        if self.cache is None or self.sym_table.depth != 1 or unit.end <= unit.start:
+            self.enter_scope()
+            self.check_statements(statements)
+            self.exit_scope()
+            return
+        tokens = self.tokens[unit.start:unit.end]
+        base = tokens[0].line
+        source = self.program.source
+        if source is not None:
+            # El texto del cuerpo determina sus tokens y sus líneas relativas
+            key = (return_type, source[tokens[0].span[0]:tokens[-1].span[1]])
+        else:
+            key = (return_type, tuple([t.kind for t in tokens]), tuple([t.value for t in tokens]),
+                   tuple([t.line - base for t in tokens]))
+        entry = self.cache.entries.get(key)
+        # Si los errores guardados pueden llegar a max_errors el cuerpo se analiza de nuevo,
+        # para detenerse en el mismo punto que sin caché
+        limit = self.diagnostics.max_errors
+        if (entry is not None and self.deps_match(entry.deps)
+                and (limit is None or len(self.diagnostics) + len(entry.errors) < limit)):
+            self.cache.hits += 1
+            self.cache_used[key] = entry
+            self.replay(entry, base)
+            return
+
+        self.cache.misses += 1
+        table = self.sym_table
+        lookup, class_names = table.lookup, self.class_names
+        names = {t.value for t in tokens if t.kind == K.IDENTIFIER}
+        deps = tuple((name, lookup(name), name in class_names) for name in names)
+        first_record, first_scope = len(table.history), table.scope_count
+
+        self.recording = errors = []
+        self.recorded_classes = classes = []
+        try:
+            self.enter_scope()
+            self.check_statements(statements)
+            self.exit_scope()
+        finally:
+            self.recording = self.recorded_classes = None
+        errors = [(code, line - base, args) for code, line, args in errors]
+        symbols = [(r.name, r.info, r.scope - first_scope, r.line - base) for r in table.history[first_record:]]
+        self.cache_used[key] = CacheEntry(deps, errors, symbols, table.scope_count - first_scope, classes)
+
+    def deps_match(self, deps):
+        lookup, class_names = self.sym_table.lookup, self.class_names
+        for name, symbol, is_class in deps:
+            if lookup(name) != symbol or (name in class_names) != is_class:
+                return False
+        return True
+
+    def replay(self, entry, base):
+        """Aplica una entrada de la caché como si el cuerpo se hubiera analizado en la línea `base`."""
+        table = self.sym_table
+        first_scope = table.scope_count
+        self.class_names.update(entry.classes)
+        table.history.extend(SymbolRecord(name, info, scope + first_scope, line + base)
+                             for name, info, scope, line in entry.symbols)
+        table.scope_count += entry.scopes
+        self.current_return_type = None
+        for code, line, args in entry.errors:
+            self.add_error(code, line + base, *args)
+
+    def check_var_decl(self, node):
+        var_type = node.type.value
+        name = node.name
+        if var_type in self.valid_types or var_type in self.class_names:
+            if not self.sym_table.insert(name.value, var_type, line=name.line):
+                self.add_error('redeclared', name.line, name.value)
+            if node.init is not None:
+                self.check_assignment(name.value, var_type, node.init, name.line, name.column)
+            return
+
+        # Tipo desconocido: la declaración no crea el símbolo y se revisa como una asignación
+        if node.type.kind == K.IDENTIFIER:
+            self.add_error('undeclared', node.type.line, var_type)
+        self.check_target(name, node.init)
+
+    # --- ASIGNACIONES Y EXPRESIONES SUELTAS ---
+    def check_assign(self, node):
+        target = node.target
+        if isinstance(target, ast_nodes.Name):
+            self.check_target(target.token, node.value)
+        else:
+            self.check_identifiers(target)
+            self.check_identifiers(node.value)
+
+    def check_target(self, t, value):
+        symbol = self.sym_table.lookup(t.value)
+        if not symbol:
+            self.add_error('undeclared', t.line, t.value)
+            if value is not None:
+                self.check_identifiers(value)
+        elif value is not None:
+            self.check_assignment(t.value, symbol['tipo'], value, t.line, t.column)
+
+    def check_expr_stmt(self, node):
+        self.check_identifiers(node.expr)
+
+    def check_identifiers(self, expr):
+        """Revisa que estén declarados los identificadores de una expresión cuyo tipo no se valida."""
+        lookup = self.sym_table.lookup
+        pending = [expr]
+        while pending:
+            expr = pending.pop()
+            if isinstance(expr, ast_nodes.Name):
+                t = expr.token
+                if not lookup(t.value):
+                    self.add_error('undeclared', t.line, t.value)
+            elif isinstance(expr, ast_nodes.Binary):
+                pending.append(expr.right)
+                pending.append(expr.left)
+            elif isinstance(expr, ast_nodes.Unary):
+                pending.append(expr.operand)
+            elif isinstance(expr, ast_nodes.Paren):
+                pending.append(expr.expr)
+            elif isinstance(expr, ast_nodes.Call):
+                t = expr.name
+                symbol = lookup(t.value)
                 if not symbol:
-                    self.errors.append(f"Error Semántico: Identificador '{var_name}' no declarado. (Línea {t.line})")
+                    self.add_error('undeclared_method', t.line, t.value)
+                elif symbol['tipo'] != 'metodo':
+                    self.add_error('not_a_method', t.line, t.value)
+                    pending.extend(reversed(expr.args))
                 else:
-                    var_type = symbol['tipo']
-                    if next_t and next_t.value == '=':
-                        self.pos += 1
-                        self.check_assignment(var_name, var_type, t.line, t.column)
-                        continue
+                    self.check_call_args(t.value, symbol, expr.args, t.line, t.column)
+            elif isinstance(expr, ast_nodes.Member):
+                t = expr.obj
+                if not lookup(t.value):
+                    self.add_error('undeclared', t.line, t.value)
+                pending.extend(reversed(expr.args or ()))
+            elif isinstance(expr, ast_nodes.New):
+                t = expr.name
+                if t.value not in self.class_names:
+                    self.add_error('undeclared', t.line, t.value)
+                pending.extend(reversed(expr.args))
 
-            self.pos += 1
+    def check_call_args(self, func_name, symbol, args, line, col):
+        params_requeridos = symbol.get('params', [])
+        
+        if len(args) != len(params_requeridos):
+            self.add_error('argument_count', line, func_name, len(params_requeridos), len(args))
+        else:
+            for i, arg in enumerate(args):
+                arg_type = self.infer_expression_type(arg, line, col)
+                self.check_argument(func_name, i, params_requeridos[i], arg_type, line)
 
-        return self.errors, self.sym_table
+    def check_argument(self, func_name, i, param_type, arg_type, line):
+        if arg_type and not self.types_are_compatible(param_type, arg_type):
+            self.add_error('argument_type', line, i+1, func_name, param_type, arg_type)
 
-    def extract_until_matching_paren(self):
-        tokens_extr = []
-        paren_count = 0
-        while self.pos < len(self.tokens):
-            tok = self.tokens[self.pos]
-            if tok.value == '(': paren_count += 1
-            elif tok.value == ')':
-                if paren_count == 0: break
-                paren_count -= 1
-            tokens_extr.append(tok)
-            self.pos += 1
-        return tokens_extr
-
-    def extract_arguments(self):
-        args_list = []
-        current_arg = []
-        paren_count = 0
-        while self.pos < len(self.tokens):
-            tok = self.tokens[self.pos]
-            if tok.value == '(': paren_count += 1
-            elif tok.value == ')':
-                if paren_count == 0:
-                    if current_arg: args_list.append(current_arg)
-                    break
-                paren_count -= 1
-            elif tok.value == ',' and paren_count == 0:
-                args_list.append(current_arg)
-                current_arg = []
-                self.pos += 1
-                continue
-            current_arg.append(tok)
-            self.pos += 1
-        return args_list
-
-    def check_assignment(self, var_name, var_type, line, col):
-        self.pos += 1
-        expr_tokens = []
-        paren_count = 0
-        
-        while self.pos < len(self.tokens):
-            t = self.tokens[self.pos]
-            
-            # Contamos los paréntesis para saber si estamos dentro de una función o fórmula
-            if t.value == '(': 
-                paren_count += 1
-            elif t.value == ')': 
-                paren_count -= 1
-            
-            # Solo detenerse si encontramos un ';' o una ',' pero fuera de cualquier paréntesis
-            if paren_count == 0 and t.value in (';', ','):
-                break
-                
-            expr_tokens.append(t)
-            self.pos += 1
-            
-        if not expr_tokens: return
-        expr_type = self.infer_expression_type(expr_tokens, line, col)
+    def check_assignment(self, var_name, var_type, expr, line, col):
+        expr_type = self.infer_expression_type(expr, line, col)
         
         if expr_type and not self.types_are_compatible(var_type, expr_type):
-            err = f"Error Semántico: Tipo incompatible. Intentó asignar '{expr_type}' a '{var_name}' ({var_type}). (Línea {line})"
-            if err not in self.errors: self.errors.append(err)
-
-    def extract_and_validate_args(self, func_name, symbol, tokens, start_index):
-        args_list = []
-        current_arg = []
-        paren_count = 0
-        i = start_index
-        
-        while i < len(tokens):
-            tok = tokens[i]
-            if tok.value == '(': paren_count += 1
-            elif tok.value == ')':
-                if paren_count == 0:
-                    if current_arg: args_list.append(current_arg)
-                    break
-                paren_count -= 1
-            elif tok.value == ',' and paren_count == 0:
-                args_list.append(current_arg)
-                current_arg = []
-                i += 1
-                continue
-            
-            current_arg.append(tok)
-            i += 1
+            self.add_error('assignment_type', line, expr_type, var_name, var_type)
 
-        params_requeridos = symbol.get('params', [])
-        line = tokens[start_index - 1].line if start_index > 0 else 0
-        
-        if len(args_list) != len(params_requeridos):
-            err = f"Error Semántico: Llamada al método '{func_name}' requiere {len(params_requeridos)} argumentos, se dieron {len(args_list)}. (Línea {line})"
-            if err not in self.errors: self.errors.append(err)
+    # --- VALIDACIÓN DE FLUJO LÓGICO Y ESTRUCTURAS ---
+    def check_condition(self, t, cond):
+        cond_type = self.infer_expression_type(cond, t.line, t.column)
+        if cond_type and cond_type != 'bool':
+            self.add_error('condition_type', t.line, t.value, cond_type)
+
+    def check_if(self, node):
+        self.check_condition(node.token, node.cond)
+        self.check_block(node.then)
+        if node.orelse is not None:
+            self.check_block(node.orelse)
+
+    def check_while(self, node):
+        self.check_condition(node.token, node.cond)
+        self.check_block(node.body)
+
+    def check_do_while(self, node):
+        self.check_block(node.body)
+        self.check_condition(node.while_token, node.cond)
+
+    def check_for(self, node):
+        self.check_statements((node.init,))
+        self.check_identifiers(node.cond)
+        self.check_statements((node.step,))
+        self.check_block(node.body)
+
+    def check_switch(self, node):
+        self.check_identifiers(node.expr)
+        self.enter_scope()
+        self.check_statements(node.body)
+        self.exit_scope()
+
+    # --- VALIDACIÓN DE TIPOS DE RETORNO ---
+    def check_return(self, node):
+        if not self.current_return_type:
+            return
+        t = node.token
+        if node.value is None:
+            if self.current_return_type != 'void':
+                self.add_error('empty_return', t.line, self.current_return_type)
         else:
-            for j, arg_tokens in enumerate(args_list):
-                arg_type = self.infer_expression_type(arg_tokens, line, 0)
-                if arg_type and not self.types_are_compatible(params_requeridos[j], arg_type):
-                    err = f"Error Semántico: Argumento {j+1} de '{func_name}' debe ser '{params_requeridos[j]}', no '{arg_type}'. (Línea {line})"
-                    if err not in self.errors: self.errors.append(err)
-                    
-        return args_list, i
-
-    def infer_expression_type(self, tokens, line, col):
-        types_in_expr = set()
-        math_ops = {'+', '-', '*', '/', '%'}
-        rel_ops = {'==', '!=', '<', '>', '<=', '>='}
-        log_ops = {'&&', '||'}
-        
-        found_math = False
-        found_rel = False
-        found_log = False
-        
-        i = 0
-        while i < len(tokens):
-            t = tokens[i]
-            
-            if t.value in math_ops: found_math = True
-            if t.value in rel_ops: found_rel = True
-            if t.value in log_ops: found_log = True
-            
-            if t.value == '/' and i + 1 < len(tokens) and tokens[i+1].value == '0':
-                err = f"Error Semántico: División por cero. (Línea {t.line})"
-                if err not in self.errors: self.errors.append(err)
-
-            t_type = None
-            if t.type == 'STRING': t_type = 'string'
-            elif t.type == 'CHAR_LITERAL': t_type = 'char'
-            elif t.value in ('true', 'false'): t_type = 'bool'
-            elif t.type == 'NUMBER': t_type = 'float' if '.' in t.value else 'int'
-            elif t.type == 'IDENTIFIER':
-                sym = self.sym_table.lookup(t.value)
+            ret_type = self.infer_expression_type(node.value, t.line, t.column)
+            if ret_type and not self.types_are_compatible(self.current_return_type, ret_type):
+                self.add_error('return_type_mismatch', t.line, self.current_return_type, ret_type)
+
+    # --- INFERENCIA DE TIPOS ---
+    def infer_expression_type(self, expr, line, col=None):
+        """Tipo de una expresión, calculado en un solo recorrido de abajo hacia arriba.
+
+        Los operandos y operadores se juntan como bits en un marco por expresión;
+        los argumentos de una llamada a un 'metodo' abren su propio marco y se
+        comparan con la firma al cerrarlo. El recorrido usa una pila explícita
+        (sin recursión) y el tipo de cada expresión y argumento se guarda en
+        type_cache según su rango de tokens.
+        """
+        cache = self.type_cache
+        span = (expr.start, expr.end)
+        if span in cache:
+            return cache[span]
+        tokens = self.tokens
+        lookup = self.sym_table.lookup
+        frames = [[0, 0, line]]     # [bits de tipos, bits de operadores, línea de los errores]
+        frame = frames[0]
+        # Nodos por visitar y, entre ellos, acciones (tuplas) que se ejecutan en ese orden
+        work = [expr]
+        pop, push = work.pop, work.append
+        while work:
+            node = pop()
+            cls = type(node)
+            if cls is tuple:
+                action, node, extra = node
+                if action == _ARGUMENT:
+                    frame = [0, 0, extra]
+                    frames.append(frame)
+                elif action == _END_ARGUMENT:
+                    types, ops, _ = frame = frames.pop()
+                    # Sin operadores no hay mezclas que reportar
+                    arg_type = self.resolve_type(frame) if ops else _RESULT_TYPES[types]
+                    cache[(node.start, node.end)] = arg_type
+                    frame = frames[-1]
+                    if arg_type and arg_type != extra[2]:
+                        self.check_argument(extra[0], extra[1], extra[2], arg_type, extra[3])
+                elif action == _CACHED_ARGUMENT:
+                    self.check_argument(extra[0], extra[1], extra[2], cache[(node.start, node.end)], extra[3])
+                else:
+                    self.add_error('division_by_zero', node.op.line)
+            elif cls is ast_nodes.Name:
+                value = node.token.value
+                if value in _BOOL_LITERALS:
+                    frame[0] |= _T_BOOL
+                    continue
+                sym = lookup(value)
                 if sym:
-                    if sym['tipo'] == 'metodo':
-                        t_type = sym.get('retorno')
-                        if i + 1 < len(tokens) and tokens[i+1].value == '(':
-                            args_list, jump_index = self.extract_and_validate_args(t.value, sym, tokens, i + 2)
-                            i = jump_index 
-                    else:
-                        t_type = sym['tipo']
-            
-            if t_type: types_in_expr.add(t_type)
-            i += 1
-
-        has_string = 'string' in types_in_expr
-        has_numeric = 'int' in types_in_expr or 'float' in types_in_expr or 'double' in types_in_expr
-        has_bool = 'bool' in types_in_expr
+                    t_type = sym.get('retorno') if sym['tipo'] == 'metodo' else sym['tipo']
+                    frame[0] |= _TYPE_BITS.get(t_type, 0)
+            elif cls is ast_nodes.Literal:
+                t = node.token
+                bits = _LITERAL_BITS.get(t.kind, 0)
+                if not bits and t.kind == K.NUMBER:
+                    bits = _T_FLOAT if '.' in t.value else _T_INT
+                frame[0] |= bits
+            elif cls is ast_nodes.Binary:
+                kind = node.op.kind
+                frame[1] |= _OP_BITS.get(kind, 0)
+                push(node.right)
+                if kind == K.SLASH and tokens[node.right.start].value == '0':
+                    push((_DIVISION, node, None))
+                push(node.left)
+            elif cls is ast_nodes.Unary:
+                frame[1] |= _OP_BITS.get(node.op.kind, 0)
+                push(node.operand)
+            elif cls is ast_nodes.Paren:
+                push(node.expr)
+            elif cls is ast_nodes.Call:
+                t = node.name
+                sym = lookup(t.value)
+                args = node.args
+                if sym and sym['tipo'] == 'metodo':
+                    frame[0] |= _TYPE_BITS.get(sym.get('retorno'), 0)
+                    # Los argumentos se revisan contra la firma y no cuentan para esta expresión
+                    params = sym.get('params', [])
+                    call_line = tokens[node.start + 1].line
+                    if len(args) != len(params):
+                        self.add_error('argument_count', call_line, t.value, len(params), len(args))
+                        continue
+                    for i in range(len(params) - 1, -1, -1):
+                        arg = args[i]
+                        arg_span = (arg.start, arg.end)
+                        if arg_span not in cache and type(arg) is ast_nodes.Name:
+                            # Un nombre solo no necesita marco: su tipo se resuelve aquí
+                            value = arg.token.value
+                            arg_sym = lookup(value) if value not in _BOOL_LITERALS else None
+                            if arg_sym is None:
+                                arg_type = 'bool' if value in _BOOL_LITERALS else None
+                            else:
+                                arg_type = arg_sym.get('retorno') if arg_sym['tipo'] == 'metodo' else arg_sym['tipo']
+                                arg_type = _RESULT_TYPES[_TYPE_BITS.get(arg_type, 0)]
+                            cache[arg_span] = arg_type
+                            if not arg_type or arg_type == params[i]:
+                                continue
+                        check = (t.value, i, params[i], call_line)
+                        if arg_span in cache:
+                            push((_CACHED_ARGUMENT, arg, check))
+                        else:
+                            push((_END_ARGUMENT, arg, check))
+                            push(arg)
+                            push((_ARGUMENT, None, call_line))
+                    continue
+                if sym:
+                    frame[0] |= _TYPE_BITS.get(sym['tipo'], 0)
+                work.extend(reversed(args))
+            elif cls is ast_nodes.Member:
+                sym = lookup(node.obj.value)
+                if sym and sym['tipo'] != 'metodo':
+                    frame[0] |= _TYPE_BITS.get(sym['tipo'], 0)
+                if node.args:
+                    work.extend(reversed(node.args))
+            elif cls is ast_nodes.New:
+                work.extend(reversed(node.args))
+        result = cache[span] = self.resolve_type(frame)
+        return result
+
+    def resolve_type(self, frame):
+        """Reporta las mezclas inválidas de un marco y regresa el tipo resultante."""
+        types, ops, line = frame
+        found_math = ops & _OP_MATH
+        found_rel = ops & _OP_REL
+        found_log = ops & _OP_LOG
+
+        has_string = types & _T_STRING
+        has_numeric = types & _T_NUMERIC
+        has_bool = types & _T_BOOL
 
         if found_math and has_string:
-            err = f"Error Semántico: Operadores matemáticos no válidos con texto. (Línea {line})"
-            if err not in self.errors: self.errors.append(err)
+            self.add_error('math_with_text', line)
         if found_math and has_bool:
-            err = f"Error Semántico: Operaciones matemáticas inválidas con booleanos. (Línea {line})"
-            if err not in self.errors: self.errors.append(err)
+            self.add_error('math_with_bool', line)
         if found_log and (has_numeric or has_string) and not found_rel:
-            err = f"Error Semántico: Los operadores lógicos requieren booleanos. (Línea {line})"
-            if err not in self.errors: self.errors.append(err)
+            self.add_error('logical_requires_bool', line)
         if found_rel and has_string and has_numeric:
-            err = f"Error Semántico: No se puede comparar texto con números. (Línea {line})"
-            if err not in self.errors: self.errors.append(err)
+            self.add_error('text_number_comparison', line)
 
-        if found_rel or found_log: return 'bool'
-        elif has_string: return 'string'
-        elif 'float' in types_in_expr or 'double' in types_in_expr: return 'float'
-        elif 'int' in types_in_expr: return 'int'
-        elif 'char' in types_in_expr: return 'char'
-        elif 'bool' in types_in_expr: return 'bool'
-        return None
+        return _RESULT_TYPES[ops << 6 | types]
 
     def types_are_compatible(self, target_type, source_type):
         if target_type == source_type: return True
-        return False
\ No newline at end of file
+        return False
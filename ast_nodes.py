@@ -0,0 +1,253 @@
+"""Nodos del árbol sintáctico que construye el Parser.
+
+Cada nodo guarda su rango de tokens [start, end) dentro de la lista de tokens
+significativos del programa, así las etapas posteriores pueden recuperar el
+texto original de una expresión sin volver a recorrer los tokens.
+"""
+
+class Node:
+    __slots__ = ('start', 'end')
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+# --- PROGRAMA Y DECLARACIONES ---
+class Program(Node):
+    __slots__ = ('body', 'tokens', 'source')
+
+    def __init__(self, start, end, body, tokens, source=None):
+        super().__init__(start, end)
+        self.body = body
+        self.tokens = tokens    # Tokens significativos a los que apuntan los rangos
+        self.source = source    # Texto al que apuntan los span de los tokens, o None
+
+class ClassDecl(Node):
+    __slots__ = ('token', 'name', 'body')
+
+    def __init__(self, start, end, token, name, body):
+        super().__init__(start, end)
+        self.token = token      # 'class'
+        self.name = name        # Token del nombre
+        self.body = body        # Lista de miembros
+
+class Param(Node):
+    __slots__ = ('type', 'name')
+
+    def __init__(self, start, end, type, name):
+        super().__init__(start, end)
+        self.type = type
+        self.name = name
+
+class MethodDecl(Node):
+    __slots__ = ('type', 'name', 'params', 'body')
+
+    def __init__(self, start, end, type, name, params, body):
+        super().__init__(start, end)
+        self.type = type        # Token del tipo de retorno
+        self.name = name
+        self.params = params    # Lista de Param
+        self.body = body        # Block
+
+class VarDecl(Node):
+    __slots__ = ('type', 'name', 'init')
+
+    def __init__(self, start, end, type, name, init):
+        super().__init__(start, end)
+        self.type = type
+        self.name = name
+        self.init = init        # Expresión o None
+
+class Directive(Node):
+    __slots__ = ('token',)
+
+    def __init__(self, start, end, token):
+        super().__init__(start, end)
+        self.token = token      # '#'; la directiva se conserva pero no se analiza
+
+# --- SENTENCIAS ---
+class Block(Node):
+    __slots__ = ('body',)
+
+    def __init__(self, start, end, body):
+        super().__init__(start, end)
+        self.body = body
+
+class Assign(Node):
+    __slots__ = ('target', 'value')
+
+    def __init__(self, start, end, target, value):
+        super().__init__(start, end)
+        self.target = target
+        self.value = value
+
+class ExprStmt(Node):
+    __slots__ = ('expr',)
+
+    def __init__(self, start, end, expr):
+        super().__init__(start, end)
+        self.expr = expr
+
+class If(Node):
+    __slots__ = ('token', 'cond', 'then', 'orelse')
+
+    def __init__(self, start, end, token, cond, then, orelse):
+        super().__init__(start, end)
+        self.token = token
+        self.cond = cond
+        self.then = then        # Block
+        self.orelse = orelse    # Block o None
+
+class While(Node):
+    __slots__ = ('token', 'cond', 'body')
+
+    def __init__(self, start, end, token, cond, body):
+        super().__init__(start, end)
+        self.token = token
+        self.cond = cond
+        self.body = body
+
+class DoWhile(Node):
+    __slots__ = ('token', 'body', 'while_token', 'cond')
+
+    def __init__(self, start, end, token, body, while_token, cond):
+        super().__init__(start, end)
+        self.token = token
+        self.body = body
+        self.while_token = while_token
+        self.cond = cond
+
+class For(Node):
+    __slots__ = ('token', 'init', 'cond', 'step', 'body')
+
+    def __init__(self, start, end, token, init, cond, step, body):
+        super().__init__(start, end)
+        self.token = token
+        self.init = init        # VarDecl, Assign o ExprStmt
+        self.cond = cond
+        self.step = step        # Assign o ExprStmt
+        self.body = body
+
+class Switch(Node):
+    __slots__ = ('token', 'expr', 'body')
+
+    def __init__(self, start, end, token, expr, body):
+        super().__init__(start, end)
+        self.token = token
+        self.expr = expr
+        self.body = body        # Case y sentencias en el orden del código
+
+class Case(Node):
+    __slots__ = ('token', 'value')
+
+    def __init__(self, start, end, token, value):
+        super().__init__(start, end)
+        self.token = token      # 'case' o 'default'
+        self.value = value      # Token del valor, None para 'default'
+
+class Return(Node):
+    __slots__ = ('token', 'value')
+
+    def __init__(self, start, end, token, value):
+        super().__init__(start, end)
+        self.token = token
+        self.value = value      # Expresión o None
+
+class Break(Node):
+    __slots__ = ('token',)
+
+    def __init__(self, start, end, token):
+        super().__init__(start, end)
+        self.token = token
+
+class Continue(Node):
+    __slots__ = ('token',)
+
+    def __init__(self, start, end, token):
+        super().__init__(start, end)
+        self.token = token
+
+class Goto(Node):
+    __slots__ = ('token', 'label')
+
+    def __init__(self, start, end, token, label):
+        super().__init__(start, end)
+        self.token = token
+        self.label = label      # Token de la etiqueta destino
+
+class Label(Node):
+    __slots__ = ('name',)
+
+    def __init__(self, start, end, name):
+        super().__init__(start, end)
+        self.name = name
+
+# --- EXPRESIONES ---
+class Name(Node):
+    __slots__ = ('token',)
+
+    def __init__(self, start, end, token):
+        super().__init__(start, end)
+        self.token = token
+
+class Literal(Node):
+    __slots__ = ('token',)
+
+    def __init__(self, start, end, token):
+        super().__init__(start, end)
+        self.token = token
+
+class Binary(Node):
+    __slots__ = ('op', 'left', 'right')
+
+    def __init__(self, start, end, op, left, right):
+        super().__init__(start, end)
+        self.op = op            # Token del operador
+        self.left = left
+        self.right = right
+
+class Unary(Node):
+    __slots__ = ('op', 'operand')
+
+    def __init__(self, start, end, op, operand):
+        super().__init__(start, end)
+        self.op = op            # Token del operador ('-' o '!')
+        self.operand = operand
+
+class Paren(Node):
+    __slots__ = ('token', 'expr')
+
+    def __init__(self, start, end, token, expr):
+        super().__init__(start, end)
+        self.token = token      # '('
+        self.expr = expr
+
+class Call(Node):
+    __slots__ = ('name', 'args')
+
+    def __init__(self, start, end, name, args):
+        super().__init__(start, end)
+        self.name = name        # Token del método
+        self.args = args
+
+class Member(Node):
+    __slots__ = ('obj', 'name', 'args')
+
+    def __init__(self, start, end, obj, name, args):
+        super().__init__(start, end)
+        self.obj = obj          # Token del objeto
+        self.name = name        # Token del miembro
+        self.args = args        # Argumentos si es llamada (obj.metodo(...)), si no None
+
+class New(Node):
+    __slots__ = ('token', 'name', 'args')
+
+    def __init__(self, start, end, token, name, args):
+        super().__init__(start, end)
+        self.token = token      # 'new'
+        self.name = name        # Token de la clase
+        self.args = args
@@ -0,0 +1,836 @@
+"""Benchmarks de rendimiento del compilador.
+
+Uso:
+    python benchmarks.py                 # corre todos los benchmarks
+    python benchmarks.py lexer_scaling   # corre solo uno
+"""
+import sys
+import time
+import tracemalloc
+
+import lexer
+
+# Fragmento representativo de un programa (clases, métodos, control de flujo, comentarios)
+SAMPLE_UNIT = '''// Unidad generada {n}
+class Clase{n} {{
+    int valor;
+    int metodo{n}(int a, float b) {{
+        int limite = 15;
+        float factor = 1.5; /* comentario
+        de varias líneas */
+        string mensaje = "Calculando...";
+        if (a > limite && b < 2.5) {{
+            valor = (limite * 2) + a;
+        }} else {{
+            valor = valor - 1;
+        }}
+        while (valor < 100) {{
+            valor = valor + 1;
+        }}
+        return valor;
+    }}
+}}
+'''
+
+def make_source(size_bytes):
+    """Genera un programa sintético de aproximadamente `size_bytes` caracteres."""
+    parts = []
+    total = 0
+    n = 0
+    while total < size_bytes:
+        unit = SAMPLE_UNIT.format(n=n)
+        parts.append(unit)
+        total += len(unit)
+        n += 1
+    return ''.join(parts)
+
+def _timeit(fn, repeat=1):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def bench_lexer_scaling(sizes=(10_000, 100_000, 1_000_000, 10_000_000, 50_000_000)):
+    """Tiempo de lexer.tokenize contra el tamaño de entrada: debe crecer linealmente."""
+    print("=== lexer.tokenize: escalamiento ===")
+    print(f"{'TAMAÑO':>12} | {'TOKENS':>10} | {'SEG':>8} | {'MB/s':>7} | {'us/KB':>7}")
+    for size in sizes:
+        src = make_source(size)
+        result = []
+        elapsed = _timeit(lambda: result.append(lexer.tokenize(src)), repeat=3 if size <= 1_000_000 else 1)
+        n_tokens = len(result[-1])
+        result.clear()
+        mb = len(src) / 1e6
+        print(f"{len(src):>12} | {n_tokens:>10} | {elapsed:>8.3f} | {mb / elapsed:>7.2f} | {elapsed * 1e6 / (len(src) / 1000):>7.2f}")
+
+def bench_relex(sizes=(100_000, 1_000_000, 10_000_000)):
+    """Re-tokenizar tras editar un carácter: lexer.relex contra lexer.tokenize completo."""
+    print("=== lexer.relex: edición de un carácter ===")
+    print(f"{'TAMAÑO':>12} | {'tokenize (s)':>12} | {'diff (s)':>9} | {'relex (s)':>9} | {'ACELERACIÓN':>11}")
+    for size in sizes:
+        src = make_source(size)
+        tokens = lexer.tokenize(src)
+        middle = src.index('valor + 1', len(src) // 2)
+        edited = src[:middle] + 'valor + 2' + src[middle + len('valor + 1'):]
+
+        full = _timeit(lambda: lexer.tokenize(edited), repeat=1)
+        diff = _timeit(lambda: lexer.edit_between(src, edited), repeat=3)
+        offset, deleted, inserted = lexer.edit_between(src, edited)
+        t0 = time.perf_counter()
+        lexer.relex(tokens, offset, deleted, inserted)
+        incremental = time.perf_counter() - t0
+        print(f"{len(src):>12} | {full:>12.4f} | {diff:>9.5f} | {incremental:>9.5f} | {full / (diff + incremental):>10.1f}x")
+
+def _retained(build):
+    """Memoria (MB) que sigue ocupada por el resultado de build() y el tiempo que tardó."""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - t0
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return current / 1e6, elapsed
+
+def bench_token_buffer(sizes=(1_000_000, 5_000_000)):
+    """Memoria de List[Token] contra TokenBuffer, incluyendo la vista de tokens significativos."""
+    print("=== TokenBuffer contra List[Token] ===")
+    print(f"{'TAMAÑO':>12} | {'List[Token] MB':>14} | {'TokenBuffer MB':>14} | {'AHORRO':>7}")
+    for size in sizes:
+        src = make_source(size)
+        def as_list():
+            tokens = lexer.tokenize(src)
+            lexer.significant(tokens)
+            return tokens
+        def as_buffer():
+            buf = lexer.tokenize_buffer(src)
+            lexer.significant(buf)
+            return buf
+        list_mb, _ = _retained(as_list)
+        buf_mb, _ = _retained(as_buffer)
+        print(f"{len(src):>12} | {list_mb:>14.1f} | {buf_mb:>14.1f} | {list_mb / buf_mb:>6.1f}x")
+
+def bench_lexer_engines(size=2_000_000):
+    """Rendimiento en MB/s del motor regex contra el motor de despacho por primer carácter."""
+    print("=== Motores léxicos: regex contra dfa ===")
+    src = make_source(size)
+    mb = len(src) / 1e6
+    print(f"{'MOTOR':>6} | {'escaneo MB/s':>12} | {'tokenize MB/s':>13} | {'tokenize_buffer MB/s':>20}")
+    for engine in lexer.ENGINES:
+        scan = _timeit(lambda: sum(1 for _ in lexer._matches(src, engine)), repeat=3)
+        full = _timeit(lambda: lexer.tokenize(src, engine), repeat=3)
+        compact = _timeit(lambda: lexer.tokenize_buffer(src, engine), repeat=3)
+        print(f"{engine:>6} | {mb / scan:>12.2f} | {mb / full:>13.2f} | {mb / compact:>20.2f}")
+
+def bench_pipeline(size=1_000_000, repeat=3):
+    """Tiempo por etapa (mejor de `repeat`) del pipeline completo de compile_all sobre una entrada grande."""
+    import parser
+    import Semantic
+    import icg
+    import optimizer
+    import codegen
+
+    print("=== Pipeline completo (compile_all) ===")
+    src = make_source(size)
+    stages = []
+
+    def stage(name, fn):
+        result = []
+        elapsed = _timeit(lambda: result.append(fn()), repeat=repeat)
+        stages.append((name, elapsed))
+        return result[-1]
+
+    tokens = stage('léxico', lambda: lexer.tokenize(src))
+    tree = stage('sintáctico', lambda: parser.parse_tree(tokens))
+    stage('semántico', lambda: Semantic.SemanticAnalyzer(tree).analyze())
+    tac = stage('código intermedio', lambda: icg.ICG(tree).generate())
+    optimized = stage('optimización', lambda: optimizer.Optimizer(tac).optimize())
+    stage('código máquina', lambda: codegen.CodeGenerator(optimized).generate())
+
+    print(f"Entrada: {len(src)} caracteres, {len(tokens)} tokens")
+    for name, elapsed in stages:
+        print(f"{name:>18} | {elapsed:>8.3f} s")
+    print(f"{'TOTAL':>18} | {sum(e for _, e in stages):>8.3f} s")
+
+def bench_expressions(operators=100_000, depth=1_000, repeat=3):
+    """Parser de expresiones: una expresión larga y otra con paréntesis muy anidados."""
+    import parser
+
+    print("=== Parser de expresiones (precedencia de operadores) ===")
+    # a0 * 2 + a1 < 10 && a2 * 2 + a3 < 10 && ... (4 operadores por unidad)
+    units = [f"a{i} * 2 + a{i + 1} < 10" for i in range(operators // 4)]
+    long_src = "bool x = " + " && ".join(units) + ";"
+    nested_src = "int y = " + "(" * depth + "b" + " + 1)" * depth + ";"
+    print(f"{'CASO':>24} | {'TOKENS':>8} | {'SEG':>7} | {'ops/s':>10}")
+    for name, src, n_ops in (
+            (f"{len(units) * 4} operadores", long_src, len(units) * 4),
+            (f"anidamiento {depth}", nested_src, depth)):
+        tokens = lexer.tokenize(src)
+        errors = []
+        elapsed = _timeit(lambda: errors.append(parser.parse(tokens)), repeat=repeat)
+        assert not errors[-1], errors[-1][:3]
+        print(f"{name:>24} | {len(tokens):>8} | {elapsed:>7.3f} | {n_ops / elapsed:>10.0f}")
+
+def bench_frontend(size=2_000_000, max_workers=None):
+    """Front end paralelo (frontend.run) de 1 a N procesos contra la ejecución secuencial."""
+    import os
+    import frontend
+
+    max_workers = max_workers or max(2, os.cpu_count() or 1)
+    print("=== Front end paralelo: sintáctico + semántico + código intermedio ===")
+    src = make_source(size)
+    seq = []
+    base = _timeit(lambda: seq.append(frontend.run_sequential(src)), repeat=1)
+    print(f"Entrada: {len(src)} caracteres, {os.cpu_count()} CPUs")
+    print(f"{'PROCESOS':>10} | {'LOTES':>6} | {'SEG':>8} | {'ACELERACIÓN':>11}")
+    print(f"{'secuencial':>10} | {1:>6} | {base:>8.3f} | {1:>10.2f}x")
+    for workers in range(1, max_workers + 1):
+        result = []
+        elapsed = _timeit(lambda: result.append(frontend.run(src, workers)), repeat=1)
+        r = result[-1]
+        assert (r.syntax_errors, r.semantic_errors, r.tac) == (seq[-1].syntax_errors, seq[-1].semantic_errors, seq[-1].tac)
+        print(f"{workers:>10} | {r.batches:>6} | {elapsed:>8.3f} | {base / elapsed:>10.2f}x")
+
+def bench_inference(depth=250, width=12, operators=100_000, repeat=3):
+    """Inferencia de tipos del analizador semántico sobre llamadas anidadas en los argumentos."""
+    import parser
+    import Semantic
+
+    print("=== Inferencia de tipos: llamadas anidadas ===")
+    header = "int f(int p, int q) { return p; }\nint a = 1;\n"
+    nested = "f(" * depth + "a" + ", 2)" * depth
+    def tree_call(d):
+        return "a" if d == 0 else f"f({tree_call(d - 1)}, {tree_call(d - 1)})"
+    # a * 2 + a < 10 && ... con el mismo número de operadores que bench_expressions
+    long_expr = " && ".join(["a * 2 + a < 10"] * (operators // 4))
+    print(f"{'CASO':>28} | {'LLAMADAS':>8} | {'SEG':>7} | {'nodos/s':>10}")
+    for name, decl, calls in (
+            (f"anidamiento {depth}", f"int r = {nested};", depth),
+            (f"árbol de profundidad {width}", f"int r = {tree_call(width)};", 2 ** width - 1),
+            (f"{operators // 4 * 4} operadores", f"bool r = {long_expr};", 0)):
+        tree = parser.parse_tree(lexer.tokenize(header + decl))
+        nodes = len(tree.tokens)
+        errors = []
+        elapsed = _timeit(lambda: errors.append(Semantic.SemanticAnalyzer(tree).analyze()[0]), repeat=repeat)
+        assert not errors[-1], errors[-1][:3]
+        print(f"{name:>28} | {calls:>8} | {elapsed:>7.3f} | {nodes / elapsed:>10.0f}")
+
+def bench_semantic_cache(size=1_000_000, repeat=3):
+    """Análisis semántico tras editar un solo método: sin caché, llenando la caché y reutilizándola."""
+    import parser
+    import Semantic
+
+    print("=== Caché semántica por cuerpo (Ctrl+M / Ctrl+R tras una edición) ===")
+    src = make_source(size)
+    middle = src.index('valor + 1', len(src) // 2)
+    edited = src[:middle] + 'valor + 2' + src[middle + len('valor + 1'):]
+    tree = parser.parse_tree(lexer.tokenize(src))
+    edited_tree = parser.parse_tree(lexer.tokenize(edited))
+
+    cache = Semantic.SemanticCache()
+    full = _timeit(lambda: Semantic.SemanticAnalyzer(edited_tree).analyze(), repeat=repeat)
+    fill = _timeit(lambda: Semantic.SemanticAnalyzer(tree, cache=Semantic.SemanticCache()).analyze(), repeat=repeat)
+    Semantic.SemanticAnalyzer(tree, cache=cache).analyze()
+    results = []
+    def reuse():
+        # Cada repetición parte de la caché del archivo sin editar
+        warm = Semantic.SemanticCache()
+        warm.entries = dict(cache.entries)
+        t0 = time.perf_counter()
+        analyzer = Semantic.SemanticAnalyzer(edited_tree, cache=warm)
+        results.append((analyzer.analyze()[0], warm, time.perf_counter() - t0))
+    _timeit(reuse, repeat=repeat)
+    errors, warm, _ = results[-1]
+    elapsed = min(r[2] for r in results)
+    assert [str(e) for e in errors] == [str(e) for e in Semantic.SemanticAnalyzer(edited_tree).analyze()[0]]
+    print(f"Entrada: {len(src)} caracteres, {len(tree.body)} declaraciones del nivel superior")
+    print(f"{'sin caché':>22} | {full:>8.3f} s")
+    print(f"{'llenando la caché':>22} | {fill:>8.3f} s")
+    print(f"{'tras editar un método':>22} | {elapsed:>8.3f} s | {warm.misses} reanalizados, {warm.hits} reutilizados | {full / elapsed:.1f}x")
+
+def bench_tac(instructions=1_000_000, size=1_000_000):
+    """Código intermedio, optimización y código máquina sobre un programa de ~`instructions` instrucciones TAC."""
+    import ast_nodes
+    import parser
+    import icg
+    import optimizer
+    import codegen
+
+    print("=== Código de tres direcciones: generación, optimización y código máquina ===")
+    tree = parser.parse_tree(lexer.tokenize(make_source(size)))
+    # Las mismas declaraciones repetidas: temporales y etiquetas no se repiten entre copias
+    copies = -(-instructions // len(icg.ICG(tree).generate()))
+    program = ast_nodes.Program(tree.start, tree.end, tree.body * copies, tree.tokens)
+    generate = lambda: icg.ICG(program).generate()
+    stages = []
+    def stage(name, fn):
+        t0 = time.perf_counter()
+        result = fn()
+        stages.append((name, time.perf_counter() - t0))
+        return result
+    tac = stage('código intermedio', generate)
+    optimized = stage('optimización', lambda: optimizer.Optimizer(tac).optimize())
+    machine_code, _ = stage('código máquina', lambda: codegen.CodeGenerator(optimized).generate())
+    print(f"{len(tac)} instrucciones TAC, {len(optimized)} optimizadas, {len(machine_code)} de máquina")
+    for name, elapsed in stages:
+        print(f"{name:>18} | {elapsed:>8.3f} s")
+    print(f"{'TOTAL':>18} | {sum(e for _, e in stages):>8.3f} s")
+
+def bench_temporaries(sizes=(10_000, 100_000, 1_000_000)):
+    """Temporales generados contra vivos a la vez, y la memoria de datos que ocupan en el código máquina."""
+    import icg
+    import optimizer
+    import codegen
+    import tac
+
+    print("=== Reciclado de temporales por vida (Optimizer.recycle_temporaries) ===")
+    print(f"{'bytes fuente':>12} | {'temporales':>10} | {'máx. vivos':>10} | {'datos sin reciclar':>18} | {'reciclando':>10} | {'tiempo':>8}")
+    for size in sizes:
+        tac_code = icg.ICG(lexer.tokenize(make_source(size))).generate()
+        opt = optimizer.Optimizer(tac_code)
+        code = opt.remove_unreachable_code(tac_code)
+        code = opt.eliminate_redundant_assignments(code)
+        code = opt.eliminate_common_subexpressions(code)
+        code = opt.remove_unused_variables(code)
+        with tac.building():
+            t0 = time.perf_counter()
+            recycled = opt.recycle_temporaries(code)
+            elapsed = time.perf_counter() - t0
+        memory = []
+        for variant in (code, recycled):
+            generator = codegen.CodeGenerator(variant)
+            generator.generate()
+            memory.append(generator.var_addr_counter - 0x2000)
+        print(f"{size:>12,} | {opt.temps_total:>10,} | {opt.temps_peak:>10,} | {memory[0]:>16,} B | {memory[1]:>8,} B | {elapsed:>6.3f} s")
+
+def _dispatch_steps(code, variable, value):
+    """Instrucciones de despacho (comparaciones y saltos) que ejecuta un switch hasta llegar a un caso."""
+    from tac import JUMPS, Op
+    labels = {instr.label: i for i, instr in enumerate(code) if instr.op == Op.LABEL}
+    env = {variable: value}
+    compare = {'==': int.__eq__, '<': int.__lt__, '>': int.__gt__}
+    pc = steps = 0
+    while True:
+        instr = code[pc]
+        pc += 1
+        if instr.op == Op.BINARY:
+            env[instr.dest] = env[instr.a] - int(instr.b)
+        elif instr.op == Op.IF_REL:
+            steps += 1
+            if compare[instr.oper](env[instr.a], int(instr.b)):
+                pc = labels[instr.label]
+        elif instr.op == Op.GOTO:
+            steps += 1
+            pc = labels[instr.label]
+        elif instr.op == Op.JUMP_TABLE:
+            return steps + 1
+        elif instr.op != Op.LABEL:
+            return steps
+
+def bench_switch(counts=(3, 4, 16, 64, 1024), repeat=3):
+    """Despacho de switch: comparaciones en orden contra tabla de saltos (casos densos) y búsqueda binaria (dispersos)."""
+    import icg
+    from tac import Op
+
+    print("=== Despacho de switch: instrucciones ejecutadas por valor ===")
+    print(f"{'CASOS':>6} | {'valores':>8} | {'estrategia':>12} | {'TAC':>6} | {'prom. lineal':>12} | {'prom.':>6} | {'peor lineal':>11} | {'peor':>5} | {'generar (ms)':>12}")
+    for count in counts:
+        for spread, step in (('densos', 1), ('dispersos', 7)):
+            values = [i * step for i in range(count)]
+            body = ''.join(f"        case {v}: r = {v}; break;\n" for v in values)
+            src = f"int main() {{\n    int x = 0;\n    int r = 0;\n    switch (x) {{\n{body}        default: r = -1;\n    }}\n    return r;\n}}\n"
+            tokens = lexer.tokenize(src)
+            results = []
+            saved = icg._LINEAR_MAX_CASES
+            try:
+                icg._LINEAR_MAX_CASES = len(values)
+                results.append(icg.ICG(tokens).generate())
+            finally:
+                icg._LINEAR_MAX_CASES = saved
+            elapsed = _timeit(lambda: results.append(icg.ICG(tokens).generate()), repeat=repeat)
+            linear, chosen = results[0], results[-1]
+            probes = values + [values[-1] + 1]
+            stats = []
+            for code in (linear, chosen):
+                # El despacho empieza después de la asignación de r
+                start = next(i for i, instr in enumerate(code) if instr.dest == 'r') + 1
+                steps = [_dispatch_steps(code[start:], 'x', v) for v in probes]
+                stats.append((sum(steps) / len(steps), max(steps)))
+            if any(instr.op == Op.JUMP_TABLE for instr in chosen):
+                strategy = 'tabla'
+            else:
+                strategy = 'lineal' if count <= icg._LINEAR_MAX_CASES else 'binaria'
+            print(f"{count:>6} | {spread:>8} | {strategy:>12} | {len(chosen):>6} | {stats[0][0]:>12.1f} | {stats[1][0]:>6.1f} | {stats[0][1]:>11} | {stats[1][1]:>5} | {elapsed * 1e3:>12.2f}")
+
+# Condiciones al estilo de Pruebas/funcionesLogicas.cpp dentro de un ciclo
+LOGIC_PROGRAM = '''int main() {
+    int x = 3; int y = 4; int z = 1; int w = 2;
+    int a = 9; int b = 5; int c = 2;
+    int cuenta = 0;
+    int i = 0;
+    while (i < {n} && cuenta >= 0) {
+        if (x + y * 5 > 30 && (a - b) / c <= 4) { cuenta = cuenta + 1; }
+        if ((x + y) * (z - w) < 0 || a > b) { cuenta = cuenta + 2; }
+        if (!(x > 15) && (y < 3 || z == 1)) { cuenta = cuenta + 3; }
+        if (10 > 5 && 3 <= 4) { cuenta = cuenta + 1; }
+        x = x + 1;
+        if (x > 20) { x = 0; }
+        i = i + 1;
+    }
+    return cuenta;
+}
+'''
+
+def _truncate(a, b):
+    """a / b entre ints como en C++: el cociente se redondea hacia 0."""
+    quotient = abs(a) // abs(b)
+    return quotient if (a < 0) == (b < 0) else -quotient
+
+_RUN_OPERATORS = {
+    '+': lambda a, b: a + b, '-': lambda a, b: a - b, '*': lambda a, b: a * b, '<<': lambda a, b: a << b,
+    '/': lambda a, b: (_truncate(a, b) if isinstance(a, int) and isinstance(b, int) else a / b) if b else 0,
+    '%': lambda a, b: a - _truncate(a, b) * b if b else 0,
+    '<': lambda a, b: a < b, '>': lambda a, b: a > b, '<=': lambda a, b: a <= b,
+    '>=': lambda a, b: a >= b, '==': lambda a, b: a == b, '!=': lambda a, b: a != b,
+    '&&': lambda a, b: bool(a and b), '||': lambda a, b: bool(a or b),
+}
+
+def _execute(code, params=None):
+    """Ejecuta el TAC de un programa sin objetos desde main (antes, el código global).
+
+    Devuelve (instrucciones ejecutadas, valor de return, saltos ejecutados, multiplicaciones ejecutadas).
+    Las llamadas a métodos del programa se ejecutan (`params`: ICG.params, para pasar los
+    argumentos) y las demás devuelven 0. Como las supone el optimizador, las variables son
+    globales y cada llamada tiene sus propios temporales. Las etiquetas y los comentarios no cuentan.
+    """
+    from tac import JUMPS, Op, is_entry, is_temp
+    labels = {instr.label: i for i, instr in enumerate(code) if instr.op == Op.LABEL}
+    entries = {instr.a: i for i, instr in enumerate(code) if is_entry(instr)}
+    params = params or {}
+    env = {'true': True, 'false': False}
+    frame = {}          # Temporales de la llamada en curso
+    calls = []          # (instrucción a la que se vuelve, temporales) de las llamadas pendientes
+    args = []
+    def value(operand):
+        if is_temp(operand):
+            return frame[operand]
+        if operand in env:
+            return env[operand]
+        return float(operand) if '.' in operand else int(operand)
+    def store(name, result):
+        if is_temp(name):
+            frame[name] = result
+        else:
+            env[name] = result
+    pc = steps = jumps = multiplications = 0
+    started = False
+    while pc < len(code):
+        instr = code[pc]
+        op = instr.op
+        pc += 1
+        if op == Op.LABEL and instr.a is not None:
+            # Se llegó a otro método sin return: termina la llamada, el código global o el programa
+            if calls:
+                pc, frame = calls.pop()
+            elif not started:
+                started = True
+                pc = entries.get('main', pc - 1) + 1
+            else:
+                break
+            continue
+        if op == Op.LABEL or op == Op.COMMENT:
+            continue
+        steps += 1
+        if op in JUMPS:
+            jumps += 1
+        if op == Op.ASSIGN:
+            store(instr.dest, value(instr.a))
+        elif op == Op.BINARY:
+            if instr.oper == '*':
+                multiplications += 1
+            store(instr.dest, _RUN_OPERATORS[instr.oper](value(instr.a), value(instr.b)))
+        elif op == Op.UNARY:
+            store(instr.dest, -value(instr.a) if instr.oper == '-' else not value(instr.a))
+        elif op == Op.PARAM:
+            args.append(value(instr.a))
+        elif op == Op.CALL:
+            if instr.a in entries:
+                for name, arg in zip(params.get(instr.a, ()), args):
+                    env[name] = arg
+                calls.append((pc, frame))
+                frame = {}
+                pc = entries[instr.a] + 1
+            else:
+                env['return_value'] = 0
+            args = []
+        elif op == Op.GOTO:
+            pc = labels[instr.label]
+        elif op == Op.IF_FALSE:
+            if not value(instr.a): pc = labels[instr.label]
+        elif op == Op.IF_TRUE:
+            if value(instr.a): pc = labels[instr.label]
+        elif op == Op.IF_REL:
+            if _RUN_OPERATORS[instr.oper](value(instr.a), value(instr.b)): pc = labels[instr.label]
+        elif op == Op.JUMP_TABLE:
+            pc = labels[instr.label[value(instr.a)]]
+        elif op == Op.RETURN:
+            result = None if instr.a is None else value(instr.a)
+            if not calls:
+                return steps, result, jumps, multiplications
+            env['return_value'] = result
+            pc, frame = calls.pop()
+    return steps, None, jumps, multiplications
+
+def bench_short_circuit(iterations=(10, 1_000, 100_000)):
+    """Instrucciones TAC ejecutadas con condiciones en cortocircuito contra evaluarlas completas."""
+    import icg
+    import optimizer
+
+    print("=== Condiciones en cortocircuito (&&, ||, !) ===")
+    print(f"{'VUELTAS':>8} | {'TAC completo':>12} | {'cortocircuito':>13} | {'ejecutadas completo':>19} | {'cortocircuito':>13} | {'REDUCCIÓN':>9}")
+    for n in iterations:
+        tokens = lexer.tokenize(LOGIC_PROGRAM.replace('{n}', str(n)))
+        results = []
+        for short_circuit in (False, True):
+            generator = icg.ICG(tokens)
+            generator.short_circuit = short_circuit
+            code = optimizer.Optimizer(generator.generate()).optimize()
+            results.append((len(code),) + _execute(code)[:2])
+        (full_size, full_steps, full_result), (size, steps, result) = results
+        assert result == full_result, (result, full_result)
+        print(f"{n:>8,} | {full_size:>12} | {size:>13} | {full_steps:>19,} | {steps:>13,} | {1 - steps / full_steps:>8.1%}")
+
+CONSTANTS_PROGRAM = '''int main() {
+    int limite = 15;
+    int escala = 4;
+    bool depurar = false;
+    int base = (limite * 2) + escala;
+    int total = 0;
+    int i = 0;
+    while (i < {n}) {
+        total = total + base * escala;
+        if (depurar) { total = total - 1; }
+        if (limite * escala > 100 || depurar) { total = total + 7; }
+        i = i + 1;
+    }
+    return total;
+}
+'''
+
+def bench_constants(iterations=(10, 1_000, 100_000)):
+    """TAC optimizado e instrucciones ejecutadas sin y con propagación de constantes en variables."""
+    import icg
+    import optimizer
+
+    print("=== Propagación y plegado de constantes ===")
+    print("(sin tipos solo se propagan los temporales; con ICG.types también las variables int y bool)")
+    print(f"{'VUELTAS':>8} | {'TAC sin tipos':>13} | {'con tipos':>9} | {'ejecutadas sin tipos':>20} | {'con tipos':>11} | {'REDUCCIÓN':>9}")
+    for n in iterations:
+        generator = icg.ICG(lexer.tokenize(CONSTANTS_PROGRAM.replace('{n}', str(n))))
+        code = generator.generate()
+        results = []
+        for types in (None, generator.types):
+            optimized = optimizer.Optimizer(code, types).optimize()
+            results.append((len(optimized),) + _execute(optimized)[:2])
+        (plain_size, plain_steps, plain_result), (size, steps, result) = results
+        assert result == plain_result, (result, plain_result)
+        print(f"{n:>8,} | {plain_size:>13} | {size:>9} | {plain_steps:>20,} | {steps:>11,} | {1 - steps / plain_steps:>8.1%}")
+
+JUMPS_PROGRAM = '''int main() {
+    int total = 0;
+    int i = 0;
+    for (i = 0; i < {n}; i = i + 1) {
+        int j = 0;
+        while (j < 4) {
+            if (j == 1) { total = total + 1; } else { if (j > 2) { total = total + 3; } }
+            j = j + 1;
+        }
+        switch (i - (i / 5) * 5) {
+            case 0: total = total + 2; break;
+            case 1: total = total - 1; break;
+            case 2: total = total + 4; break;
+            case 3: total = total + 1; break;
+            default: total = total + 5;
+        }
+    }
+    return total;
+}
+'''
+
+# Instrucciones de salto del código máquina
+_MACHINE_JUMPS = frozenset(('JMP', 'JZ', 'JNZ', 'JMPT'))
+
+def bench_jumps(iterations=1_000):
+    """Saltos escritos y ejecutados sin y con simplify_jumps (saltos acortados y bloques ordenados)."""
+    import codegen
+    import icg
+    import optimizer
+    from tac import JUMPS
+
+    print("=== Saltos: bloques inalcanzables, saltos a saltos y orden de los bloques ===")
+    print(f"{'PROGRAMA':>10} | {'saltos TAC':>10} | {'con orden':>9} | {'saltos máquina':>14} | {'con orden':>9}"
+          f" | {'ejecutados':>10} | {'con orden':>9} | {'REDUCCIÓN':>9}")
+    programs = {'jumps': JUMPS_PROGRAM, 'logic': LOGIC_PROGRAM, 'constants': CONSTANTS_PROGRAM}
+    for name, source in programs.items():
+        generator = icg.ICG(lexer.tokenize(source.replace('{n}', str(iterations))))
+        code = generator.generate()
+        results = []
+        for arrange in (False, True):
+            opt = optimizer.Optimizer(code, generator.types)
+            opt.arrange_jumps = arrange
+            optimized = opt.optimize()
+            machine, _ = codegen.CodeGenerator(optimized).generate()
+            written = sum(instr.op in JUMPS for instr in optimized)
+            emitted = sum(line.split()[1] in _MACHINE_JUMPS for line in machine)
+            _, result, executed, _ = _execute(optimized)
+            results.append((written, emitted, executed, result))
+        (written, emitted, executed, result), (arranged, arranged_emitted, arranged_executed, arranged_result) = results
+        assert result == arranged_result, (result, arranged_result)
+        print(f"{name:>10} | {written:>10} | {arranged:>9} | {emitted:>14} | {arranged_emitted:>9}"
+              f" | {executed:>10,} | {arranged_executed:>9,} | {1 - arranged_executed / executed:>8.1%}")
+
+LOOPS_PROGRAM = '''int main() {
+    int base = 0;
+    int k = 0;
+    while (k < 3) { base = base + 2; k = k + 1; }
+    int ancho = base + 1;
+    int total = 0;
+    int i = 0;
+    for (i = 0; i < {n}; i = i + 1) {
+        int j = 0;
+        while (j < 8) {
+            total = total + ancho * base + i * ancho - j;
+            j = j + 1;
+        }
+        if (total > 100000) { total = total - base * 1000; }
+    }
+    return total;
+}
+'''
+
+def _control_sample():
+    """Pruebas/EstructurasDeControl.cpp hasta su primer error sintáctico (los demás están a propósito), dentro de un main."""
+    import os
+    import parser
+
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Pruebas', 'EstructurasDeControl.cpp'), encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    errors = parser.parse(lexer.tokenize('\n'.join(lines)))
+    valid = lines[:min(error.line for error in errors) - 1] if errors else lines
+    body = ''.join(f"    {line}\n" for line in valid)
+    return f"int main() {{\n    int x = {{n}};\n    int y = 0;\n    int i = 0;\n    int suma = 0;\n{body}    return suma + x + y;\n}}\n"
+
+def bench_loops(iterations=1_000):
+    """Instrucciones sacadas de los ciclos (hoist_loop_invariants) y las que se dejan de ejecutar."""
+    import icg
+    import optimizer
+
+    print("=== Cálculos invariantes fuera de los ciclos ===")
+    print(f"{'PROGRAMA':>20} | {'TAC':>5} | {'sacadas':>7} | {'ejecutadas sin sacar':>20} | {'sacando':>10} | {'REDUCCIÓN':>9}")
+    programs = {'loops': LOOPS_PROGRAM, 'jumps': JUMPS_PROGRAM, 'EstructurasDeControl': _control_sample()}
+    for name, source in programs.items():
+        generator = icg.ICG(lexer.tokenize(source.replace('{n}', str(iterations))))
+        code = generator.generate()
+        results = []
+        for hoist in (False, True):
+            opt = optimizer.Optimizer(code, generator.types)
+            opt.hoist_invariants = hoist
+            optimized = opt.optimize()
+            results.append((len(optimized), opt.hoisted) + _execute(optimized)[:2])
+        (_, _, plain_steps, plain_result), (size, hoisted, steps, result) = results
+        assert result == plain_result, (result, plain_result)
+        print(f"{name:>20} | {size:>5} | {hoisted:>7} | {plain_steps:>20,} | {steps:>10,} | {1 - steps / plain_steps:>8.1%}")
+
+ALGEBRA_PROGRAM = '''int main() {
+    int escala = 0;
+    int k = 0;
+    while (k < 4) { escala = escala + 2; k = k + 1; }
+    int fila = escala * 4;
+    int total = 0;
+    for (int i = 0; i < {n}; i = i + 1) {
+        int x = i * 8 + fila;
+        int y = (escala * 1 + 0) * 2;
+        total = total + x * 3 + y - (k - k);
+        if (total > 100000) { total = total % 1000; }
+    }
+    return total;
+}
+'''
+
+def bench_algebra(iterations=1_000):
+    """Reglas de simplify_algebra que se aplican y las multiplicaciones que se dejan de ejecutar."""
+    import icg
+    import optimizer
+
+    print("=== Simplificación algebraica y reducción de fuerza ===")
+    print(f"{'PROGRAMA':>20} | {'TAC':>5} | {'ejecutadas sin reglas':>21} | {'con reglas':>10} | {'REDUCCIÓN':>9} | {'*':>7} | {'* con reglas':>12}")
+    programs = {'algebra': ALGEBRA_PROGRAM, 'loops': LOOPS_PROGRAM, 'EstructurasDeControl': _control_sample()}
+    rules = {}
+    for name, source in programs.items():
+        generator = icg.ICG(lexer.tokenize(source.replace('{n}', str(iterations))))
+        code = generator.generate()
+        results = []
+        for reduce in (False, True):
+            opt = optimizer.Optimizer(code, generator.types)
+            opt.reduce_strength = reduce
+            optimized = opt.optimize()
+            steps, result, _, multiplications = _execute(optimized)
+            results.append((len(optimized), steps, result, multiplications))
+        (_, plain_steps, plain_result, plain_multiplications), (size, steps, result, multiplications) = results
+        assert result == plain_result, (result, plain_result)
+        for rule, count in opt.rules.items():
+            rules[rule] = rules.get(rule, 0) + count
+        print(f"{name:>20} | {size:>5} | {plain_steps:>21,} | {steps:>10,} | {1 - steps / plain_steps:>8.1%} | "
+              f"{plain_multiplications:>7,} | {multiplications:>12,}")
+    print("Reglas aplicadas: " + ", ".join(f"{rule} ({count})" for rule, count in sorted(rules.items())))
+
+def bench_levels(iterations=1_000):
+    """TAC, instrucciones ejecutadas y tiempo de optimize en cada nivel -O (LEVELS).
+
+    En las rondas, '+' indica que el nivel se quedó sin rondas antes del punto fijo.
+    """
+    import icg
+    import optimizer
+
+    print("=== Niveles de optimización ===")
+    print(f"{'PROGRAMA':>20} | {'NIVEL':>5} | {'TAC':>5} | {'ejecutadas':>10} | {'rondas':>6} | {'optimize':>9}")
+    programs = {'algebra': ALGEBRA_PROGRAM, 'loops': LOOPS_PROGRAM, 'jumps': JUMPS_PROGRAM,
+                'EstructurasDeControl': _control_sample()}
+    for name, source in programs.items():
+        generator = icg.ICG(lexer.tokenize(source.replace('{n}', str(iterations))))
+        code = generator.generate()
+        expected = None
+        for level in optimizer.LEVELS:
+            opt = optimizer.Optimizer(code, generator.types, level)
+            start = time.perf_counter()
+            optimized = opt.optimize()
+            seconds = time.perf_counter() - start
+            steps, result, _, _ = _execute(optimized)
+            if expected is None:
+                expected = result
+            assert result == expected, (level, result, expected)
+            rounds = f"{opt.rounds}{'' if opt.converged or not opt.rounds else '+'}"
+            print(f"{name:>20} | {'-O' + str(level):>5} | {len(optimized):>5} | {steps:>10,} | {rounds:>6} | {seconds * 1000:>7.2f}ms")
+
+def _dataflow_source(units):
+    """Un solo main con `units` repeticiones de if/while que encadenan variables nuevas (v1, v2, ...)."""
+    body = []
+    for i in range(units):
+        body.append(f"    int v{i} = v{max(i - 1, 0)} * 2 + x;\n"
+                    f"    if (v{i} > limite && b < 3) {{ valor = (limite * 2) + v{i}; }} else {{ valor = valor - 1; }}\n"
+                    f"    while (valor < 100) {{ valor = valor + v{i // 2}; }}\n")
+    return "int main() {\n" + ''.join(body) + "    return valor;\n}\n"
+
+def bench_dataflow(units=(100, 1_000, 10_000)):
+    """CFG y análisis de flujo de datos (cfg.py) sobre una sola función cada vez más grande."""
+    import icg
+    import optimizer
+    import cfg
+    import tac
+
+    print("=== CFG y flujo de datos en una función grande ===")
+    print(f"{'TAC':>8} | {'bloques':>7} | {'CFG':>7} | {'vida':>7} | {'definiciones':>12} | {'expresiones':>11} | {'optimize':>8}")
+    for n in units:
+        code = icg.ICG(lexer.tokenize(_dataflow_source(n))).generate()
+        with tac.building():
+            t0 = time.perf_counter()
+            graph = cfg.CFG(code)
+            t1 = time.perf_counter()
+            liveness = cfg.Liveness(graph)
+            t2 = time.perf_counter()
+            cfg.ReachingDefinitions(graph, liveness)
+            t3 = time.perf_counter()
+            cfg.AvailableExpressions(graph)
+            t4 = time.perf_counter()
+        optimizing = _timeit(lambda: optimizer.Optimizer(code).optimize())
+        print(f"{len(code):>8,} | {len(graph.blocks):>7,} | {t1 - t0:>6.3f}s | {t2 - t1:>6.3f}s | {t3 - t2:>11.3f}s | {t4 - t3:>10.3f}s | {optimizing:>7.3f}s")
+
+def _straight_source(statements, names=64):
+    """Un solo main con `statements` asignaciones seguidas (sin saltos) entre `names` variables int."""
+    body = [f"    int v{k} = {k};\n" for k in range(names)]
+    for i in range(statements):
+        a, b, c, e = i % names, (i * 7 + 3) % names, (i * 13 + 5) % names, (i * 17 + 1) % names
+        # (a + b) y (b + a) son la misma expresión; la asignación a d invalida las que la usan
+        body.append(f"    v{(i * 31 + 11) % names} = (v{a} + v{b}) * v{c} + (v{b} + v{a}) * v{e} - v{b} * v{c};\n")
+    return "int main() {\n" + ''.join(body) + "    return v0 + v1;\n}\n"
+
+def bench_cse(statements=(1_000, 10_000, 100_000)):
+    """eliminate_common_subexpressions (numeración de valores) sobre código sin saltos cada vez más largo."""
+    import icg
+    import optimizer
+    import tac
+
+    print("=== Subexpresiones comunes en un solo bloque ===")
+    print(f"{'TAC':>9} | {'tiempo':>8} | {'ns/instrucción':>14} | {'reutilizadas':>12}")
+    for n in statements:
+        generator = icg.ICG(lexer.tokenize(_straight_source(n)))
+        code = generator.generate()
+        opt = optimizer.Optimizer(code, generator.types)
+        with tac.building():
+            t0 = time.perf_counter()
+            optimized = opt.eliminate_common_subexpressions(code)
+            elapsed = time.perf_counter() - t0
+        reused = sum(1 for before, after in zip(code, optimized) if before is not after)
+        print(f"{len(code):>9,} | {elapsed:>6.3f} s | {elapsed * 1e9 / len(code):>14,.0f} | {reused:>12,}")
+
+def bench_symbols(depths=(1, 10, 100, 1_000), lookups=1_000_000):
+    """SymbolTable.lookup de un símbolo global desde distintas profundidades de anidamiento."""
+    import Semantic
+
+    print("=== Tabla de símbolos: búsqueda según la profundidad ===")
+    print(f"{'PROFUNDIDAD':>11} | {'ns/lookup':>9} | {'cerrar ámbitos (ms)':>19}")
+    for depth in depths:
+        table = Semantic.SymbolTable()
+        table.insert('g', 'int', line=1)
+        for d in range(depth - 1):
+            table.push_scope()
+            table.insert(f"v{d}", 'int', line=d + 2)
+            table.insert('sombra', 'int', line=d + 2)  # Oculta la del ámbito anterior
+        lookup = table.lookup
+        elapsed = _timeit(lambda: [lookup('g') for _ in range(lookups)], repeat=3)
+        t0 = time.perf_counter()
+        for _ in range(depth - 1):
+            table.pop_scope()
+        closing = time.perf_counter() - t0
+        assert table.lookup('sombra') is None and len(table.history) == 2 * depth - 1
+        print(f"{depth:>11} | {elapsed * 1e9 / lookups:>9.1f} | {closing * 1e3:>19.3f}")
+
+BENCHMARKS = {
+    'lexer_scaling': bench_lexer_scaling,
+    'relex': bench_relex,
+    'token_buffer': bench_token_buffer,
+    'lexer_engines': bench_lexer_engines,
+    'pipeline': bench_pipeline,
+    'expressions': bench_expressions,
+    'frontend': bench_frontend,
+    'symbols': bench_symbols,
+    'inference': bench_inference,
+    'semantic_cache': bench_semantic_cache,
+    'tac': bench_tac,
+    'temporaries': bench_temporaries,
+    'switch': bench_switch,
+    'short_circuit': bench_short_circuit,
+    'dataflow': bench_dataflow,
+    'constants': bench_constants,
+    'jumps': bench_jumps,
+    'cse': bench_cse,
+    'loops': bench_loops,
+    'algebra': bench_algebra,
+    'levels': bench_levels,
+}
+
+def main(argv):
+    names = argv or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Benchmark desconocido: {name}. Disponibles: {', '.join(BENCHMARKS)}")
+            return 1
+        BENCHMARKS[name]()
+        print()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,504 @@
+"""Grafo de flujo de control (CFG) y análisis de flujo de datos sobre el código de tres direcciones.
+
+El código se divide en funciones: lo que va antes del primer método y un
+tramo por cada método, desde su etiqueta de entrada (tac.is_entry). Cada
+función se divide en bloques básicos: un bloque empieza en una etiqueta o
+después de un salto y termina en un salto, en un return o antes de la
+siguiente etiqueta. No hay aristas entre funciones.
+
+Los análisis guardan sus conjuntos como enteros (el bit i es el elemento i
+de su universo) y llegan al punto fijo con una lista de trabajo (solve).
+Para que los enteros no crezcan con el tamaño de la función, la vida de
+variables solo numera las que se leen en un bloque distinto del que las
+asigna; las demás se resuelven dentro del bloque.
+
+Llamadas: una función llamada puede leer y modificar cualquier variable que
+no sea un temporal (atributos, variables globales), así que CALL cuenta como
+lectura de todas ellas e invalida las expresiones que dependen de ellas.
+Al salir de una función también se consideran leídas.
+"""
+
+from collections import deque
+
+from tac import ASSIGNS, JUMPS, READS, Op, is_entry, is_temp, jump_targets, operand_names
+
+# Instrucciones después de las cuales no se sigue con la siguiente
+ENDS = frozenset((Op.GOTO, Op.RETURN, Op.JUMP_TABLE))
+# Operaciones cuyas expresiones considera AvailableExpressions (y la eliminación de subexpresiones comunes)
+EXPRESSION_OPERATORS = frozenset(('+', '-', '*', '/', '<<'))
+
+def functions(code):
+    """Tramos de `code` que forman cada función: (inicio, fin) de la lista.
+
+    Cada método empieza en los comentarios que preceden a su etiqueta de entrada.
+    """
+    starts = [0]
+    for i, instr in enumerate(code):
+        if is_entry(instr):
+            while i > starts[-1] and code[i - 1].op == Op.COMMENT:
+                i -= 1
+            if i > starts[-1]:
+                starts.append(i)
+    return list(zip(starts, starts[1:] + [len(code)]))
+
+def uses(instr):
+    """Variables que lee una instrucción (sin contar lo que lee una llamada)."""
+    if instr.op not in READS:
+        return ()
+    b = instr.b
+    if b is None:
+        return operand_names(instr.a)
+    return operand_names(instr.a) + operand_names(b)
+
+def defines(instr):
+    """Variable que escribe una instrucción (CALL deja su resultado en return_value)."""
+    if instr.op in ASSIGNS:
+        return instr.dest
+    if instr.op == Op.CALL:
+        return 'return_value'
+    return None
+
+def bits(mask):
+    """Índices de los bits encendidos de `mask`, de menor a mayor."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+class Block:
+    """Instrucciones code[start:end] de una función, con las aristas del grafo."""
+    __slots__ = ('index', 'start', 'end', 'succs', 'preds')
+
+    def __init__(self, index, start):
+        self.index = index
+        self.start = start
+        self.end = start
+        self.succs = []
+        self.preds = []
+
+class CFG:
+    """Bloques básicos de una función; el bloque 0 es la entrada.
+
+    exits: bloques por los que se sale de la función (return, el final del
+    código o un salto a una etiqueta que no está en la función).
+    """
+    def __init__(self, code):
+        self.code = code
+        self.blocks = []
+        self.labels = {}        # Etiqueta -> índice del bloque que empieza en ella
+        self.exits = []
+        self._order = None
+
+        # 1. Bloques: empiezan en una etiqueta (varias seguidas comparten bloque) o después de un salto
+        ops = [instr.op for instr in code]
+        label_positions = [i for i, op in enumerate(ops) if op == Op.LABEL]
+        leaders = {i for i in label_positions if i == 0 or ops[i - 1] != Op.LABEL}
+        leaders.update([i + 1 for i, op in enumerate(ops) if op in ENDS or op in JUMPS])
+        leaders.discard(len(code))
+        if code:
+            leaders.add(0)
+        starts = sorted(leaders)
+        block_at = {}
+        for start, end in zip(starts, starts[1:] + [len(code)]):
+            block = Block(len(self.blocks), start)
+            block.end = end
+            block_at[start] = block.index
+            self.blocks.append(block)
+        current = None
+        for i in label_positions:
+            current = block_at.get(i, current)
+            self.labels[code[i].label] = current
+
+        # 2. Aristas
+        blocks = self.blocks
+        labels = self.labels
+        for block in blocks:
+            last = code[block.end - 1]
+            succs = []
+            leaves = last.op == Op.RETURN
+            for label in jump_targets(last):
+                target = labels.get(label)
+                if target is None:
+                    leaves = True
+                elif target not in succs:
+                    succs.append(target)
+            if last.op not in ENDS:
+                if block.index + 1 < len(blocks):
+                    if block.index + 1 not in succs:
+                        succs.append(block.index + 1)
+                else:
+                    leaves = True
+            block.succs = succs
+            for s in succs:
+                blocks[s].preds.append(block.index)
+            if leaves:
+                self.exits.append(block.index)
+
+    def order(self):
+        """Bloques en postorden inverso desde la entrada; al final, los inalcanzables."""
+        if self._order is None:
+            blocks = self.blocks
+            seen = bytearray(len(blocks))
+            postorder = []
+            if blocks:
+                seen[0] = 1
+                stack = [(0, iter(blocks[0].succs))]
+                while stack:
+                    b, succs = stack[-1]
+                    for s in succs:
+                        if not seen[s]:
+                            seen[s] = 1
+                            stack.append((s, iter(blocks[s].succs)))
+                            break
+                    else:
+                        stack.pop()
+                        postorder.append(b)
+            postorder.reverse()
+            self.reachable = seen
+            self._order = postorder + [b for b in range(len(blocks)) if not seen[b]]
+        return self._order
+
+def solve(cfg, gen, kill, forward=True, intersect=False, boundary=0, full=0):
+    """Punto fijo de un análisis de flujo de datos con conjuntos de bits.
+
+    gen y kill tienen un entero por bloque: lo que sale de un bloque (en la
+    dirección del análisis) es gen | (lo que entra & ~kill). Lo que entra es
+    la unión de lo que sale de sus vecinos o, con intersect, la intersección;
+    en la entrada de la función (hacia adelante) o en sus salidas (hacia
+    atrás) se combina además con `boundary`. Con intersect los conjuntos
+    empiezan en `full`, el universo completo.
+
+    Devuelve (antes, después): los conjuntos al inicio y al final de cada bloque.
+    """
+    blocks = cfg.blocks
+    n = len(blocks)
+    order = cfg.order()
+    if forward:
+        sources = [block.preds for block in blocks]
+        targets = [block.succs for block in blocks]
+        is_boundary = bytearray(n)
+        if n:
+            is_boundary[0] = 1
+    else:
+        order = order[::-1]
+        sources = [block.succs for block in blocks]
+        targets = [block.preds for block in blocks]
+        is_boundary = bytearray(n)
+        for b in cfg.exits:
+            is_boundary[b] = 1
+    initial = full if intersect else 0
+    into = [initial] * n
+    out = [initial] * n
+    queue = deque(order)
+    queued = bytearray(b'\1') * n
+    while queue:
+        b = queue.popleft()
+        queued[b] = 0
+        if intersect:
+            value = boundary if is_boundary[b] else full
+            for s in sources[b]:
+                value &= out[s]
+        else:
+            value = boundary if is_boundary[b] else 0
+            for s in sources[b]:
+                value |= out[s]
+        into[b] = value
+        new = gen[b] | (value & ~kill[b])
+        if new != out[b]:
+            out[b] = new
+            for t in targets[b]:
+                if not queued[t]:
+                    queued[t] = 1
+                    queue.append(t)
+    return (into, out) if forward else (out, into)
+
+class Liveness:
+    """Variables vivas (que se leen antes de volver a asignarse) al inicio y al final de cada bloque.
+
+    Solo se numeran las variables globales de la función: las que algún bloque
+    lee antes de asignarlas, más `observed`, las que se leen en otras
+    funciones (no pueden ser temporales). Una variable que no está en `index` no está viva al terminar
+    ningún bloque.
+    """
+    def __init__(self, cfg, observed=(), reads=None):
+        code = cfg.code
+        names = sorted(observed)
+        index = dict(zip(names, range(len(names))))
+        outside = len(names)
+        if reads is None:
+            reads = [uses(instr) for instr in code]
+        self.reads = reads      # Lo que lee cada instrucción (uses)
+        # 1. Resumen de cada bloque: variables leídas antes de asignarse en él,
+        # asignadas y asignadas antes de la primera llamada
+        summaries = []
+        for block in cfg.blocks:
+            assigned = set()
+            exposed = []
+            before_call = None
+            for i in range(block.start, block.end):
+                for name in reads[i]:
+                    if name not in assigned:
+                        exposed.append(name)
+                instr = code[i]
+                op = instr.op
+                if op in ASSIGNS:
+                    assigned.add(instr.dest)
+                elif op == Op.CALL:
+                    if before_call is None:
+                        before_call = set(assigned)
+                    assigned.add('return_value')
+            summaries.append((exposed, assigned, before_call))
+            # Variables globales: leídas en un bloque sin asignarse antes en él
+            for name in exposed:
+                if name not in index:
+                    index[name] = len(names)
+                    names.append(name)
+        self.names = names
+        self.index = index
+        # Variables que lee una llamada o la salida de la función
+        user_mask = (1 << outside) - 1
+        for k in range(outside, len(names)):
+            if not is_temp(names[k]):
+                user_mask |= 1 << k
+        self.user_mask = user_mask
+
+        # 2. gen (leídas antes de asignarse) y kill (asignadas) de cada bloque
+        gen, kill = [], []
+        for exposed, assigned, before_call in summaries:
+            live = killed = 0
+            for name in exposed:
+                live |= 1 << index[name]
+            if before_call is not None:
+                call_reads = user_mask
+                for name in before_call:
+                    if name in index:
+                        call_reads &= ~(1 << index[name])
+                live |= call_reads
+            for name in assigned:
+                if name in index:
+                    killed |= 1 << index[name]
+            gen.append(live)
+            kill.append(killed)
+        self.live_in, self.live_out = solve(cfg, gen, kill, forward=False, boundary=user_mask)
+
+    def names_of(self, mask):
+        """Conjunto de nombres de un conjunto de bits."""
+        if not mask:
+            return set()
+        names = self.names
+        return {names[k] for k in bits(mask)}
+
+class ReachingDefinitions:
+    """Asignaciones que pueden llegar al inicio y al final de cada bloque sin que otra las reemplace.
+
+    El universo son las instrucciones que asignan una variable de `names`
+    (por omisión, las globales de la función: ver Liveness), más una
+    definición de "valor desconocido" por variable: la de names[k] es la
+    definición k, con `definitions[k]` en None. Esa definición llega desde
+    la entrada de la función y sale de cada llamada para las variables que
+    no son temporales, que la función llamada puede modificar (sin
+    reemplazar las demás asignaciones). Para las demás, `definitions[k]` es
+    la posición en el código de la asignación.
+    """
+    def __init__(self, cfg, liveness=None, names=None):
+        code = cfg.code
+        if names is None:
+            names = (liveness or Liveness(cfg)).names
+        index = {name: k for k, name in enumerate(names)}
+        unknown = len(names)
+        user_mask = 0           # Valores desconocidos que deja una llamada
+        for name, k in index.items():
+            if not is_temp(name):
+                user_mask |= 1 << k
+        definitions = [None] * unknown
+        by_name = {name: 1 << k for name, k in index.items()}  # Variable -> bits de sus definiciones
+        for block in cfg.blocks:
+            for i in range(block.start, block.end):
+                instr = code[i]
+                dest = defines(instr)
+                if dest is not None and dest in index and instr.op != Op.CALL:
+                    by_name[dest] |= 1 << len(definitions)
+                    definitions.append(i)
+        self.definitions = definitions
+        self.by_name = by_name
+
+        gen, kill = [], []
+        k = unknown
+        result = index.get('return_value')
+        for block in cfg.blocks:
+            reaching = killed = 0
+            for i in range(block.start, block.end):
+                instr = code[i]
+                if instr.op == Op.CALL:
+                    reaching |= user_mask
+                    if result is not None:
+                        # return_value solo tiene el valor desconocido que deja la llamada
+                        all_defs = by_name['return_value']
+                        reaching = (reaching & ~all_defs) | (1 << result)
+                        killed |= all_defs
+                    continue
+                dest = defines(instr)
+                if dest is not None and dest in index:
+                    all_defs = by_name[dest]
+                    reaching = (reaching & ~all_defs) | (1 << k)
+                    killed |= all_defs
+                    k += 1
+            gen.append(reaching)
+            kill.append(killed)
+        self.reach_in, self.reach_out = solve(cfg, gen, kill, boundary=(1 << unknown) - 1)
+
+def shared_expressions(code):
+    """Expresiones (a, oper, b) que se calculan en más de un bloque básico de `code`."""
+    seen = {}
+    shared = set()
+    block = 0
+    for instr in code:
+        op = instr.op
+        if op == Op.BINARY:
+            if instr.oper in EXPRESSION_OPERATORS:
+                expr = (instr.a, instr.oper, instr.b)
+                if seen.setdefault(expr, block) != block:
+                    shared.add(expr)
+        elif op == Op.LABEL or op in JUMPS or op == Op.RETURN:
+            # Empieza otro bloque (varias etiquetas seguidas solo dejan números sin usar)
+            block += 1
+    return shared
+
+class AvailableExpressions:
+    """Expresiones (a oper b) ya calculadas en una variable que no cambió, en todos los caminos.
+
+    Cada hecho es (a, oper, b, variable); lo genera 'variable = a oper b' y
+    lo mata la asignación de a, de b o de la variable, o una llamada si
+    alguno de ellos no es un temporal. Solo se numeran los hechos que
+    sobreviven hasta el final de su bloque y cuya expresión se calcula en más
+    de un bloque: los demás no pueden servir en otro bloque.
+    """
+    def __init__(self, cfg, shared=None):
+        code = cfg.code
+        # 1. Expresiones que se calculan en más de un bloque
+        if shared is None:
+            shared = shared_expressions(code)
+        if not shared:
+            self.facts = []
+            self.avail_in = self.avail_out = [0] * len(cfg.blocks)
+            return
+
+        # 2. Hechos que sobreviven a su bloque
+        facts = []
+        index = {}
+        survivors = []
+        for block in cfg.blocks:
+            current = {}
+            for i in range(block.start, block.end):
+                instr = code[i]
+                invalidate(current, defines(instr), instr.op == Op.CALL)
+                if instr.op == Op.BINARY and instr.oper in EXPRESSION_OPERATORS:
+                    expr = (instr.a, instr.oper, instr.b)
+                    if expr in shared and instr.dest not in operand_names(instr.a) + operand_names(instr.b):
+                        current[expr + (instr.dest,)] = True
+            for fact in current:
+                if fact not in index:
+                    index[fact] = len(facts)
+                    facts.append(fact)
+            survivors.append(current)
+        self.facts = facts
+
+        # 3. gen y kill de cada bloque
+        depending = {}          # Nombre -> bits de los hechos que dependen de él
+        user_facts = 0          # Hechos que una llamada invalida
+        for k, fact in enumerate(facts):
+            bit = 1 << k
+            names = set(operand_names(fact[0]) + operand_names(fact[2]) + (fact[3],))
+            for name in names:
+                depending[name] = depending.get(name, 0) | bit
+            if any(not is_temp(name) for name in names):
+                user_facts |= bit
+        full = (1 << len(facts)) - 1
+        gen, kill = [], []
+        for block, current in zip(cfg.blocks, survivors):
+            killed = 0
+            for i in range(block.start, block.end):
+                instr = code[i]
+                dest = defines(instr)
+                if dest is not None:
+                    killed |= depending.get(dest, 0)
+                if instr.op == Op.CALL:
+                    killed |= user_facts
+            generated = 0
+            for fact in current:
+                generated |= 1 << index[fact]
+            gen.append(generated)
+            kill.append(killed)
+        self.avail_in, self.avail_out = solve(cfg, gen, kill, intersect=True, full=full)
+
+    def at_start(self, block):
+        """Diccionario (a, oper, b) -> variable con el valor, al inicio del bloque."""
+        facts = self.facts
+        return {facts[k][:3]: facts[k][3] for k in bits(self.avail_in[block.index])}
+
+def invalidate(available, name, call=False):
+    """Quita de `available` ((a, oper, b) o (a, oper, b, variable)) lo que deja de valer al asignar `name`.
+
+    Con call, también todo lo que depende de una variable que no es un temporal.
+    """
+    if not available or (name is None and not call):
+        return
+    stale = []
+    for key, value in available.items():
+        holder = key[3] if len(key) == 4 else value
+        names = operand_names(key[0]) + operand_names(key[2]) + (holder,)
+        if name in names or (call and any(not is_temp(n) for n in names)):
+            stale.append(key)
+    for key in stale:
+        del available[key]
+
+def dominators(cfg):
+    """Bloques que dominan a cada bloque (bits): todo camino desde la entrada hasta él pasa por ellos.
+
+    Un bloque inalcanzable queda dominado por todos.
+    """
+    n = len(cfg.blocks)
+    _, out = solve(cfg, [1 << b for b in range(n)], [0] * n, intersect=True, full=(1 << n) - 1)
+    return out
+
+class Loop:
+    """Ciclo natural: la cabecera y los bloques desde los que se vuelve a ella sin pasar por ella."""
+    __slots__ = ('header', 'blocks', 'latches')
+
+    def __init__(self, header, blocks, latches):
+        self.header = header
+        self.blocks = blocks    # Índices de los bloques, con la cabecera
+        self.latches = latches  # Bloques que saltan de vuelta a la cabecera
+
+def natural_loops(cfg, dominated=None):
+    """Ciclos naturales de la función, de afuera hacia adentro.
+
+    Hay un ciclo por cada arista b -> h en la que h domina a b (`dominated`:
+    el resultado de dominators); los que comparten cabecera son uno solo.
+    Dos ciclos con distinta cabecera son disjuntos o uno está dentro del otro.
+    """
+    if dominated is None:
+        dominated = dominators(cfg)
+    blocks = cfg.blocks
+    cfg.order()
+    reachable = cfg.reachable
+    latches = {}
+    for block in blocks:
+        if reachable[block.index]:
+            for s in block.succs:
+                if dominated[block.index] >> s & 1:
+                    latches.setdefault(s, []).append(block.index)
+    loops = []
+    for header, ends in latches.items():
+        body = {header}
+        pending = [b for b in ends if b != header]
+        body.update(pending)
+        while pending:
+            for p in blocks[pending.pop()].preds:
+                if p not in body and reachable[p]:
+                    body.add(p)
+                    pending.append(p)
+        loops.append(Loop(header, body, ends))
+    # El ciclo de afuera siempre tiene más bloques que los que contiene
+    loops.sort(key=lambda loop: -len(loop.blocks))
+    return loops
@@ -1,8 +1,25 @@
-import re
+from tac import Op, is_temp
+
+# Operador TAC -> instrucción de máquina
+OP_MAP = {'+': 'ADD', '-': 'SUB', '*': 'MUL', '/': 'DIV', '<<': 'SHL', '<': 'CMPL', '>': 'CMPG', '==': 'CMPE',
+          '<=': 'CMPLE', '>=': 'CMPGE', '!=': 'CMPNE', '&&': 'AND', '||': 'OR'}
+
+# Operador unario TAC -> instrucción de máquina
+UNARY_MAP = {'-': 'NEG', '!': 'NOT'}
+
+# Salto condicional TAC -> instrucción de máquina (la condición queda en R1)
+BRANCH_MAP = {Op.IF_FALSE: 'JZ', Op.IF_TRUE: 'JNZ', Op.IF_REL: 'JNZ'}
+
+def _format(addr, instruction, op1="", op2=""):
+    if op2:
+        return f"{addr}: {instruction:<5} {op1}, {op2}"
+    elif op1:
+        return f"{addr}: {instruction:<5} {op1}"
+    return f"{addr}: {instruction:<5}"
 
 class CodeGenerator:
     def __init__(self, optimized_code):
-        self.tac = [line.strip() for line in optimized_code if line.strip()]
+        self.tac = optimized_code
         self.machine_code = []
         self.symbol_table = {}
         
@@ -12,11 +29,16 @@ class CodeGenerator:
         
         self.current_r1 = None
         self.pending_store = None
+        self.reads = {}     # Temporal -> cuántas veces se lee en el código
+        self.fixups = []    # (índice en machine_code, instrucción, operando, etiqueta) por resolver
 
     def get_addr(self, var):
         # Si es un número o texto directo, se pasa como literal
-        if var.isdigit() or var.startswith('"'):
+        if var.isdigit() or var.startswith('"') or (var.startswith('-') and var[1:].isdigit()):
             return var 
+        # Los booleanos (también los que deja el plegado de constantes) son 1 y 0
+        if var == 'true' or var == 'false':
+            return '1' if var == 'true' else '0'
         # Si es una variable, le asignamos dirección en memoria
         if var not in self.symbol_table:
             self.symbol_table[var] = f"0x{self.var_addr_counter:04X}"
@@ -24,16 +46,14 @@ class CodeGenerator:
         return self.symbol_table[var]
 
     def emit(self, instruction, op1="", op2=""):
-        addr = f"0x{self.inst_addr_counter:04X}"
-        if op2:
-            line = f"{addr}: {instruction:<5} {op1}, {op2}"
-        elif op1:
-            line = f"{addr}: {instruction:<5} {op1}"
-        else:
-            line = f"{addr}: {instruction:<5}"
-        self.machine_code.append(line)
+        self.machine_code.append(_format(f"0x{self.inst_addr_counter:04X}", instruction, op1, op2))
         self.inst_addr_counter += 4
 
+    def emit_jump(self, instruction, label, op1=""):
+        """Instrucción con la dirección de una etiqueta, que se completa al terminar."""
+        self.fixups.append((len(self.machine_code), instruction, op1, label))
+        self.emit(instruction, *([op1, label] if op1 else [label]))
+
     def flush_store(self):
         """Fuerza el guardado de una variable temporal si el flujo cambia."""
         if self.pending_store:
@@ -42,61 +62,120 @@ class CodeGenerator:
             self.pending_store = None
 
     def generate(self):
-        # Primera pasada: Mapear Etiquetas (L1, L2) a direcciones de instrucción
-        for line in self.tac:
-            if line.endswith(':'):
-                label = line[:-1]
-                self.symbol_table[label] = f"0x{self.inst_addr_counter:04X}"
+        # Primera pasada: las etiquetas (L1, L2) encabezan la tabla; su dirección se anota al emitirlas.
+        # También se cuentan las lecturas de cada temporal (keep_result solo retrasa el STORE de los que se leen una vez)
+        reads = self.reads
+        for instr in self.tac:
+            if instr.op == Op.LABEL:
+                self.symbol_table[instr.label] = None
+            for operand in (instr.a, instr.b):
+                if operand and is_temp(operand):
+                    reads[operand] = reads.get(operand, 0) + 1
 
         # Segunda pasada: Traducción y Optimización
-        for line in self.tac:
-            if line.endswith(':'):
+        for instr in self.tac:
+            op = instr.op
+            if op == Op.LABEL:
                 self.flush_store()
+                # Se puede llegar desde un salto: R1 ya no es conocido
+                self.current_r1 = None
+                self.symbol_table[instr.label] = f"0x{self.inst_addr_counter:04X}"
                 continue
 
-            # Operación Binaria: t1 = a + b
-            match_bin = re.match(r'(\w+)\s*=\s*(\w+)\s*([\+\-\*\/<>=!]+)\s*(\w+)', line)
-            if match_bin:
-                target = match_bin.group(1)
-                op1 = match_bin.group(2)
-                operator = match_bin.group(3)
-                op2 = match_bin.group(4)
-
-                # Optimización: Si op1 NO está en R1, lo cargamos. Si ya está, nos ahorramos la instrucción LOAD
-                if self.current_r1 != op1:
-                    self.flush_store()
-                    self.emit("LOAD", "R1", self.get_addr(op1))
-
-                op_map = {'+': 'ADD', '-': 'SUB', '*': 'MUL', '/': 'DIV', '<': 'CMPL', '>': 'CMPG', '==': 'CMPE', '&&': 'AND', '||': 'OR'}
-                asm_op = op_map.get(operator, 'OP')
-                self.emit(asm_op, "R1", self.get_addr(op2))
-
-                self.current_r1 = target
-                # Optimización: Retrasamos el STORE si es un temporal (t1, t2)
-                if target.startswith('t'):
-                    self.pending_store = (target, self.get_addr(target))
-                else:
-                    self.emit("STORE", self.get_addr(target), "R1")
-                    self.current_r1 = None
-                continue
-
-            # Asignación simple: x = 10 o x = y
-            match_assign = re.match(r'(\w+)\s*=\s*(.+)', line)
-            if match_assign:
-                target = match_assign.group(1)
-                val = match_assign.group(2)
-                
-                # Optimización de reasignación directa
-                if self.current_r1 != val:
-                    self.flush_store()
-                    self.emit("LOAD", "R1", self.get_addr(val))
-                self.emit("STORE", self.get_addr(target), "R1")
-                self.current_r1 = target
-                continue
+            if op in BRANCH_MAP:
+                self.gen_branch(instr)
+            elif op == Op.GOTO:
+                self.flush_store()
+                self.emit_jump("JMP", instr.label)
+                self.current_r1 = None
+            elif op == Op.JUMP_TABLE:
+                self.gen_jump_table(instr.a, instr.label)
+            elif op == Op.BINARY:
+                self.gen_binary(instr.dest, instr.a, instr.oper, instr.b)
+            elif op == Op.UNARY:
+                self.gen_unary(instr.dest, instr.oper, instr.a)
+            elif op == Op.ASSIGN:
+                self.gen_assign(instr.dest, instr.a)
+            elif op == Op.NEW:
+                self.gen_assign(instr.dest, f"create {instr.a}")
 
         self.flush_store()
+        # Direcciones de las etiquetas en los saltos (las que no existen quedan con su nombre)
+        for index, instruction, op1, label in self.fixups:
+            addr = self.machine_code[index].split(':')[0]
+            target = self.symbol_table.get(label) or label
+            self.machine_code[index] = _format(addr, instruction, *([op1, target] if op1 else [target]))
         return self.machine_code, self.symbol_table
 
+    def load(self, var):
+        """Deja var en R1, guardando antes el temporal pendiente."""
+        self.flush_store()
+        if self.current_r1 != var:
+            self.emit("LOAD", "R1", self.get_addr(var))
+            self.current_r1 = var
+
+    def gen_branch(self, instr):
+        """Salto condicional: if not a / if a / if a oper b goto L"""
+        self.load(instr.a)
+        if instr.op == Op.IF_REL:
+            self.emit(OP_MAP.get(instr.oper, 'OP'), "R1", self.get_addr(instr.b))
+            self.current_r1 = None
+        self.emit_jump(BRANCH_MAP[instr.op], instr.label, "R1")
+
+    def gen_jump_table(self, index, labels):
+        """Salto indexado: JMPT lee la dirección de destino de la tabla que le sigue."""
+        self.load(index)
+        self.emit("JMPT", "R1", f"0x{self.inst_addr_counter + 4:04X}")
+        for label in labels:
+            self.emit_jump(".WORD", label)
+        self.current_r1 = None
+
+    def gen_binary(self, target, op1, operator, op2):
+        """Operación Binaria: t1 = a + b"""
+        # Optimización: Si op1 NO está en R1, lo cargamos. Si ya está, nos ahorramos la instrucción LOAD
+        if self.current_r1 != op1:
+            self.flush_store()
+            self.emit("LOAD", "R1", self.get_addr(op1))
+
+        asm_op = OP_MAP.get(operator, 'OP')
+        self.emit(asm_op, "R1", self.get_addr(op2))
+        self.keep_result(target)
+
+    def gen_unary(self, target, operator, op1):
+        """Operación Unaria: t1 = -a"""
+        if self.current_r1 != op1:
+            self.flush_store()
+            self.emit("LOAD", "R1", self.get_addr(op1))
+
+        self.emit(UNARY_MAP.get(operator, 'OP'), "R1")
+        self.keep_result(target)
+
+    def keep_result(self, target):
+        """Deja en R1 el resultado de una operación y lo guarda en target."""
+        # R1 ya cambió: el temporal pendiente, si había, se leyó de R1 en esta operación
+        # (o en la asignación anterior); si no, se habría guardado al cargar el operando
+        self.pending_store = None
+        self.current_r1 = target
+        # Optimización: Retrasamos el STORE si es un temporal del generador (no una variable como t1)
+        # que se lee una sola vez: si esa lectura lo toma de R1, el STORE no hace falta. Con más
+        # lecturas (una subexpresión común, o un nombre que recycle_temporaries reutiliza) se guarda
+        # ya, porque otra instrucción puede cambiar R1 antes de la siguiente lectura.
+        if is_temp(target) and self.reads.get(target, 0) <= 1:
+            self.pending_store = (target, self.get_addr(target))
+            return
+        self.emit("STORE", self.get_addr(target), "R1")
+        if not is_temp(target):
+            self.current_r1 = None
+
+    def gen_assign(self, target, val):
+        """Asignación simple: x = 10 o x = y"""
+        # Optimización de reasignación directa
+        if self.current_r1 != val:
+            self.flush_store()
+            self.emit("LOAD", "R1", self.get_addr(val))
+        self.emit("STORE", self.get_addr(target), "R1")
+        self.current_r1 = target
+
     def generate_executable_header(self):
         """Simula la creación del Archivo Ejecutable y entorno .exe/.bin"""
         exe = "=== ARCHIVO EJECUTABLE GENERADO (programa.bin) ===\n"
@@ -0,0 +1,135 @@
+"""Diagnósticos compartidos por el lexer, el parser y el analizador semántico.
+
+Cada error se guarda como un registro (etapa, código, línea, columna,
+argumentos) y el texto se arma con MESSAGES solo cuando se muestra. Los
+registros repetidos se descartan con un conjunto de hashes y, si se fija
+max_errors, al llegar al límite se lanza ErrorLimitReached para que la
+etapa termine antes.
+
+La columna es None cuando el mensaje solo indica la línea: así dos errores
+con el mismo texto cuentan como el mismo diagnóstico.
+"""
+
+LEXICAL = 'léxico'
+SYNTAX = 'sintáctico'
+SEMANTIC = 'semántico'
+
+# Código -> plantilla; {line} y {column} son la posición y {0}, {1}... los argumentos
+MESSAGES = {
+    # --- LÉXICO ---
+    'lexical': "Línea {line}:{column} -> {0} ('{1}')",
+
+    # --- SINTÁCTICO ---
+    'return_semicolon': "Error Sintáctico: Se esperaba ';' después de 'return' en la línea {line}.",
+    'expected_semicolon': "Error Sintáctico: Se esperaba ';' en la línea {line}.",
+    'expected_colon': "Error Sintáctico: Se esperaba ':' en la línea {line}.",
+    'class_name': "Error Sintáctico: Se esperaba el nombre de la clase en la línea {line}.",
+    'class_body': "Error: Cuerpo de clase inválido en la declaración de 'class' en la línea {line}, columna {column}.",
+    'return_type': "Error: Tipo de retorno inválido en la declaración de método en la línea {line}, columna {column}.",
+    'expected_identifier': "Error Sintáctico: Se esperaba un identificador en la línea {line}, columna {column}.",
+    'method_parenthesis': "Error Sintáctico: Paréntesis desbalanceados en la línea {line}.",
+    'method_body': "Error Sintáctico: Se esperaba '{{' para el cuerpo del método en la línea {line}.",
+    'method_missing_parenthesis': "Error Sintáctico: Faltan paréntesis '()' en el método en la línea {line}, columna {column}.",
+    'invalid_parameter': "Error: Parámetro inválido en la declaración de método en la línea {line}, columna {column}.",
+    'invalid_condition': "Error: Condición inválida en la estructura '{0}' en la línea {line}, columna {column}.",
+    'unbalanced_structure': "Error: Paréntesis desbalanceados en la estructura '{0}' en la línea {line}, columna {column}.",
+    'missing_parenthesis': "Error: Paréntesis faltantes en la estructura '{0}' en la línea {line}, columna {column}.",
+    'missing_block': "Error: Bloque de sentencias faltante en la estructura '{0}' en la línea {line}, columna {column}.",
+    'invalid_component': "Error: Componente inválido en la estructura '{0}' en la línea {line}, columna {column}.",
+    'do_without_while': "Error: Se esperaba 'while' al final de la estructura 'do' en la línea {line}, columna {column}.",
+    'case_value': "Error: Valor inválido en 'case' en la línea {line}, columna {column}.",
+    'unbalanced_parenthesis': "Error: Paréntesis desbalanceados en la línea {line}.",
+    'logical_operand': "Error: Operador lógico sin término en la línea {line}, columna {column}.",
+    'comparison_operand': "Error: Comparación inválida en la línea {line}, columna {column}.",
+    'operand': "Error: Operador sin término en la línea {line}, columna {column}.",
+    'call_parenthesis': "Error Sintáctico: Falta ')' en la llamada al método en la línea {line}.",
+
+    # --- SEMÁNTICO ---
+    'undeclared': "Error Semántico: Identificador '{0}' no declarado. (Línea {line})",
+    'undeclared_method': "Error Semántico: Método '{0}' no declarado. (Línea {line})",
+    'not_a_method': "Error Semántico: '{0}' no es un método. (Línea {line})",
+    'method_redeclared': "Error Semántico: El método '{0}' ya fue declarado. (Línea {line})",
+    'redeclared': "Error Semántico: El identificador '{0}' ya fue declarado. (Línea {line})",
+    'argument_count': "Error Semántico: Llamada al método '{0}' requiere {1} argumentos, se dieron {2}. (Línea {line})",
+    'argument_type': "Error Semántico: Argumento {0} de '{1}' debe ser '{2}', no '{3}'. (Línea {line})",
+    'assignment_type': "Error Semántico: Tipo incompatible. Intentó asignar '{0}' a '{1}' ({2}). (Línea {line})",
+    'condition_type': "Error Semántico: La condición en '{0}' debe ser una expresión booleana, se detectó '{1}'. (Línea {line})",
+    'empty_return': "Error Semántico: Método requiere retornar tipo '{0}', pero el return está vacío. (Línea {line})",
+    'return_type_mismatch': "Error Semántico: Retorno incompatible. Se esperaba '{0}' pero se intenta retornar '{1}'. (Línea {line})",
+    'division_by_zero': "Error Semántico: División por cero. (Línea {line})",
+    'math_with_text': "Error Semántico: Operadores matemáticos no válidos con texto. (Línea {line})",
+    'math_with_bool': "Error Semántico: Operaciones matemáticas inválidas con booleanos. (Línea {line})",
+    'logical_requires_bool': "Error Semántico: Los operadores lógicos requieren booleanos. (Línea {line})",
+    'text_number_comparison': "Error Semántico: No se puede comparar texto con números. (Línea {line})",
+}
+
+class ErrorLimitReached(Exception):
+    """Se alcanzó max_errors: la etapa que reporta debe detenerse."""
+
+class Diagnostic:
+    __slots__ = ('stage', 'code', 'line', 'column', 'args')
+
+    def __init__(self, stage, code, line, column=None, args=()):
+        self.stage = stage
+        self.code = code
+        self.line = line
+        self.column = column
+        self.args = args
+
+    def key(self):
+        return (self.stage, self.code, self.line, self.column, self.args)
+
+    def __eq__(self, other):
+        return isinstance(other, Diagnostic) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __str__(self):
+        return MESSAGES[self.code].format(*self.args, line=self.line, column=self.column)
+
+    def __repr__(self):
+        return f"Diagnostic{self.key()!r}"
+
+class Diagnostics:
+    """Colección ordenada de diagnósticos sin repetidos."""
+    def __init__(self, max_errors=None):
+        self.max_errors = max_errors
+        self.records = []
+        self._seen = set()
+
+    def add(self, stage, code, line, column=None, *args):
+        """Registra un diagnóstico; regresa False si ya estaba registrado."""
+        if self.full:
+            raise ErrorLimitReached()
+        record = Diagnostic(stage, code, line, column, args)
+        if record in self._seen:
+            return False
+        self._seen.add(record)
+        self.records.append(record)
+        if self.max_errors is not None and len(self.records) >= self.max_errors:
+            raise ErrorLimitReached()
+        return True
+
+    def extend(self, records):
+        for record in records:
+            self.add(record.stage, record.code, record.line, record.column, *record.args)
+
+    def of_stage(self, stage):
+        return [record for record in self.records if record.stage == stage]
+
+    @property
+    def full(self):
+        return self.max_errors is not None and len(self.records) >= self.max_errors
+
+    def messages(self):
+        return [str(record) for record in self.records]
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __getitem__(self, i):
+        return self.records[i]
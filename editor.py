@@ -8,6 +8,10 @@ import Semantic
 import icg
 import optimizer
 import codegen
+import tac
+from diagnostics import Diagnostics
+
+MAX_ERRORS = 100 # compile_all se detiene al reportar este número de errores
 
 class SimpleEditor(ctk.CTk):
     def __init__(self):
@@ -15,6 +19,8 @@ class SimpleEditor(ctk.CTk):
         self.title('Compilador C++ - Analizador Léxico')
         self.geometry('1000x700')
         self._file_path = None
+        self._tokens = None  # Tokens del último análisis (para re-tokenizar solo lo editado)
+        self._semantic_cache = Semantic.SemanticCache()  # Cuerpos ya analizados (Ctrl+M y Ctrl+R)
 
         # Configuración de la rejilla
         self.grid_rowconfigure(0, weight=3)
@@ -60,6 +66,13 @@ class SimpleEditor(ctk.CTk):
         run_menu.add_command(label='Compilar Todo (Evaluar 4 Rúbricas)', command=self.compile_all, accelerator='Ctrl+R') # <-- NUEVA OPCIÓN
         menubar.add_cascade(label='Compilar', menu=run_menu)
 
+        # Nivel de optimización (-O0 ... -O3) de Código Intermedio, Código Máquina y Compilar Todo
+        self._opt_level = tk.IntVar(value=optimizer.DEFAULT_LEVEL)
+        opt_menu = tk.Menu(menubar, tearoff=0)
+        for level in optimizer.LEVELS:
+            opt_menu.add_radiobutton(label=f'-O{level}', variable=self._opt_level, value=level)
+        menubar.add_cascade(label='Optimización', menu=opt_menu)
+
         self.config(menu=menubar)
 
         # Atajos
@@ -81,6 +94,15 @@ class SimpleEditor(ctk.CTk):
         self.output.see('end')
         self.output.configure(state="disabled")
 
+    def _tokenize_buffer(self, code):
+        """Tokeniza el código reutilizando los tokens del análisis anterior (solo re-escanea lo editado)."""
+        if self._tokens is None:
+            self._tokens = lexer.tokenize(code)
+        elif self._tokens.text != code:
+            offset, deleted, inserted = lexer.edit_between(self._tokens.text, code)
+            self._tokens = lexer.relex(self._tokens, offset, deleted, inserted)
+        return self._tokens
+
     def analyze_lexical(self):
         """Tokeniza el código y muestra resultados coloreados."""
         self.output.configure(state="normal")
@@ -90,7 +112,7 @@ class SimpleEditor(ctk.CTk):
         code = self.text.get('0.0', 'end')
         
         try:
-            tokens = lexer.tokenize(code)
+            tokens = self._tokenize_buffer(code)
             
             # Encabezado
             header = f"{'LÍN:COL':<10} | {'TIPO':<15} | {'VALOR':<25} | {'DESC/ERROR'}"
@@ -140,7 +162,7 @@ class SimpleEditor(ctk.CTk):
         
         try:
             # 1. Primero sacamos los tokens
-            tokens = lexer.tokenize(code)
+            tokens = self._tokenize_buffer(code)
             
             # 2. Se los pasamos al Parser
             syntax_errors = parser.parse(tokens)
@@ -152,7 +174,7 @@ class SimpleEditor(ctk.CTk):
                 self._append_output("\n[OK] ARRE COMPA, CERO ERRORES SINTÁCTICOS.")
             else:
                 for error in syntax_errors:
-                    self._append_output(error, "error_style")
+                    self._append_output(str(error), "error_style")
                 
                 self._append_output(f"\n[!] SE ENCONTRARON {len(syntax_errors)} ERRORES SINTÁCTICOS.", "error_style")
 
@@ -169,10 +191,10 @@ class SimpleEditor(ctk.CTk):
 
      try:
          # 1. Obtener tokens
-         tokens = lexer.tokenize(code)
+         tokens = self._tokenize_buffer(code)
 
          # 2. Pasarlos al Analizador Semántico
-         analyzer = Semantic.SemanticAnalyzer(tokens)
+         analyzer = Semantic.SemanticAnalyzer(tokens, cache=self._semantic_cache)
          sem_errors, sym_table = analyzer.analyze()
 
          self._append_output("=== RESULTADOS DEL ANÁLISIS SEMÁNTICO ===")
@@ -183,18 +205,20 @@ class SimpleEditor(ctk.CTk):
              self._append_output("\n[OK] ARRE COMPA, CERO ERRORES SEMÁNTICOS.")
          else:
              for error in sem_errors:
-                 self._append_output(error, "error_style")
+                 self._append_output(str(error), "error_style")
              self._append_output(f"\n[!] SE ENCONTRARON {len(sem_errors)} ERRORES SEMÁNTICOS.", "error_style")
 
          self._append_output("\n" + "=" * 30 + " TABLA DE SÍMBOLOS " + "=" * 30)
-         self._append_output(f"{'IDENTIFICADOR':<20} | {'TIPO':<15} | {'ALCANCE'}")
+         self._append_output(f"{'IDENTIFICADOR':<20} | {'TIPO':<15} | {'ALCANCE':<8} | {'ÁMBITO':>6} | {'LÍNEA':>6}")
          self._append_output("-" * 85)
 
-         if not sym_table.all_symbols:
+         # El historial incluye los símbolos ocultos por otro del mismo nombre
+         if not sym_table.history:
              self._append_output("La tabla de símbolos está vacía.")
          else:
-             for name, data in sym_table.all_symbols.items():
-                 self._append_output(f"{name:<20} | {data['tipo']:<15} | {data['alcance']}")
+             for record in sym_table.history:
+                 data = record.info
+                 self._append_output(f"{record.name:<20} | {data['tipo']:<15} | {data['alcance']:<8} | {record.scope:>6} | {record.line:>6}")
 
      except Exception as e:
          self._append_output(f'Error Fatal: {e}', "error_style")
@@ -249,28 +273,27 @@ class SimpleEditor(ctk.CTk):
         
         code = self.text.get('0.0', 'end')
         try:
-            tokens = lexer.tokenize(code)
+            tokens = self._tokenize_buffer(code)
             generator = icg.ICG(tokens)
             tac_code = generator.generate()
 
             # --- CÓDIGO ORIGINAL ---
             self._append_output("=== CÓDIGO INTERMEDIO ORIGINAL ===")
-            for line in tac_code:
-                if line.endswith(':'): 
-                    self._append_output(line)
-                else: 
-                    self._append_output(f"    {line}")
+            for line in tac.format_code(tac_code):
+                self._append_output(line)
                     
-            opt = optimizer.Optimizer(tac_code)
+            opt = optimizer.Optimizer(tac_code, generator.types, self._opt_level.get())
             optimized_code = opt.optimize()
 
-            self._append_output("\n=== CÓDIGO OPTIMIZADO (SIN CÓDIGO MUERTO) ===")
-            for line in optimized_code:
-                if line.endswith(':'): 
-                    self._append_output(line)
-                else: 
-                    self._append_output(f"    {line}")
-                    
+            self._append_output(f"\n=== CÓDIGO OPTIMIZADO (-O{opt.level}) ===")
+            for line in tac.format_code(optimized_code):
+                self._append_output(line)
+
+            self._append_output(f"\n# Temporales: {opt.temps_total} generados, "
+                                f"máximo {opt.temps_peak} vivos a la vez (nombres reutilizados)")
+            self._append_output("\n=== PASOS DEL OPTIMIZADOR ===")
+            for line in opt.format_report():
+                self._append_output(line)
             self._append_output("\n[OK] Optimización completada.")
 
         except Exception as e:
@@ -285,9 +308,10 @@ class SimpleEditor(ctk.CTk):
         code = self.text.get('0.0', 'end')
         try:
             # 1. Pipeline anterior (Tokens -> ICG -> Optimizer)
-            tokens = lexer.tokenize(code)
-            tac_code = icg.ICG(tokens).generate()
-            optimized_code = optimizer.Optimizer(tac_code).optimize()
+            tokens = self._tokenize_buffer(code)
+            icg_generator = icg.ICG(tokens)
+            tac_code = icg_generator.generate()
+            optimized_code = optimizer.Optimizer(tac_code, icg_generator.types, self._opt_level.get()).optimize()
 
             # 2. Generación de Código Máquina
             generator = codegen.CodeGenerator(optimized_code)
@@ -332,12 +356,16 @@ class SimpleEditor(ctk.CTk):
 
         self._append_output("[1/5] Iniciando Análisis Léxico...")
         try:
-            tokens = lexer.tokenize(code)
-            lexical_errors = [t for t in tokens if t.type == 'ERROR']
+            tokens = self._tokenize_buffer(code)
+            # Un solo colector para las tres etapas de análisis
+            diagnostics = Diagnostics(MAX_ERRORS)
+            lexical_errors = lexer.diagnose(tokens, diagnostics)
             if lexical_errors:
                 self._append_output(f"  [!] Falló: Se encontraron {len(lexical_errors)} errores léxicos.", "error_style")
                 for err in lexical_errors:
-                    self._append_output(f"      Línea {err.line}:{err.column} -> {err.error} ('{err.value}')", "error_style")
+                    self._append_output(f"      {err}", "error_style")
+                if diagnostics.full:
+                    self._append_output(f"      ... (se alcanzó el límite de {MAX_ERRORS} errores)", "error_style")
                 self._append_output("\n[X] Compilación abortada.", "error_style")
                 return
             self._append_output(f"  [OK] Análisis Léxico exitoso ({len(tokens)} tokens).\n")
@@ -347,12 +375,14 @@ class SimpleEditor(ctk.CTk):
 
         self._append_output("[2/5] Iniciando Análisis Sintáctico...")
         try:
-            p = parser.Parser(tokens)
+            p = parser.Parser(tokens, diagnostics)
             syntax_errors = p.parse()
             if syntax_errors:
                 self._append_output(f"  [!] Falló: Se encontraron {len(syntax_errors)} errores sintácticos.", "error_style")
                 for err in syntax_errors:
                     self._append_output(f"      {err}", "error_style")
+                if diagnostics.full:
+                    self._append_output(f"      ... (se alcanzó el límite de {MAX_ERRORS} errores)", "error_style")
                 self._append_output("\n[X] Compilación abortada.", "error_style")
                 return
             self._append_output("  [OK] Estructura Sintáctica válida.\n")
@@ -362,12 +392,15 @@ class SimpleEditor(ctk.CTk):
 
         self._append_output("[3/5] Iniciando Análisis Semántico...")
         try:
-            sem_analyzer = Semantic.SemanticAnalyzer(tokens)
+            # El árbol del Parser se reutiliza en las etapas siguientes
+            sem_analyzer = Semantic.SemanticAnalyzer(p.tree, diagnostics, self._semantic_cache)
             sem_analyzer.analyze()
             if sem_analyzer.errors:
                 self._append_output(f"  [!] Falló: Se encontraron {len(sem_analyzer.errors)} errores semánticos.", "error_style")
                 for err in sem_analyzer.errors:
                     self._append_output(f"      {err}", "error_style")
+                if diagnostics.full:
+                    self._append_output(f"      ... (se alcanzó el límite de {MAX_ERRORS} errores)", "error_style")
                 self._append_output("\n[X] Compilación abortada.", "error_style")
                 return
             self._append_output("  [OK] Reglas semánticas y tipos de datos válidos.\n")
@@ -377,12 +410,13 @@ class SimpleEditor(ctk.CTk):
 
         self._append_output("[4/5] Generando y Optimizando Código Intermedio...")
         try:
-            icg_generator = icg.ICG(tokens)
+            icg_generator = icg.ICG(p.tree)
             tac_code = icg_generator.generate()
             
-            opt = optimizer.Optimizer(tac_code)
+            opt = optimizer.Optimizer(tac_code, icg_generator.types, self._opt_level.get())
             optimized_code = opt.optimize()
-            self._append_output(f"  [OK] Código de 3 direcciones generado y optimizado.\n")
+            self._append_output(f"  [OK] Código de 3 direcciones generado y optimizado con -O{opt.level} "
+                                f"({opt.temps_total} temporales, máximo {opt.temps_peak} vivos a la vez).\n")
         except Exception as e:
             self._append_output(f"  [!] Error crítico en la fase de ICG/Optimización: {e}", "error_style")
             return
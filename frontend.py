@@ -0,0 +1,295 @@
+"""Front end paralelo: análisis sintáctico, semántico y código intermedio por fragmentos.
+
+El programa se corta en los '}' de nivel superior seguidos de una nueva
+declaración; cada lote de fragmentos consecutivos se analiza en un proceso
+aparte (ProcessPoolExecutor) partiendo del ámbito global que dejaron los
+lotes anteriores. Ese ámbito se calcula antes con un recorrido ligero de los
+tokens (firmas de métodos, variables globales y clases), y cada lote
+comprueba que su árbol declare exactamente lo mismo.
+
+Los resultados se unen en el orden del código, así los errores y el código
+de tres direcciones son idénticos a los de la ejecución secuencial. Si algún
+lote no se puede analizar de forma independiente (errores sintácticos antes
+del último lote, declaraciones que el recorrido previo no leyó igual o una
+cadena sin cerrar), se repite todo de forma secuencial.
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import ast_nodes
+import icg
+import lexer
+import parser
+import Semantic
+from diagnostics import Diagnostics, SEMANTIC, SYNTAX
+from tac import Op, temp_name
+
+BATCHES_PER_WORKER = 4 # Lotes por proceso: reparte mejor los fragmentos de tamaño desigual
+
+# Temporales y etiquetas de un lote, se renumeran al unir los lotes
+_PLACEHOLDER = re.compile('\0([tL])(\\d+)\0')
+# Campos de tac.Instr que pueden tener temporales o etiquetas
+_RENUMBERED = ('dest', 'a', 'b', 'label')
+
+class FrontEndResult:
+    __slots__ = ('syntax_errors', 'semantic_errors', 'sym_table', 'tac', 'batches')
+
+    def __init__(self, syntax_errors, semantic_errors, sym_table, tac, batches=1):
+        self.syntax_errors = syntax_errors
+        self.semantic_errors = semantic_errors
+        self.sym_table = sym_table
+        self.tac = tac
+        self.batches = batches  # Lotes analizados en paralelo (1 = secuencial)
+
+# --- ANÁLISIS DE UN LOTE (corre en el proceso trabajador) ---
+class _BatchAnalyzer(Semantic.SemanticAnalyzer):
+    """Analizador que parte del ámbito global y las clases de los lotes anteriores."""
+    def __init__(self, program, scope, class_names):
+        super().__init__(program)
+        self.sym_table.load_globals(scope)
+        self.class_names = class_names
+
+class _BatchICG(icg.ICG):
+    """Generador con temporales y etiquetas marcados para renumerarlos al unir los lotes."""
+    def new_temp(self):
+        t = f"\0t{self.temp_count}\0"
+        self.temp_count += 1
+        return t
+
+    def new_label(self):
+        l = f"\0L{self.label_count}\0"
+        self.label_count += 1
+        return l
+
+def _shift(tokens, offset, line, column):
+    """Lleva las posiciones de los tokens de un lote a las del archivo completo."""
+    for t in tokens:
+        if t.line == 1:
+            t.column += column - 1
+        t.line += line - 1
+        t.span = (t.span[0] + offset, t.span[1] + offset)
+
+def _compile_batch(job):
+    text, offset, line, column, scope, class_names, expected, last = job
+    tokens = lexer.tokenize(text)
+    _shift(tokens, offset, line, column)
+    p = parser.Parser(tokens)
+    syntax_errors = p.parse()
+    p.tree.source = None    # Los span ya apuntan al archivo completo, no al texto del lote
+    body = p.tree.body
+    # Un lote intermedio debe terminar limpio justo en su '}' para no depender del siguiente
+    if not last and (syntax_errors or not body or body[-1].end != len(p.tokens)):
+        return None
+    if tree_events(body) != expected:
+        return None
+    analyzer = _BatchAnalyzer(p.tree, scope, class_names)
+    analyzer.analyze()
+    generator = _BatchICG(p.tree)
+    code = generator.generate()
+    table = analyzer.sym_table
+    return (syntax_errors, analyzer.errors, table.history, table.scope_count - 1,
+            code, generator.temp_count - 1, generator.label_count - 1)
+
+# --- DECLARACIONES GLOBALES ---
+# Eventos en orden de aparición: ('class', nombre), ('metodo', nombre, retorno, tipos de
+# parámetros) y ('var', nombre, tipo) para las declaraciones del ámbito global
+def tree_events(statements, top=True, events=None):
+    """Eventos de un árbol, en el orden en que los registra el analizador semántico."""
+    if events is None:
+        events = []
+    for stmt in statements:
+        if isinstance(stmt, ast_nodes.ClassDecl):
+            events.append(('class', stmt.name.value))
+            tree_events(stmt.body, False, events)
+        elif isinstance(stmt, ast_nodes.MethodDecl):
+            if top:
+                events.append(('metodo', stmt.name.value, stmt.type.value, tuple(p.type.value for p in stmt.params)))
+            tree_events(stmt.body.body, False, events)
+        elif isinstance(stmt, ast_nodes.VarDecl):
+            if top:
+                events.append(('var', stmt.name.value, stmt.type.value))
+        elif isinstance(stmt, ast_nodes.For):
+            if top and isinstance(stmt.init, ast_nodes.VarDecl):
+                events.append(('var', stmt.init.name.value, stmt.init.type.value))
+            tree_events(stmt.body.body, False, events)
+        elif isinstance(stmt, ast_nodes.If):
+            tree_events(stmt.then.body, False, events)
+            if stmt.orelse is not None:
+                tree_events(stmt.orelse.body, False, events)
+        elif isinstance(stmt, (ast_nodes.While, ast_nodes.DoWhile)):
+            tree_events(stmt.body.body, False, events)
+        elif isinstance(stmt, (ast_nodes.Block, ast_nodes.Switch)):
+            tree_events(stmt.body, False, events)
+    return events
+
+def scan_events(values, idents, start, end):
+    """Los mismos eventos leídos de los tokens significativos [start, end), sin construir el árbol.
+
+    `values` son los textos de los tokens e `idents` indica cuáles son identificadores.
+    """
+    events = []
+    depth = 0
+    i = start
+    while i < end:
+        value = values[i]
+        if value == '{':
+            depth += 1
+        elif value == '}':
+            depth -= 1
+        elif value == 'class':
+            if i + 1 < end and idents[i + 1]:
+                events.append(('class', values[i + 1]))
+        elif depth == 0 and i + 2 < end and idents[i + 1] and (idents[i] or value in parser.TYPE_NAMES):
+            follow = values[i + 2]
+            if follow == '(':
+                # Tipos de los parámetros: tipo y nombre separados por ',' hasta el ')'
+                params = []
+                j = i + 3
+                while j < end and values[j] != ')':
+                    params.append(values[j])
+                    j += 3 if j + 2 < end and values[j + 2] == ',' else 2
+                events.append(('metodo', values[i + 1], value, tuple(params)))
+                i = j
+                continue
+            if follow == '=' or follow == ';':
+                events.append(('var', values[i + 1], value))
+        i += 1
+    return events
+
+def _declare(scope, class_names, event):
+    """Aplica un evento al ámbito global igual que SymbolTable.insert."""
+    kind, name = event[0], event[1]
+    if kind == 'class':
+        class_names.add(name)
+    elif name in scope:
+        return
+    elif kind == 'metodo':
+        scope[name] = {'tipo': 'metodo', 'alcance': 'global', 'retorno': event[2], 'params': list(event[3])}
+    elif event[2] in Semantic.VALID_TYPES or event[2] in class_names:
+        scope[name] = {'tipo': event[2], 'alcance': 'global'}
+
+# --- DIVISIÓN EN FRAGMENTOS ---
+def _starts_declaration(values, idents, i):
+    if i >= len(values):
+        return False
+    if values[i] == 'class':
+        return True
+    return (idents[i] or values[i] in parser.TYPE_NAMES) and i + 1 < len(values) and idents[i + 1]
+
+def split_top_level(values, idents):
+    """Índice (en los tokens significativos) donde empieza cada fragmento independiente.
+
+    Un fragmento termina en un '}' que cierra un '{' de nivel superior y va
+    seguido del inicio de otra declaración (clase, método o variable).
+    """
+    starts = [0]
+    depth = 0
+    for i, value in enumerate(values):
+        if value == '{':
+            depth += 1
+        elif value == '}':
+            depth -= 1
+            if depth == 0 and _starts_declaration(values, idents, i + 1):
+                starts.append(i + 1)
+    return starts
+
+def _batches(starts, total, count):
+    """Agrupa fragmentos consecutivos en a lo más `count` lotes de tamaño parecido."""
+    bounds = [0]
+    target = total / count
+    for s in starts[1:]:
+        if s - bounds[-1] >= target:
+            bounds.append(s)
+    return bounds
+
+# --- ENTRADA ---
+def run_sequential(text):
+    diagnostics = Diagnostics()
+    p = parser.Parser(lexer.tokenize(text), diagnostics)
+    syntax_errors = p.parse()
+    semantic_errors, sym_table = Semantic.SemanticAnalyzer(p.tree, diagnostics).analyze()
+    tac = icg.ICG(p.tree).generate()
+    return FrontEndResult(syntax_errors, semantic_errors, sym_table, tac)
+
+def run(text, workers=None):
+    """Análisis sintáctico, semántico y código intermedio de `text` con `workers` procesos.
+
+    El proceso principal solo divide el programa (con el TokenBuffer, sin crear
+    objetos Token); cada lote se tokeniza de nuevo en su proceso. Con
+    workers=1 los lotes se analizan en este mismo proceso (útil para medir el
+    costo de dividir y unir).
+    """
+    workers = workers or os.cpu_count() or 1
+    buffer = lexer.tokenize_buffer(text)
+    # Una cadena sin cerrar llega hasta el fin del texto: no se puede cortar
+    if lexer.KIND_IDS['ERR_STRING_OPEN'] in buffer.kinds:
+        return run_sequential(text)
+
+    indices = buffer.significant().indices
+    kinds, starts, ends = buffer.kinds, buffer.starts, buffer.ends
+    identifier = lexer.KIND_IDS['IDENTIFIER']
+    values = [text[starts[i]:ends[i]] for i in indices]
+    idents = [kinds[i] == identifier for i in indices]
+
+    bounds = _batches(split_top_level(values, idents), len(values), workers * BATCHES_PER_WORKER)
+    if len(bounds) == 1:
+        return run_sequential(text)
+
+    jobs = []
+    scope = {}
+    class_names = set()
+    for b, start in enumerate(bounds):
+        last = b == len(bounds) - 1
+        end = len(values) if last else bounds[b + 1]
+        first = indices[start]
+        offset = starts[first] if b else 0
+        text_end = len(text) if last else starts[indices[end]]
+        line, column = (buffer.lines[first], buffer.column(first)) if b else (1, 1)
+        events = scan_events(values, idents, start, end)
+        jobs.append((text[offset:text_end], offset, line, column, dict(scope), set(class_names), events, last))
+        for event in events:
+            _declare(scope, class_names, event)
+
+    if workers == 1:
+        results = list(map(_compile_batch, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_compile_batch, jobs))
+    if any(r is None for r in results):
+        return run_sequential(text)
+    return _merge(results, scope)
+
+def _merge(results, scope):
+    diagnostics = Diagnostics()
+    sym_table = Semantic.SymbolTable()
+    sym_table.load_globals(scope)
+    code = []
+    offsets = {'t': 0, 'L': 0}
+
+    def renumber(m):
+        # Los mismos nombres que da icg.ICG: t$N para los temporales y LN para las etiquetas
+        number = int(m[2]) + offsets[m[1]]
+        return temp_name(number) if m[1] == 't' else f"L{number}"
+
+    for batch_syntax, batch_errors, history, scopes, batch_code, temps, labels in results:
+        # Diagnostics descarta los que ya reportó un lote anterior
+        diagnostics.extend(batch_syntax)
+        diagnostics.extend(batch_errors)
+        # Los ámbitos locales de cada lote se numeran a partir de 1, igual que los temporales
+        for record in history:
+            if record.scope:
+                record.scope += sym_table.scope_count - 1
+        sym_table.history.extend(history)
+        sym_table.scope_count += scopes
+        for instr in batch_code:
+            for field in _RENUMBERED:
+                value = getattr(instr, field)
+                if value and '\0' in value:
+                    setattr(instr, field, _PLACEHOLDER.sub(renumber, value))
+            if instr.op == Op.JUMP_TABLE:
+                instr.label = tuple([_PLACEHOLDER.sub(renumber, label) for label in instr.label])
+        code.extend(batch_code)
+        offsets['t'] += temps
+        offsets['L'] += labels
+    return FrontEndResult(diagnostics.of_stage(SYNTAX), diagnostics.of_stage(SEMANTIC), sym_table, code, len(results))
@@ -1,16 +1,61 @@
-import lexer
+import ast_nodes
+import parser
+import tac
+from lexer import TokenKind as K
+from tac import NEGATED, Instr, Op
+
+# Nodos que son un solo operando de una instrucción
+_OPERANDS = frozenset((ast_nodes.Name, ast_nodes.Literal))
+
+# Despacho de switch: hasta _LINEAR_MAX_CASES casos se comparan uno por uno; con
+# más, si al menos _MIN_TABLE_DENSITY del rango [mínimo, máximo] son casos se usa
+# una tabla de saltos y si no, una búsqueda binaria
+_LINEAR_MAX_CASES = 3
+_MIN_TABLE_DENSITY = 0.4
 
 class ICG:
-    def __init__(self, tokens):
-        # Filtramos espacios y comentarios
-        self.tokens = [t for t in tokens if t.type not in ('WHITESPACE', 'COMMENT')]
-        self.pos = 0
+    """Generador de código de tres direcciones (tac.Instr) sobre el árbol que construye el Parser.
+
+    Acepta el árbol (ast_nodes.Program) o, por compatibilidad, la lista de
+    tokens; en ese caso construye el árbol con parser.parse_tree().
+    """
+    # Condiciones de if/while/for/do con saltos en cortocircuito; en False se
+    # calcula el valor completo y se prueba con un solo salto
+    short_circuit = True
+
+    def __init__(self, program):
+        if not isinstance(program, ast_nodes.Program):
+            program = parser.parse_tree(program)
+        self.program = program
+        self.tokens = program.tokens
         self.temp_count = 1
         self.label_count = 1
         self.code = []
+        # Tipo declarado de cada variable y parámetro (None si se declara con tipos distintos);
+        # Optimizer lo usa para propagar constantes con la conversión de C++
+        self.types = {}
+        # Nombres de los parámetros de cada método, en orden (benchmarks._execute los usa para pasar los argumentos)
+        self.params = {}
+        # Despacho de sentencias por tipo de nodo
+        self.statement_handlers = {
+            ast_nodes.ClassDecl: self.gen_class,
+            ast_nodes.MethodDecl: self.gen_method,
+            ast_nodes.VarDecl: self.gen_var_decl,
+            ast_nodes.Block: self.gen_block,
+            ast_nodes.Assign: self.gen_assignment,
+            ast_nodes.ExprStmt: self.gen_expr_stmt,
+            ast_nodes.If: self.gen_if,
+            ast_nodes.While: self.gen_while,
+            ast_nodes.DoWhile: self.gen_do,
+            ast_nodes.For: self.gen_for,
+            ast_nodes.Switch: self.gen_switch,
+            ast_nodes.Return: self.gen_return,
+            ast_nodes.Goto: self.gen_goto,
+            ast_nodes.Label: self.gen_label,
+        }
 
     def new_temp(self):
-        t = f"t{self.temp_count}"
+        t = tac.temp_name(self.temp_count)
         self.temp_count += 1
         return t
 
@@ -19,304 +64,353 @@ class ICG:
         self.label_count += 1
         return l
 
+    def declare(self, name, type):
+        if self.types.setdefault(name, type) != type:
+            self.types[name] = None
+
     def add_instruction(self, instr):
         self.code.append(instr)
 
-    def peek(self, offset=0):
-        if self.pos + offset < len(self.tokens):
-            return self.tokens[self.pos + offset]
-        return None
-
-    def consume(self):
-        t = self.peek()
-        self.pos += 1
-        return t
-
     def generate(self):
         """Punto de entrada principal"""
-        while self.pos < len(self.tokens):
-            self.process_statement()
+        with tac.building():
+            self.process_statements(self.program.body)
         return self.code
 
-    def process_statement(self):
-        t = self.peek()
-        if not t: return
+    def process_statement(self, stmt):
+        handler = self.statement_handlers.get(type(stmt))
+        if handler:
+            handler(stmt)
 
-        # --- ESTRUCTURA IF / ELSE ---
-        if t.value == "if":
-            self.consume() # consume 'if'
-            self.consume() # consume '('
-            cond_temp = self.process_expression(stop_at=[')'])
-            self.consume() # consume ')'
-            
-            label_else = self.new_label()
-            label_end = self.new_label()
-            
-            self.add_instruction(f"if not {cond_temp} goto {label_else}")
-            
-            # Bloque IF (Verdadero)
-            self.process_block_or_statement()
-            self.add_instruction(f"goto {label_end}")
-            
-            # Bloque ELSE (Falso)
-            self.add_instruction(f"{label_else}:")
-            if self.peek() and self.peek().value == "else":
-                self.consume() # consume 'else'
-                self.process_block_or_statement()
-                
-            self.add_instruction(f"{label_end}:")
-
-        # --- ESTRUCTURA SWITCH ---
-        elif t.value == "switch":
-            self.consume() # 'switch'
-            self.consume() # '('
-            switch_temp = self.process_expression(stop_at=[')'])
-            self.consume() # ')'
-            self.consume() # '{'
-            
-            # 1. Escaneo rápido para encontrar casos y organizar los saltos (Jump Table)
-            saved_pos = self.pos
-            case_values = []
-            has_default = False
-            
-            while self.peek() and self.peek().value != '}':
-                if self.peek().value == 'case':
-                    self.pos += 1
-                    case_values.append(self.consume().value)
-                elif self.peek().value == 'default':
-                    has_default = True
-                    self.pos += 1
-                else:
-                    self.pos += 1
-                    
-            self.pos = saved_pos # Regresamos a la posición original
-            
-            case_labels = {val: self.new_label() for val in case_values}
-            default_label = self.new_label() if has_default else self.new_label()
-            end_label = self.new_label()
-            
-            # 2. Imprimir las validaciones de saltos primero (Como pide la rúbrica)
-            for val in case_values:
-                self.add_instruction(f"if {switch_temp} == {val} goto {case_labels[val]}")
-            self.add_instruction(f"goto {default_label}")
+    def process_statements(self, statements):
+        for stmt in statements:
+            self.process_statement(stmt)
+
+    def gen_block(self, block):
+        self.process_statements(block.body)
+
+    # --- ESTRUCTURA IF / ELSE ---
+    def gen_if(self, node):
+        label_else = self.new_label()
+        label_end = self.new_label()
+        
+        self.gen_condition(node.cond, label_else, False)
+        
+        # Bloque IF (Verdadero)
+        self.gen_block(node.then)
+        self.add_instruction(Instr(Op.GOTO, label=label_end))
+        
+        # Bloque ELSE (Falso)
+        self.add_instruction(Instr(Op.LABEL, label=label_else))
+        if node.orelse is not None:
+            self.gen_block(node.orelse)
             
-            # 3. Imprimir el cuerpo de cada caso
-            while self.peek() and self.peek().value != '}':
-                tok = self.consume()
-                if tok.value == 'case':
-                    val = self.consume().value
-                    self.consume() # ':'
-                    self.add_instruction(f"{case_labels[val]}:")
-                elif tok.value == 'default':
-                    self.consume() # ':'
-                    self.add_instruction(f"{default_label}:")
-                elif tok.value == 'break':
-                    if self.peek() and self.peek().value == ';':
-                        self.consume() # ';'
-                    self.add_instruction(f"goto {end_label}")
+        self.add_instruction(Instr(Op.LABEL, label=label_end))
+
+    # --- ESTRUCTURA SWITCH ---
+    def gen_switch(self, node):
+        switch_temp = self.process_expression(node.expr)
+        
+        # 1. Casos y saltos
+        case_values = [item.value.value for item in node.body
+                       if isinstance(item, ast_nodes.Case) and item.value is not None]
+        has_default = any(isinstance(item, ast_nodes.Case) and item.value is None for item in node.body)
+        
+        case_labels = {val: self.new_label() for val in case_values}
+        default_label = self.new_label()
+        end_label = self.new_label()
+        
+        # 2. Imprimir el despacho primero (Como pide la rúbrica)
+        self.gen_dispatch(switch_temp, case_labels, default_label)
+        
+        # 3. Imprimir el cuerpo de cada caso
+        for item in node.body:
+            if isinstance(item, ast_nodes.Case):
+                if item.value is not None:
+                    self.add_instruction(Instr(Op.LABEL, label=case_labels[item.value.value]))
                 else:
-                    self.pos -= 1
-                    self.process_statement()
-                    
-            self.consume() # '}'
-            if not has_default:
-                self.add_instruction(f"{default_label}:")
-            self.add_instruction(f"{end_label}:")
-
-        # --- ESTRUCTURA DO-WHILE ---
-        elif t.value == "do":
-            self.consume() # 'do'
-            l_start = self.new_label()
-            
-            self.add_instruction(f"{l_start}:")
-            self.process_block_or_statement()
-            
-            if self.peek() and self.peek().value == "while":
-                self.consume() # 'while'
-                self.consume() # '('
-                cond = self.process_expression(stop_at=[')'])
-                self.consume() # ')'
-                if self.peek() and self.peek().value == ';':
-                    self.consume() # ';'
-                self.add_instruction(f"if {cond} goto {l_start}")
-
-        # --- ESTRUCTURA RETURN ---
-        elif t.value == "return":
-            self.consume() # 'return'
-            ret_expr = self.process_expression(stop_at=[';'])
-            if self.peek() and self.peek().value == ';': 
-                self.consume()
-            self.add_instruction(f"return {ret_expr}")
-
-        # --- ESTRUCTURA WHILE ---
-        elif t.value == "while":
-            self.consume()
-            l_start = self.new_label()
-            l_end = self.new_label()
-            
-            self.add_instruction(f"{l_start}:")
-            self.consume() # '('
-            cond = self.process_expression(stop_at=[')'])
-            self.consume() # ')'
-            
-            self.add_instruction(f"if not {cond} goto {l_end}")
-            self.process_block_or_statement()
-            self.add_instruction(f"goto {l_start}")
-            self.add_instruction(f"{l_end}:")
-
-        # --- ESTRUCTURA FOR ---
-        elif t.value == "for":
-            self.consume() # 'for'
-            self.consume() # '('
-            self.process_statement() # Inicialización
-            
-            l_start = self.new_label()
-            l_end = self.new_label()
-            
-            self.add_instruction(f"{l_start}:")
-            cond = self.process_expression(stop_at=[';'])
-            self.consume() # ';'
-            
-            self.add_instruction(f"if not {cond} goto {l_end}")
-            
-            inc_tokens = []
-            while self.peek() and self.peek().value != ')':
-                inc_tokens.append(self.consume())
-            self.consume() # ')'
-            
-            self.process_block_or_statement()
-            
-            if inc_tokens:
-                # TAC simplificado para el incremento
-                self.add_instruction(f"{inc_tokens[0].value} = {inc_tokens[0].value} + 1")
+                    self.add_instruction(Instr(Op.LABEL, label=default_label))
+            elif isinstance(item, ast_nodes.Break):
+                self.add_instruction(Instr(Op.GOTO, label=end_label))
+            else:
+                self.process_statement(item)
                 
-            self.add_instruction(f"goto {l_start}")
-            self.add_instruction(f"{l_end}:")
-
-        # --- CLASES ---
-        elif t.value == "class":
-            self.consume() # 'class'
-            class_name = self.consume().value
-            self.add_instruction(f"# Definición de la clase {class_name}")
-            self.consume() # '{'
-            while self.peek() and self.peek().value != '}':
-                self.process_statement()
-            self.consume() # '}'
-
-        # --- MÉTODOS / FUNCIONES ---
-        elif t.type == 'KEYWORD' and self.peek(2) and self.peek(2).value == '(':
-            self.consume() # tipo retorno
-            name = self.consume()
-            l_func = self.new_label()
-            self.add_instruction(f"# Definición del método {name.value}")
-            self.add_instruction(f"{l_func}:")
-            while self.peek() and self.peek().value != ')': self.consume()
-            self.consume() # ')'
-            self.process_block_or_statement()
-            
-        elif t.value == "goto":
-            self.consume() # Consume 'goto'
-            target_label = self.consume().value # Lee 'L2'
-            if self.peek() and self.peek().value == ';': 
-                self.consume() # Consume el ';'
-            self.add_instruction(f"goto {target_label}")
-
-        # --- ETIQUETAS MANUALES (Ej. L2:) ---
-        elif t.type == 'IDENTIFIER' and self.peek(1) and self.peek(1).value == ':':
-            label_name = self.consume().value # Lee el nombre (L2)
-            self.consume() # Consume los dos puntos ':'
-            self.add_instruction(f"{label_name}:")
-
-        # --- ASIGNACIONES / LLAMADAS A OBJETOS ---
-        elif t.type == 'IDENTIFIER' or t.value in ["int", "float", "bool", "string"]:
-            target = None
+        if not has_default:
+            self.add_instruction(Instr(Op.LABEL, label=default_label))
+        self.add_instruction(Instr(Op.LABEL, label=end_label))
+
+    def gen_dispatch(self, value, case_labels, default_label):
+        """Salto al caso de `value` o a default_label, según la cantidad y densidad de los casos."""
+        cases = sorted((int(val), val, label) for val, label in case_labels.items() if val.isdigit())
+        if (len(case_labels) <= _LINEAR_MAX_CASES or len(cases) < len(case_labels)
+                or len({number for number, _, _ in cases}) < len(cases)):
+            # Pocos casos o valores que no son enteros: comparaciones en orden
+            for val, label in case_labels.items():
+                self.add_instruction(Instr(Op.IF_REL, a=value, oper='==', b=val, label=label))
+            self.add_instruction(Instr(Op.GOTO, label=default_label))
+            return
+
+        low, high = cases[0][0], cases[-1][0]
+        if len(cases) >= _MIN_TABLE_DENSITY * (high - low + 1):
+            # Casos densos: revisar el rango y saltar por índice (los huecos van a default)
+            index = value
+            if low:
+                index = self.new_temp()
+                self.add_instruction(Instr(Op.BINARY, index, value, '-', str(low)))
+            self.add_instruction(Instr(Op.IF_REL, a=index, oper='<', b='0', label=default_label))
+            self.add_instruction(Instr(Op.IF_REL, a=index, oper='>', b=str(high - low), label=default_label))
+            table = [default_label] * (high - low + 1)
+            for number, _, label in cases:
+                table[number - low] = label
+            self.add_instruction(Instr(Op.JUMP_TABLE, a=index, label=tuple(table)))
+            return
+
+        # Casos dispersos: árbol de búsqueda binaria, con comparaciones en orden en las hojas
+        pending = [(None, cases)]
+        while pending:
+            label, cases = pending.pop()
+            if label is not None:
+                self.add_instruction(Instr(Op.LABEL, label=label))
+            if len(cases) <= _LINEAR_MAX_CASES:
+                for _, val, case_label in cases:
+                    self.add_instruction(Instr(Op.IF_REL, a=value, oper='==', b=val, label=case_label))
+                self.add_instruction(Instr(Op.GOTO, label=default_label))
+                continue
+            mid = len(cases) // 2
+            lower = self.new_label()
+            self.add_instruction(Instr(Op.IF_REL, a=value, oper='<', b=cases[mid][1], label=lower))
+            # La mitad inferior se emite después de la superior, bajo su etiqueta
+            pending.append((lower, cases[:mid]))
+            pending.append((None, cases[mid:]))
+
+    # --- ESTRUCTURA DO-WHILE ---
+    def gen_do(self, node):
+        l_start = self.new_label()
+        
+        self.add_instruction(Instr(Op.LABEL, label=l_start))
+        self.gen_block(node.body)
+        
+        self.gen_condition(node.cond, l_start, True)
+
+    # --- ESTRUCTURA RETURN ---
+    def gen_return(self, node):
+        ret_expr = self.process_expression(node.value)
+        self.add_instruction(Instr(Op.RETURN, a=ret_expr))
+
+    # --- ESTRUCTURA WHILE ---
+    def gen_while(self, node):
+        l_start = self.new_label()
+        l_end = self.new_label()
+        
+        self.add_instruction(Instr(Op.LABEL, label=l_start))
+        self.gen_condition(node.cond, l_end, False)
+        self.gen_block(node.body)
+        self.add_instruction(Instr(Op.GOTO, label=l_start))
+        self.add_instruction(Instr(Op.LABEL, label=l_end))
+
+    # --- ESTRUCTURA FOR ---
+    def gen_for(self, node):
+        self.process_statement(node.init) # Inicialización
+        
+        l_start = self.new_label()
+        l_end = self.new_label()
+        
+        self.add_instruction(Instr(Op.LABEL, label=l_start))
+        self.gen_condition(node.cond, l_end, False)
+        
+        self.gen_block(node.body)
+        
+        # Incremento (Ej. i = i + 1)
+        self.process_statement(node.step)
             
-            # 1. Determinar quién es el objetivo (Ej. 'int x', 'Persona p' o solo 'x')
-            if t.value in ["int", "float", "bool", "string"]: 
-                self.consume() # Tipo
-                target = self.consume().value
+        self.add_instruction(Instr(Op.GOTO, label=l_start))
+        self.add_instruction(Instr(Op.LABEL, label=l_end))
+
+    # --- CLASES ---
+    def gen_class(self, node):
+        self.add_instruction(Instr(Op.COMMENT, a=f"Definición de la clase {node.name.value}"))
+        self.process_statements(node.body)
+
+    # --- MÉTODOS / FUNCIONES ---
+    def gen_method(self, node):
+        l_func = self.new_label()
+        self.add_instruction(Instr(Op.COMMENT, a=f"Definición del método {node.name.value}"))
+        self.add_instruction(Instr(Op.LABEL, a=node.name.value, label=l_func))
+        self.params[node.name.value] = [param.name.value for param in node.params]
+        for param in node.params:
+            self.declare(param.name.value, param.type.value)
+        self.gen_block(node.body)
+
+    def gen_goto(self, node):
+        self.add_instruction(Instr(Op.GOTO, label=node.label.value))
+
+    # --- ETIQUETAS MANUALES (Ej. L2:) ---
+    def gen_label(self, node):
+        self.add_instruction(Instr(Op.LABEL, label=node.name.value))
+
+    # --- ASIGNACIONES / LLAMADAS A OBJETOS ---
+    def gen_var_decl(self, node):
+        self.declare(node.name.value, node.type.value)
+        if node.init is not None:
+            self.gen_store(node.name.value, node.init)
+
+    def gen_assignment(self, node):
+        # Solo se genera código para asignaciones a una variable
+        if isinstance(node.target, ast_nodes.Name):
+            self.gen_store(node.target.token.value, node.value)
+
+    def gen_expr_stmt(self, node):
+        # Llamada cuyo valor se descarta (Ej. p.celebrarCumpleaños() o imprimir(x))
+        expr = node.expr
+        if isinstance(expr, ast_nodes.Call) or (isinstance(expr, ast_nodes.Member) and expr.args is not None):
+            self.gen_call(expr.name.value, [self.process_expression(arg) for arg in expr.args])
+
+    def gen_store(self, target, value):
+        # Creación de objetos
+        if isinstance(value, ast_nodes.New):
+            self.gen_params([self.process_expression(arg) for arg in value.args])
+            self.add_instruction(Instr(Op.NEW, 'obj', value.name.value))
+
+        # Expresión o llamada (result = suma(5, 3) termina en result = return_value)
+        else:
+            mark = len(self.code)
+            expr_res = self.process_expression(value)
+            last = self.code[-1] if len(self.code) > mark else None
+            if last is not None and last.op in tac.ASSIGNS and last.dest == expr_res:
+                # El último temporal de la expresión se escribe directo en el destino
+                last.dest = target
+                self.temp_count -= 1
             else:
-                if self.peek(1) and self.peek(1).type == 'IDENTIFIER':
-                    self.consume() # Nombre de clase (Ej. Persona)
-                    target = self.consume().value
-                else:
-                    target = self.consume().value
-
-            # 2. Es llamada a método de un objeto? (Ej. p.celebrarCumpleaños())
-            if self.peek() and self.peek().value == '.':
-                self.consume() # '.'
-                method_name = self.consume().value
-                self.consume() # '('
-                while self.peek() and self.peek().value != ')': self.consume()
-                self.consume() # ')'
-                if self.peek() and self.peek().value == ';': self.consume()
-                self.add_instruction(f"call {method_name}")
-
-            # 3. Asignación convencional (=)
-            elif self.peek() and self.peek().value == "=":
-                self.consume() # '='
-                
-                # Creación de objetos
-                if self.peek() and self.peek().value == "new":
-                    self.consume() # 'new'
-                    class_name = self.consume().value
-                    self.consume() # '('
-                    self.consume() # ')'
-                    if self.peek() and self.peek().value == ';': self.consume()
-                    self.add_instruction(f"obj = create {class_name}") 
-                
-                # Llamada a método que retorna valor (result = suma(5, 3))
-                elif self.peek() and self.peek().type == 'IDENTIFIER' and self.peek(1) and self.peek(1).value == '(':
-                    method_name = self.consume().value
-                    self.consume() # '('
-                    
-                    args = []
-                    while self.peek() and self.peek().value != ')':
-                        if self.peek().value != ',':
-                            args.append(self.consume().value)
-                        else:
-                            self.consume()
-                    self.consume() # ')'
-                    
-                    # Temporales para los parámetros
-                    for arg in args:
-                        t_param = self.new_temp()
-                        self.add_instruction(f"{t_param} = {arg}")
-                        
-                    self.add_instruction(f"call {method_name}")
-                    self.add_instruction(f"{target} = return_value")
-                    if self.peek() and self.peek().value == ';': self.consume()
-                    
-                # Expresión matemática normal
+                self.add_instruction(Instr(Op.ASSIGN, target, expr_res))
+
+    def gen_params(self, args):
+        for arg in args:
+            self.add_instruction(Instr(Op.PARAM, a=arg))
+
+    def gen_call(self, name, args):
+        """Parámetros ya evaluados y la llamada; el resultado queda en 'return_value'."""
+        self.gen_params(args)
+        self.add_instruction(Instr(Op.CALL, a=name))
+
+    def gen_condition(self, cond, label, jump_if):
+        """Salta a `label` si la condición vale `jump_if`; si no, sigue con la instrucción siguiente.
+
+        && y || se evalúan en cortocircuito con saltos: el operando derecho
+        solo se calcula si el izquierdo no decide el resultado, y no se guarda
+        ningún booleano intermedio. La pila de trabajo guarda (condición,
+        etiqueta, jump_if) o la etiqueta que hay que emitir al llegar a ella.
+        """
+        if not self.short_circuit:
+            value = self.process_expression(cond)
+            self.add_instruction(Instr(Op.IF_TRUE if jump_if else Op.IF_FALSE, a=value, label=label))
+            return
+        work = [(cond, label, jump_if)]
+        while work:
+            item = work.pop()
+            if type(item) is str:
+                self.add_instruction(Instr(Op.LABEL, label=item))
+                continue
+            node, label, jump_if = item
+            cls = type(node)
+            if cls is ast_nodes.Paren:
+                work.append((node.expr, label, jump_if))
+            elif cls is ast_nodes.Unary and node.op.kind == K.NOT:
+                work.append((node.operand, label, not jump_if))
+            elif cls is ast_nodes.Binary and node.op.kind in (K.AND, K.OR):
+                # a && b es falso si a es falso; a || b es verdadero si a es verdadero
+                decides = node.op.kind == K.OR
+                if jump_if == decides:
+                    # El izquierdo basta para saltar; si no, decide el derecho
+                    work.append((node.right, label, jump_if))
+                    work.append((node.left, label, jump_if))
                 else:
-                    expr_res = self.process_expression(stop_at=[';'])
-                    if self.peek() and self.peek().value == ';': self.consume()
-                    self.add_instruction(f"{target} = {expr_res}")
+                    # Si el izquierdo decide, el resultado es el contrario: se salta el derecho
+                    skip = self.new_label()
+                    work.append(skip)
+                    work.append((node.right, label, jump_if))
+                    work.append((node.left, skip, decides))
+            elif cls is ast_nodes.Binary and node.op.value in NEGATED:
+                a = self.process_expression(node.left)
+                b = self.process_expression(node.right)
+                oper = node.op.value if jump_if else NEGATED[node.op.value]
+                self.add_instruction(Instr(Op.IF_REL, a=a, oper=oper, b=b, label=label))
             else:
-                pass # Evita atorarse
-        else:
-            self.consume()
-
-    def process_block_or_statement(self):
-        if self.peek() and self.peek().value == "{":
-            self.consume() # '{'
-            while self.peek() and self.peek().value != "}":
-                self.process_statement()
-            self.consume() # '}'
-        else:
-            self.process_statement()
+                value = self.process_expression(node)
+                self.add_instruction(Instr(Op.IF_TRUE if jump_if else Op.IF_FALSE, a=value, label=label))
 
-    def process_expression(self, stop_at=[]):
-        tokens_to_process = []
-        while self.peek() and self.peek().value not in stop_at and self.peek().value != ';':
-            tokens_to_process.append(self.consume())
-        
-        if not tokens_to_process: return "0"
-        
-        if len(tokens_to_process) == 1:
-            return tokens_to_process[0].value
+    def process_expression(self, expr):
+        """Operando con el valor de la expresión, emitiendo una instrucción por operación.
 
-        t = self.new_temp()
-        expr_str = " ".join([tok.value for tok in tokens_to_process])
-        self.add_instruction(f"{t} = {expr_str}")
-        return t
\ No newline at end of file
+        Recorre el árbol en postorden con una pila explícita: un nodo compuesto
+        se vuelve a apilar como tupla (nodo, ) debajo de sus hijos y, al sacarlo,
+        los operandos de los hijos ya están al final de `values`.
+        """
+        if expr is None: return "0"
+        cls = type(expr)
+        if cls in _OPERANDS:
+            return expr.token.value
+        if cls is ast_nodes.Binary and type(expr.left) in _OPERANDS and type(expr.right) in _OPERANDS:
+            # Caso más común (a + 1): una sola instrucción, sin pila
+            t = self.new_temp()
+            self.code.append(Instr(Op.BINARY, t, expr.left.token.value, expr.op.value, expr.right.token.value))
+            return t
+        add = self.code.append
+        values = []
+        work = [expr]
+        pop, push = work.pop, work.append
+        while work:
+            node = pop()
+            cls = type(node)
+            if cls is tuple:
+                node = node[0]
+                cls = type(node)
+                t = self.new_temp()
+                if cls is ast_nodes.Binary:
+                    b = values.pop()
+                    add(Instr(Op.BINARY, t, values[-1], node.op.value, b))
+                    values[-1] = t
+                    continue
+                if cls is ast_nodes.Unary:
+                    add(Instr(Op.UNARY, t, values[-1], node.op.value))
+                    values[-1] = t
+                    continue
+                n = len(node.args)
+                args = values[len(values) - n:]
+                del values[len(values) - n:]
+                if cls is ast_nodes.New:
+                    self.gen_params(args)
+                    add(Instr(Op.NEW, t, node.name.value))
+                else:
+                    self.gen_call(node.name.value, args)
+                    add(Instr(Op.ASSIGN, t, 'return_value'))
+                values.append(t)
+            elif cls in _OPERANDS:
+                values.append(node.token.value)
+            elif cls is ast_nodes.Paren:
+                push(node.expr)
+            elif cls is ast_nodes.Binary:
+                left, right = node.left, node.right
+                if type(left) in _OPERANDS and type(right) in _OPERANDS:
+                    t = self.new_temp()
+                    add(Instr(Op.BINARY, t, left.token.value, node.op.value, right.token.value))
+                    values.append(t)
+                    continue
+                push((node,))
+                push(right)
+                push(left)
+            elif cls is ast_nodes.Unary:
+                operand = node.operand
+                if (node.op.kind == K.MINUS and type(operand) is ast_nodes.Literal
+                        and operand.token.kind == K.NUMBER):
+                    # Literal negativo: no hace falta una operación
+                    values.append('-' + operand.token.value)
+                    continue
+                push((node,))
+                push(operand)
+            elif cls is ast_nodes.Member and node.args is None:
+                values.append(f"{node.obj.value}.{node.name.value}")
+            else:
+                # Call, Member con argumentos o New
+                push((node,))
+                work.extend(reversed(node.args))
+        return values[0]
@@ -1,6 +1,87 @@
+import codecs
+import io
+import mmap
+import os
 import re
+from array import array
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
-from typing import List, Tuple
+from sys import intern
+from typing import Iterator, List, Tuple
+
+from diagnostics import Diagnostic, Diagnostics, ErrorLimitReached, LEXICAL
+
+class TokenKind:
+    """Tipo numérico del token: uno por clase general y uno por cada palabra reservada, operador y símbolo.
+
+    Son enteros simples (no Enum) para que comparar y despachar por tipo cueste
+    lo mismo que comparar dos int en los ciclos del parser y del analizador."""
+    # Clases generales
+    IDENTIFIER = 1
+    NUMBER = 2
+    STRING = 3
+    CHAR_LITERAL = 4
+    COMMENT = 5
+    ERROR = 6
+    # Palabras reservadas
+    IF = 10
+    ELSE = 11
+    WHILE = 12
+    FOR = 13
+    CLASS = 14
+    INT = 15
+    FLOAT = 16
+    DOUBLE = 17
+    RETURN = 18
+    BREAK = 19
+    CONTINUE = 20
+    CHAR = 21
+    BOOL = 22
+    VOID = 23
+    PUBLIC = 24
+    PRIVATE = 25
+    PROTECTED = 26
+    VIRTUAL = 27
+    STATIC = 28
+    CONST = 29
+    NEW = 30
+    DELETE = 31
+    USING = 32
+    NAMESPACE = 33
+    STD = 34
+    COUT = 35
+    ENDL = 36
+    CIN = 37
+    # Operadores
+    AND = 50        # &&
+    OR = 51         # ||
+    NOT = 52        # !
+    SCOPE = 53      # ::
+    SHL = 54        # <<
+    SHR = 55        # >>
+    LE = 56         # <=
+    GE = 57         # >=
+    EQ = 58         # ==
+    NE = 59         # !=
+    LT = 60         # <
+    GT = 61         # >
+    ASSIGN = 62     # =
+    PLUS = 63       # +
+    MINUS = 64      # -
+    STAR = 65       # *
+    SLASH = 66      # /
+    PERCENT = 67    # %
+    # Símbolos
+    LPAREN = 80     # (
+    RPAREN = 81     # )
+    LBRACKET = 82   # [
+    RBRACKET = 83   # ]
+    LBRACE = 84     # {
+    RBRACE = 85     # }
+    COMMA = 86      # ,
+    SEMI = 87       # ;
+    DOT = 88        # .
+    HASH = 89       # #
 
 @dataclass
 class Token:
@@ -10,6 +91,11 @@ class Token:
     line: int       # Número de línea
     column: int     # Número de columna
     error: str = None # Si hay error, aquí va la descripción
+    kind: int = None # Tipo numérico (TokenKind) (se deduce de type/value si no se indica)
+
+    def __post_init__(self):
+        if self.kind is None:
+            self.kind = kind_of(self.type, self.value)
 
 KEYWORDS = [
     "if", "else", "while", "for", "class", "int", "float", "double",
@@ -18,6 +104,37 @@ KEYWORDS = [
     "using", "namespace", "std", "cout", "endl", "cin" 
 ]
 
+# Texto de cada palabra reservada, operador y símbolo -> su TokenKind
+FIXED_KINDS = {keyword: getattr(TokenKind, keyword.upper()) for keyword in KEYWORDS}
+FIXED_KINDS.update({
+    '&&': TokenKind.AND, '||': TokenKind.OR, '!': TokenKind.NOT, '::': TokenKind.SCOPE,
+    '<<': TokenKind.SHL, '>>': TokenKind.SHR, '<=': TokenKind.LE, '>=': TokenKind.GE,
+    '==': TokenKind.EQ, '!=': TokenKind.NE, '<': TokenKind.LT, '>': TokenKind.GT,
+    '=': TokenKind.ASSIGN, '+': TokenKind.PLUS, '-': TokenKind.MINUS, '*': TokenKind.STAR,
+    '/': TokenKind.SLASH, '%': TokenKind.PERCENT,
+    '(': TokenKind.LPAREN, ')': TokenKind.RPAREN, '[': TokenKind.LBRACKET, ']': TokenKind.RBRACKET,
+    '{': TokenKind.LBRACE, '}': TokenKind.RBRACE, ',': TokenKind.COMMA, ';': TokenKind.SEMI,
+    '.': TokenKind.DOT, '#': TokenKind.HASH,
+})
+# Valor canónico (un solo objeto str por texto) y tipo numérico de cada token fijo
+_FIXED_TOKENS = {value: (value, kind) for value, kind in FIXED_KINDS.items()}
+
+# Tipo general (Token.type) -> TokenKind para los tokens que no son fijos
+CLASS_KINDS = {
+    'IDENTIFIER':   TokenKind.IDENTIFIER,
+    'NUMBER':       TokenKind.NUMBER,
+    'STRING':       TokenKind.STRING,
+    'CHAR_LITERAL': TokenKind.CHAR_LITERAL,
+    'COMMENT':      TokenKind.COMMENT,
+    'ERROR':        TokenKind.ERROR,
+}
+
+def kind_of(token_type: str, value: str) -> int:
+    """TokenKind de un token a partir de su tipo general y su valor."""
+    if token_type in ('KEYWORD', 'OPERATOR', 'SYMBOL'):
+        return FIXED_KINDS[value]
+    return CLASS_KINDS[token_type]
+
 TOKEN_TYPE_MAP = {
     'BLOCK_COMMENT': 'COMMENT',
     'LINE_COMMENT':  'COMMENT',
@@ -74,43 +191,761 @@ TOKEN_REGEX = (
 
 _COMPILED = re.compile(TOKEN_REGEX)
 
-def tokenize(text: str) -> List[Token]:
-    tokens: List[Token] = []
-    
+# Mensajes de los errores léxicos que se detectan directamente en el regex
+ERROR_MESSAGES = {
+    'ERR_STRING_OPEN': "Cadena no cerrada (Falta comilla de cierre)",
+    'ERR_FLOAT_BAD':   "Literal numérico mal formado (múltiples puntos)",
+    'ERR_ID_BAD':      "Identificador inválido (no puede iniciar con número)",
+    'ERR_UNKNOWN':     "Carácter no reconocido",
+}
+CHAR_LITERAL_ERROR = "Literal de carácter mal formado (debe ser exactamente un carácter)"
+
+# Tipos cuyo valor puede contener saltos de línea (el resto nunca cruza líneas)
+_MULTILINE_KINDS = frozenset(('WHITESPACE', 'BLOCK_COMMENT', 'STRING', 'ERR_STRING_OPEN', 'CHAR_LITERAL'))
+
+class LineIndex:
+    """Índice de inicios de línea: traduce un offset a (línea, columna) en O(log n)."""
+    __slots__ = ('starts',)
+
+    def __init__(self, text: str):
+        # starts[i] es el offset donde empieza la línea i+1
+        self.starts = array('i', [0])
+        find = text.find
+        pos = find('\n')
+        while pos != -1:
+            self.starts.append(pos + 1)
+            pos = find('\n', pos + 1)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def line_of(self, offset: int) -> int:
+        return bisect_right(self.starts, offset)
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """Devuelve (línea, columna) con la misma convención 1-based que los tokens."""
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+    def line_start(self, line: int) -> int:
+        return self.starts[line - 1]
+
+class TokenList(list):
+    """Lista de tokens que conserva el texto fuente y su índice de líneas (construido al pedirlo)."""
+
+    def __init__(self, tokens=(), text: str = ''):
+        super().__init__(tokens)
+        self.text = text
+        self._line_index = None
+        self._open_offset = None
+        self._significant = None
+
+    @property
+    def line_index(self) -> LineIndex:
+        if self._line_index is None:
+            self._line_index = LineIndex(self.text)
+        return self._line_index
+
+    @property
+    def open_offset(self) -> int:
+        """Offset de la primera apertura sin cierre ('/*', comilla suelta) o -1 si no hay."""
+        if self._open_offset is None:
+            self._open_offset = _find_open(self, self.text)
+        return self._open_offset
+
+# --- MOTOR ALTERNATIVO: DESPACHO POR PRIMER CARÁCTER ---
+# En lugar de probar las alternativas del regex una por una en cada posición, se
+# clasifica el primer carácter con una tabla y se salta directo a la regla que le
+# corresponde. Las corridas (dígitos, identificadores, espacios) se escanean una sola
+# vez y las palabras reservadas se reconocen buscando el identificador en un set.
+# La salida es idéntica a la de _COMPILED.finditer (mismos tipos y spans).
+ENGINES = ('regex', 'dfa')
+ENGINE = 'regex'  # Motor usado por omisión en tokenize(), tokenize_buffer() y relex()
+
+_ID_START = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_')
+
+_C_OTHER, _C_SPACE, _C_DIGIT, _C_ALPHA, _C_SLASH, _C_DQUOTE, _C_SQUOTE, _C_OP, _C_SYMBOL = range(9)
+
+_CHAR_CLASS = [_C_OTHER] * 128
+for _ch in range(128):
+    if chr(_ch).isspace():
+        _CHAR_CLASS[_ch] = _C_SPACE
+for _ch in '0123456789':
+    _CHAR_CLASS[ord(_ch)] = _C_DIGIT
+for _ch in _ID_START:
+    _CHAR_CLASS[ord(_ch)] = _C_ALPHA
+for _ch in '!&|:<>=+-*%':
+    _CHAR_CLASS[ord(_ch)] = _C_OP
+for _ch in '()[]{},;.#':
+    _CHAR_CLASS[ord(_ch)] = _C_SYMBOL
+_CHAR_CLASS[ord('/')] = _C_SLASH
+_CHAR_CLASS[ord('"')] = _C_DQUOTE
+_CHAR_CLASS[ord("'")] = _C_SQUOTE
+
+# Operadores que empiezan con cada carácter, en el mismo orden de prioridad que el regex
+# (por eso '!=' se parte en '!' + '=' y un '&' o '|' sueltos son caracteres no reconocidos)
+_OPERATORS = {
+    '!': (('!', 'LOGICAL'),),
+    '&': (('&&', 'LOGICAL'),),
+    '|': (('||', 'LOGICAL'),),
+    ':': (('::', 'SCOPE'),),
+    '<': (('<<', 'SHIFT_OP'), ('<=', 'RELATIONAL'), ('<', 'RELATIONAL')),
+    '>': (('>>', 'SHIFT_OP'), ('>=', 'RELATIONAL'), ('>', 'RELATIONAL')),
+    '=': (('==', 'RELATIONAL'), ('=', 'ASSIGN')),
+    '+': (('+', 'ARITH'),),
+    '-': (('-', 'ARITH'),),
+    '*': (('*', 'ARITH'),),
+    '%': (('%', 'ARITH'),),
+}
+
+KEYWORD_SET = frozenset(KEYWORDS)
+
+# Escáneres de corridas (equivalentes a \d, \w, \s y [a-zA-Z0-9_] del regex principal)
+_DIGIT_RUN = re.compile(r'\d*').match
+_WORD_RUN = re.compile(r'\w*').match
+_IDENT_RUN = re.compile(r'[a-zA-Z0-9_]*').match
+_SPACE_RUN = re.compile(r'\s+').match
+_STRING_BODY = re.compile(r'(?:[^"\\]|\\.)*').match
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+def scan_dfa(text: str, pos: int = 0) -> Iterator[Tuple[str, int, int]]:
+    """Genera (tipo, inicio, fin) para cada coincidencia, igual que _COMPILED.finditer."""
+    n = len(text)
+    classes = _CHAR_CLASS
+    find = text.find
+    startswith = text.startswith
+    p = pos
+    while p < n:
+        c = text[p]
+        o = ord(c)
+        if o < 128:
+            cls = classes[o]
+        elif c.isspace():
+            cls = _C_SPACE
+        elif c.isdecimal():
+            cls = _C_DIGIT
+        else:
+            cls = _C_OTHER
+
+        if cls == _C_ALPHA:
+            # \b antes del identificador: el carácter anterior no puede ser de palabra
+            if p == 0 or not _is_word(text[p - 1]):
+                end = _IDENT_RUN(text, p).end()
+                if end == n or not _is_word(text[end]):
+                    word = text[p:end]
+                    yield ('KEYWORD' if word in KEYWORD_SET else 'IDENTIFIER'), p, end
+                    p = end
+                    continue
+            yield 'ERR_UNKNOWN', p, p + 1
+            p += 1
+
+        elif cls == _C_SPACE:
+            end = _SPACE_RUN(text, p).end()
+            yield 'WHITESPACE', p, end
+            p = end
+
+        elif cls == _C_OP:
+            for literal, kind in _OPERATORS[c]:
+                if startswith(literal, p):
+                    end = p + len(literal)
+                    yield kind, p, end
+                    p = end
+                    break
+            else:
+                yield 'ERR_UNKNOWN', p, p + 1
+                p += 1
+
+        elif cls == _C_SYMBOL:
+            yield 'SYMBOL', p, p + 1
+            p += 1
+
+        elif cls == _C_DIGIT:
+            d1 = _DIGIT_RUN(text, p).end()
+            boundary = p == 0 or not _is_word(text[p - 1])
+            if startswith('.', d1):
+                d2 = _DIGIT_RUN(text, d1 + 1).end()
+                if d2 > d1 + 1:
+                    if startswith('.', d2):
+                        d3 = _DIGIT_RUN(text, d2 + 1).end()
+                        if d3 > d2 + 1:
+                            yield 'ERR_FLOAT_BAD', p, d3
+                            p = d3
+                            continue
+                    if boundary and (d2 == n or not _is_word(text[d2])):
+                        yield 'FLOAT', p, d2
+                        p = d2
+                        continue
+            if d1 < n and text[d1] in _ID_START:
+                end = _WORD_RUN(text, d1).end()
+                yield 'ERR_ID_BAD', p, end
+                p = end
+            elif boundary and (d1 == n or not _is_word(text[d1])):
+                yield 'INT', p, d1
+                p = d1
+            else:
+                yield 'ERR_UNKNOWN', p, p + 1
+                p += 1
+
+        elif cls == _C_SLASH:
+            if startswith('/*', p):
+                close = find('*/', p + 2)
+                if close != -1:
+                    yield 'BLOCK_COMMENT', p, close + 2
+                    p = close + 2
+                    continue
+            if startswith('//', p):
+                end = find('\n', p)
+                if end == -1:
+                    end = n
+                yield 'LINE_COMMENT', p, end
+                p = end
+                continue
+            yield 'ARITH', p, p + 1
+            p += 1
+
+        elif cls == _C_DQUOTE:
+            close = find('"', p + 1)
+            if close == -1:
+                # Sin comilla de cierre: la cadena abierta llega hasta el fin del texto
+                yield 'ERR_STRING_OPEN', p, n
+                p = n
+                continue
+            newline = text.rfind('\n', p + 1, close)
+            if newline != -1:
+                # Cadena abierta: llega hasta el último salto de línea antes de la siguiente comilla
+                yield 'ERR_STRING_OPEN', p, newline + 1
+                p = newline + 1
+                continue
+            end = _STRING_BODY(text, p + 1).end()
+            if startswith('"', end):
+                yield 'STRING', p, end + 1
+                p = end + 1
+            else:
+                yield 'ERR_UNKNOWN', p, p + 1
+                p += 1
+
+        elif cls == _C_SQUOTE:
+            close = find("'", p + 1)
+            if close != -1:
+                yield 'CHAR_LITERAL', p, close + 1
+                p = close + 1
+            else:
+                yield 'ERR_UNKNOWN', p, p + 1
+                p += 1
+
+        else:
+            yield 'ERR_UNKNOWN', p, p + 1
+            p += 1
+
+def _regex_matches(text: str, pos: int = 0) -> Iterator[Tuple[str, int, int]]:
+    for m in _COMPILED.finditer(text, pos):
+        yield m.lastgroup, m.start(), m.end()
+
+def _matches(text: str, engine: str = None, pos: int = 0) -> Iterator[Tuple[str, int, int]]:
+    """(tipo, inicio, fin) de cada coincidencia desde `pos` con el motor `engine` (ENGINE si no se indica)."""
+    engine = engine or ENGINE
+    if engine == 'dfa':
+        return scan_dfa(text, pos)
+    if engine == 'regex':
+        return _regex_matches(text, pos)
+    raise ValueError(f"Motor léxico desconocido: {engine!r} (opciones: {', '.join(ENGINES)})")
+
+def _make_token(kind: str, value: str, span: Tuple[int, int], line: int, column: int) -> Token:
+    """Convierte una coincidencia del regex (que no sea WHITESPACE) en su Token."""
+    # Identificadores internados: las etapas posteriores los comparan y usan como llaves
+    if kind == 'IDENTIFIER':
+        return Token('IDENTIFIER', intern(value), span, line, column, None, TokenKind.IDENTIFIER)
+
+    # --- MANEJO DE ERRORES LÉXICOS ---
+    error = ERROR_MESSAGES.get(kind)
+    if error:
+        return Token('ERROR', value, span, line, column, error, TokenKind.ERROR)
+
+    # --- VALIDACIÓN MANUAL DE CHAR ---
+    if kind == 'CHAR_LITERAL':
+        # Validamos la longitud: un char normal son 3 caracteres (ej: 'z')
+        # Un salto de línea o escape son 4 caracteres (ej: '\n')
+        if len(value) > 4 or len(value) < 3:
+            return Token('ERROR', value, span, line, column, CHAR_LITERAL_ERROR, TokenKind.ERROR)
+
+    # Token Válido
+    final_type = TOKEN_TYPE_MAP[kind]
+    fixed = _FIXED_TOKENS.get(value)
+    if fixed is not None and final_type in ('KEYWORD', 'OPERATOR', 'SYMBOL'):
+        value, token_kind = fixed
+    else:
+        token_kind = CLASS_KINDS[final_type]
+    return Token(final_type, value, span, line, column, None, token_kind)
+
+def tokenize(text: str, engine: str = None) -> List[Token]:
+    tokens = TokenList(text=text)
+    append = tokens.append
+
+    # Posición rastreada incrementalmente: no se vuelve a escanear el prefijo en cada token
+    line = 1
+    line_start = 0
+
     # Iteramos sobre todas las coincidencias
+    for kind, start, end in _matches(text, engine):
+        column = start - line_start + 1
+        token_line = line
+
+        if kind in _MULTILINE_KINDS:
+            last_newline = text.rfind('\n', start, end)
+            if last_newline != -1:
+                line += text.count('\n', start, end)
+                line_start = last_newline + 1
+
+        if kind != 'WHITESPACE':
+            append(_make_token(kind, text[start:end], (start, end), token_line, column))
+
+    return tokens
+
+# --- TOKENS EN COLUMNAS COMPACTAS ---
+# Cada tipo de coincidencia del regex (menos WHITESPACE) tiene un id numérico;
+# 'ERR_CHAR' es el CHAR_LITERAL que no pasa la validación de longitud
+KIND_NAMES = tuple(name for name in _COMPILED.groupindex if name != 'WHITESPACE') + ('ERR_CHAR',)
+KIND_IDS = {name: i for i, name in enumerate(KIND_NAMES)}
+KIND_TYPES = tuple('ERROR' if name in ERROR_MESSAGES or name == 'ERR_CHAR' else TOKEN_TYPE_MAP.get(name, name)
+                   for name in KIND_NAMES)
+KIND_ERRORS = tuple(CHAR_LITERAL_ERROR if name == 'ERR_CHAR' else ERROR_MESSAGES.get(name) for name in KIND_NAMES)
+
+_IGNORED_TYPES = ('WHITESPACE', 'COMMENT')
+_COMMENT_KINDS = frozenset(i for i, t in enumerate(KIND_TYPES) if t == 'COMMENT')
+_ERR_CHAR = KIND_IDS['ERR_CHAR']
+_CHAR_LITERAL = KIND_IDS['CHAR_LITERAL']
+
+# Número de grupo del regex (m.lastindex) -> id del tipo; -1 para WHITESPACE
+_GROUP_KINDS = [-1] * (_COMPILED.groups + 1)
+for _name, _group in _COMPILED.groupindex.items():
+    _GROUP_KINDS[_group] = KIND_IDS.get(_name, -1)
+_MULTILINE_GROUPS = frozenset(_COMPILED.groupindex[name] for name in _MULTILINE_KINDS)
+
+class TokenBuffer:
+    """Tokens guardados en columnas array('i') (tipo, inicio, fin, línea).
+
+    Los valores se recortan del texto fuente solo cuando se piden, y los objetos
+    Token se materializan bajo demanda para el código que todavía los usa.
+    """
+    __slots__ = ('text', 'kinds', 'starts', 'ends', 'lines', '_line_index', '_significant')
+
+    def __init__(self, text: str = ''):
+        self.text = text
+        self.kinds = array('i')
+        self.starts = array('i')
+        self.ends = array('i')
+        self.lines = array('i')
+        self._line_index = None
+        self._significant = None
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.token(j) for j in range(*i.indices(len(self.kinds)))]
+        if i < 0:
+            i += len(self.kinds)
+        return self.token(i)
+
+    def __iter__(self):
+        for i in range(len(self.kinds)):
+            yield self.token(i)
+
+    @property
+    def line_index(self) -> LineIndex:
+        if self._line_index is None:
+            self._line_index = LineIndex(self.text)
+        return self._line_index
+
+    def value(self, i: int) -> str:
+        return self.text[self.starts[i]:self.ends[i]]
+
+    def type(self, i: int) -> str:
+        return KIND_TYPES[self.kinds[i]]
+
+    def column(self, i: int) -> int:
+        return self.starts[i] - self.line_index.starts[self.lines[i] - 1] + 1
+
+    def token(self, i: int) -> Token:
+        """Materializa el token i como un objeto Token."""
+        name = KIND_NAMES[self.kinds[i]]
+        start = self.starts[i]
+        end = self.ends[i]
+        # ERR_CHAR se vuelve a detectar al validar la longitud del CHAR_LITERAL
+        if name == 'ERR_CHAR':
+            name = 'CHAR_LITERAL'
+        return _make_token(name, self.text[start:end], (start, end), self.lines[i], self.column(i))
+
+    def to_list(self) -> TokenList:
+        return TokenList(self, self.text)
+
+    def significant(self) -> 'TokenView':
+        """Vista (sin copiar tokens) de los tokens que no son comentarios; se calcula una sola vez."""
+        if self._significant is None:
+            kinds = self.kinds
+            indices = array('i', (i for i in range(len(kinds)) if kinds[i] not in _COMMENT_KINDS))
+            self._significant = TokenView(self, indices)
+        return self._significant
+
+class TokenView:
+    """Secuencia de solo lectura sobre un subconjunto de un TokenBuffer."""
+    __slots__ = ('buffer', 'indices', '_cache')
+
+    _CACHE_SIZE = 64
+
+    def __init__(self, buffer: TokenBuffer, indices: array):
+        self.buffer = buffer
+        self.indices = indices
+        # Caché de mapeo directo: los analizadores consultan varias veces los mismos tokens cercanos
+        self._cache = [None] * self._CACHE_SIZE
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self.indices)))]
+        if i < 0:
+            i += len(self.indices)
+        slot = i % self._CACHE_SIZE
+        cached = self._cache[slot]
+        if cached is not None and cached[0] == i:
+            return cached[1]
+        tok = self.buffer.token(self.indices[i])
+        self._cache[slot] = (i, tok)
+        return tok
+
+    def __iter__(self):
+        token = self.buffer.token
+        for i in self.indices:
+            yield token(i)
+
+def tokenize_buffer(text: str, engine: str = None) -> TokenBuffer:
+    """Igual que tokenize(), pero guarda el resultado en un TokenBuffer compacto."""
+    buf = TokenBuffer(text)
+    kinds = buf.kinds.append
+    starts = buf.starts.append
+    ends = buf.ends.append
+    lines = buf.lines.append
+
+    line = 1
+    if (engine or ENGINE) != 'regex':
+        for name, start, end in _matches(text, engine):
+            kind = KIND_IDS.get(name, -1)
+            if kind >= 0:
+                if kind == _CHAR_LITERAL and not 3 <= end - start <= 4:
+                    kind = _ERR_CHAR
+                kinds(kind)
+                starts(start)
+                ends(end)
+                lines(line)
+            if name in _MULTILINE_KINDS:
+                line += text.count('\n', start, end)
+        return buf
+
+    group_kinds = _GROUP_KINDS
+    multiline = _MULTILINE_GROUPS
     for m in _COMPILED.finditer(text):
-        kind = m.lastgroup
-        value = m.group(kind)
+        group = m.lastindex
         start, end = m.span()
-        
-        # Calcular Línea y Columna
-        line = text.count('\n', 0, start) + 1
-        last_newline = text.rfind('\n', 0, start)
-        column = start - last_newline
-
-        if kind == 'WHITESPACE':
-            continue
-            
-        # --- MANEJO DE ERRORES LÉXICOS ---
-        if kind == 'ERR_STRING_OPEN':
-            tokens.append(Token('ERROR', value, (start, end), line, column, "Cadena no cerrada (Falta comilla de cierre)"))
-        elif kind == 'ERR_FLOAT_BAD':
-            tokens.append(Token('ERROR', value, (start, end), line, column, "Literal numérico mal formado (múltiples puntos)"))
-        elif kind == 'ERR_ID_BAD':
-            tokens.append(Token('ERROR', value, (start, end), line, column, "Identificador inválido (no puede iniciar con número)"))
-        elif kind == 'ERR_UNKNOWN':
-             tokens.append(Token('ERROR', value, (start, end), line, column, "Carácter no reconocido"))
+        kind = group_kinds[group]
+        if kind >= 0:
+            if kind == _CHAR_LITERAL and not 3 <= end - start <= 4:
+                kind = _ERR_CHAR
+            kinds(kind)
+            starts(start)
+            ends(end)
+            lines(line)
+        if group in multiline:
+            line += text.count('\n', start, end)
+    return buf
+
+def significant(tokens):
+    """Tokens sin espacios ni comentarios, compartidos por Parser, SemanticAnalyzer e ICG.
+
+    Para un TokenBuffer es una vista sin copias; para el resultado de tokenize()
+    la lista filtrada se calcula una vez y se reutiliza entre las etapas.
+    """
+    if isinstance(tokens, TokenBuffer):
+        return tokens.significant()
+    if isinstance(tokens, TokenList):
+        if tokens._significant is None:
+            tokens._significant = [t for t in tokens if t.type not in _IGNORED_TYPES]
+        return tokens._significant
+    return [t for t in tokens if t.type not in _IGNORED_TYPES]
+
+def diagnose(tokens, diagnostics=None) -> List[Diagnostic]:
+    """Registra cada token ERROR como diagnóstico léxico y regresa los de esta etapa."""
+    if diagnostics is None:
+        diagnostics = Diagnostics()
+    try:
+        for t in tokens:
+            if t.type == 'ERROR':
+                diagnostics.add(LEXICAL, 'lexical', t.line, t.column, t.error, t.value)
+    except ErrorLimitReached:
+        pass
+    return diagnostics.of_stage(LEXICAL)
+
+# --- LECTURA POR BLOQUES (STREAMING) ---
+CHUNK_SIZE = 1 << 16
+
+# Caracteres que el regex puede necesitar después del final de un token para decidir
+# (ej: '12' + '.5' es FLOAT, '1.2' + '.3' es ERR_FLOAT_BAD, '\b' mira un carácter)
+_LOOKAHEAD = 8
+
+def _open_reader(source):
+    """Devuelve (read, close) para leer texto por bloques de una ruta, archivo o mmap.
+
+    Las rutas se recorren con mmap; las fuentes binarias se decodifican como UTF-8
+    de forma incremental y con los saltos de línea normalizados a '\n' (igual que open()).
+    """
+    if isinstance(source, (str, bytes, os.PathLike)):
+        f = open(source, 'rb')
+        try:
+            source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Los archivos vacíos no se pueden mapear en memoria
+            source = f
+            f = None
+        owned = [source, f]
+    else:
+        owned = []
+
+    decoder = None
+
+    def read(size):
+        nonlocal decoder
+        while True:
+            data = source.read(size)
+            if isinstance(data, str):
+                return data
+            if decoder is None:
+                decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder('utf-8')(), translate=True)
+            text = decoder.decode(data, final=not data)
+            # Un bloque puede terminar a mitad de un carácter UTF-8 o de un '\r\n'
+            if text or not data:
+                return text
+
+    def close():
+        for obj in owned:
+            if obj is not None:
+                obj.close()
+
+    return read, close
+
+def _needs_more(buf: str, pos: int, m) -> bool:
+    """Indica si la coincidencia en `pos` podría cambiar al llegar más texto."""
+    if m.end() + _LOOKAHEAD >= len(buf):
+        return True
+    kind = m.lastgroup
+    # '/*' sin '*/' en el bloque actual: todavía puede convertirse en BLOCK_COMMENT
+    if kind != 'BLOCK_COMMENT' and buf.startswith('/*', pos):
+        return True
+    # Una comilla sin cierre todavía puede convertirse en STRING o CHAR_LITERAL
+    c = buf[pos]
+    if c == '"' and kind not in ('STRING', 'ERR_STRING_OPEN'):
+        return True
+    if c == "'" and kind != 'CHAR_LITERAL':
+        return True
+    return False
+
+def iter_tokens(source, chunk_size: int = CHUNK_SIZE) -> Iterator[Token]:
+    """Genera los mismos tokens que tokenize() leyendo la fuente por bloques.
+
+    `source` puede ser una ruta, un archivo abierto (texto o binario) o un mmap.
+    Solo se mantiene en memoria el bloque actual más el token pendiente, así que el
+    consumo es acotado salvo por tokens muy largos (un '/*' o una comilla simple sin
+    cerrar obligan a leer hasta encontrar su cierre o el fin del archivo).
+    """
+    read, close = _open_reader(source)
+    match = _COMPILED.match
+    try:
+        buf = ''
+        base = 0        # Offset absoluto de buf[0]
+        pos = 0         # Posición actual dentro de buf
+        eof = False
+        want = chunk_size
+        line = 1
+        line_start = 0  # Offset absoluto donde empieza la línea actual
+
+        while True:
+            m = match(buf, pos) if pos < len(buf) else None
+            if not eof and (m is None or _needs_more(buf, pos, m)):
+                chunk = read(want)
+                if not chunk:
+                    eof = True
+                    continue
+                # Conservamos un carácter antes de pos: '\b' necesita ver el anterior
+                keep = pos - 1 if pos > 0 else 0
+                buf = buf[keep:] + chunk
+                base += keep
+                pos -= keep
+                # Si el mismo token sigue incompleto, pedimos bloques cada vez más grandes
+                want = want * 2 if m is not None else chunk_size
+                continue
+            if m is None:
+                break
+            want = chunk_size
+
+            kind = m.lastgroup
+            start, end = m.span()
+            abs_start = base + start
+            column = abs_start - line_start + 1
+            token_line = line
+
+            if kind in _MULTILINE_KINDS:
+                last_newline = buf.rfind('\n', start, end)
+                if last_newline != -1:
+                    line += buf.count('\n', start, end)
+                    line_start = base + last_newline + 1
+
+            if kind != 'WHITESPACE':
+                yield _make_token(kind, m.group(kind), (abs_start, base + end), token_line, column)
+            pos = end
+    finally:
+        close()
+
+# --- RE-TOKENIZACIÓN INCREMENTAL ---
+# Caracteres con los que una edición puede cerrar una apertura lejana ('/*', '"', "'")
+_SENSITIVE_CHARS = frozenset('\'"*/\\\n')
+
+def _token_end(t: Token) -> int:
+    return t.span[1]
+
+def _token_start(t: Token) -> int:
+    return t.span[0]
+
+def _is_open(t: Token, text: str) -> bool:
+    """Un token que depende de todo el texto posterior: su cierre podría aparecer más adelante."""
+    if t.type == 'ERROR':
+        # Comillas sueltas y cadenas no cerradas (estas se extienden hasta el siguiente '"')
+        return t.value[0] in ('"', "'")
+    return t.value == '/' and text.startswith('*', t.span[1])
+
+def _find_open(tokens, text: str) -> int:
+    for t in tokens:
+        if _is_open(t, text):
+            return t.span[0]
+    return -1
+
+def edit_between(old: str, new: str) -> Tuple[int, int, str]:
+    """Calcula la edición mínima (offset, borrados, insertado) que transforma `old` en `new`."""
+    limit = min(len(old), len(new))
+    # Prefijo común por búsqueda binaria (las comparaciones de slices corren en C)
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[:mid] == new[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    prefix = lo
+    # Sufijo común, sin encimarse con el prefijo
+    lo, hi = 0, limit - prefix
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[len(old) - mid:] == new[len(new) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    suffix = lo
+    return prefix, len(old) - prefix - suffix, new[prefix:len(new) - suffix]
+
+def relex(tokens: TokenList, offset: int, deleted: int, inserted: str, engine: str = None) -> TokenList:
+    """Re-tokeniza tras reemplazar `deleted` caracteres en `offset` por `inserted` (con `engine`, como tokenize).
+
+    Solo se vuelve a escanear desde el último token seguro antes de la edición hasta
+    que el flujo de tokens se resincroniza con el anterior; los tokens posteriores se
+    reutilizan desplazando su span, línea y columna. Los objetos Token de `tokens`
+    se reutilizan (y modifican) en la lista resultante.
+    """
+    old_text = tokens.text
+    text = old_text[:offset] + inserted + old_text[offset + deleted:]
+    delta = len(inserted) - deleted
+    old_edit_end = offset + deleted
+    new_edit_end = offset + len(inserted)
+
+    # 1. Último token seguro: los anteriores terminan lejos de la edición (fuera del lookahead del regex)
+    k = bisect_right(tokens, offset - _LOOKAHEAD, key=_token_end)
+    # Una apertura sin cierre antes de la edición puede cerrarse con lo que se insertó o borró
+    open_offset = tokens._open_offset
+    window = text[max(offset - 1, 0):new_edit_end + 1] + old_text[offset:old_edit_end]
+    if not _SENSITIVE_CHARS.isdisjoint(window):
+        open_offset = tokens.open_offset
+        if open_offset != -1 and open_offset < offset:
+            k = min(k, bisect_left(tokens, open_offset, key=_token_start))
+
+    if k > 0:
+        prev = tokens[k - 1]
+        pos = prev.span[1]
+        last_newline = prev.value.rfind('\n')
+        if last_newline == -1:
+            line = prev.line
+            line_start = prev.span[0] - prev.column + 1
+        else:
+            line = prev.line + prev.value.count('\n')
+            line_start = prev.span[0] + last_newline + 1
+    else:
+        pos = line_start = 0
+        line = 1
+
+    # 2. Re-escaneo hasta que un token nuevo empiece donde empezaba uno viejo (ya pasada la edición)
+    new_tokens = []
+    j = k
+    n_old = len(tokens)
+    resync = False
+    for kind, start, end in _matches(text, engine, pos):
+        column = start - line_start + 1
+        token_line = line
+
+        if kind != 'WHITESPACE' and start > new_edit_end:
+            old_start = start - delta
+            while j < n_old and tokens[j].span[0] < old_start:
+                j += 1
+            if j < n_old and tokens[j].span[0] == old_start:
+                resync = True
+                break
+
+        if kind in _MULTILINE_KINDS:
+            last_newline = text.rfind('\n', start, end)
+            if last_newline != -1:
+                line += text.count('\n', start, end)
+                line_start = last_newline + 1
+
+        if kind != 'WHITESPACE':
+            new_tokens.append(_make_token(kind, text[start:end], (start, end), token_line, column))
+
+    # 3. Desplazamiento de los tokens reutilizados
+    if not resync:
+        j = n_old
+    elif delta or tokens[j].line != token_line or tokens[j].column != column:
+        line_delta = token_line - tokens[j].line
+        column_delta = column - tokens[j].column
+        same_line = tokens[j].line
+        for i in range(j, n_old):
+            t = tokens[i]
+            if t.line == same_line:
+                t.column += column_delta
+            s, e = t.span
+            t.span = (s + delta, e + delta)
+            t.line += line_delta
+
+    result = TokenList(text=text)
+    result.extend(tokens[:k])
+    result.extend(new_tokens)
+    result.extend(tokens[j:])
+
+    # La primera apertura sin cierre se conoce sin recorrer toda la lista
+    if open_offset is not None:
+        if open_offset != -1 and open_offset < pos:
+            result._open_offset = open_offset
         else:
-            # --- VALIDACIÓN MANUAL DE CHAR ---
-            if kind == 'CHAR_LITERAL':
-                # Validamos la longitud: un char normal son 3 caracteres (ej: 'z')
-                # Un salto de línea o escape son 4 caracteres (ej: '\n')
-                if len(value) > 4 or len(value) < 3:
-                    tokens.append(Token('ERROR', value, (start, end), line, column, "Literal de carácter mal formado (debe ser exactamente un carácter)"))
-                    continue  # Brincamos la creación del token válido
-            
-            # Token Válido
-            final_type = TOKEN_TYPE_MAP.get(kind, kind)
-            tokens.append(Token(final_type, value, (start, end), line, column))
-        
-    return tokens
\ No newline at end of file
+            found = _find_open(new_tokens, text)
+            if found == -1 and resync and open_offset != -1:
+                # Si la apertura vieja cayó en la zona re-escaneada, la siguiente es desconocida
+                found = open_offset + delta if open_offset >= old_start else None
+            result._open_offset = found
+    return result
@@ -1,109 +1,1540 @@
-import re
+import heapq
+import itertools
+import sys
+import time
+import weakref
+from bisect import bisect_left
+
+import cfg
+import tac
+from cfg import bits
+from tac import ASSIGNS, BRANCHES, JUMPS, Instr, Op, READS, is_temp, jump_targets, negated
+
+def _constant(operand):
+    """Valor de un literal entero, decimal o booleano del TAC (None si no es uno)."""
+    if not operand:
+        return None
+    if operand == 'true' or operand == 'false':
+        return operand == 'true'
+    first = operand[0]
+    if first.isdigit() or (first == '-' and operand[1:2].isdigit()):
+        try:
+            return float(operand) if '.' in operand else int(operand)
+        except ValueError:
+            return None
+    return None
+
+def _literal(value):
+    """Literal del TAC con `value` (None si un decimal no se puede escribir como literal)."""
+    if value is True or value is False:
+        return 'true' if value else 'false'
+    text = repr(value)
+    if type(value) is float and not text.replace('.', '').lstrip('-').isdigit():
+        return None # inf, nan o notación científica
+    return text
+
+def _int32(value):
+    """Entero con el desbordamiento de un int de 32 bits."""
+    value &= 0xFFFFFFFF
+    return value - (1 << 32) if value >= 1 << 31 else value
+
+def _arithmetic(a, b, integer, decimal):
+    if type(a) is float or type(b) is float:
+        return decimal(a, b)
+    return _int32(integer(int(a), int(b)))
+
+def _divide(a, b):
+    if b == 0:
+        return None # Se deja para la ejecución
+    if type(a) is float or type(b) is float:
+        return a / b
+    quotient = abs(a) // abs(b)     # int trunca hacia cero
+    return _int32(quotient if (a < 0) == (b < 0) else -quotient)
+
+def _remainder(a, b):
+    if b == 0 or type(a) is float or type(b) is float:
+        return None
+    rest = abs(a) % abs(b)          # El resto lleva el signo del dividendo
+    return rest if a >= 0 else -rest
+
+# Operaciones que se calculan en tiempo de compilación, con la semántica de C++
+# (bool se promueve a int; int con double da double)
+_FOLDS = {
+    '+': lambda a, b: _arithmetic(a, b, int.__add__, float.__add__),
+    '-': lambda a, b: _arithmetic(a, b, int.__sub__, float.__sub__),
+    '*': lambda a, b: _arithmetic(a, b, int.__mul__, float.__mul__),
+    '/': _divide,
+    '%': _remainder,
+    '<<': lambda a, b: _int32(a << b) if type(a) is int and type(b) is int and 0 <= b < 32 else None,
+    '<': lambda a, b: a < b,
+    '>': lambda a, b: a > b,
+    '<=': lambda a, b: a <= b,
+    '>=': lambda a, b: a >= b,
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '&&': lambda a, b: bool(a) and bool(b),
+    '||': lambda a, b: bool(a) or bool(b),
+}
+_UNARY_FOLDS = {
+    '-': lambda a: -a if type(a) is float else _int32(-int(a)),
+    '!': lambda a: not a,
+}
+# Asignaciones que pueden dejar una constante
+_FOLDABLE = frozenset((Op.ASSIGN, Op.BINARY, Op.UNARY))
+# Conversión al guardar en una variable de cada tipo; las de otros tipos no se propagan
+_CONVERSIONS = {
+    'int': lambda value: _int32(int(value)),
+    'bool': bool,
+}
+
+class _Folder:
+    """Recorrido de propagate_constants por una función: lo que se sabe en el punto actual."""
+    def __init__(self, types, constants, reaching=None, collect=False):
+        self.types = types
+        self.constants = constants      # Operando -> valor del literal (None si no es uno)
+        self.known = {}                 # Variable -> literal (o None) en el punto actual del bloque
+        self.values = {}                # Posición de una asignación -> literal que guarda
+        self.reach = 0                  # Asignaciones que llegan al inicio del bloque (reaching)
+        self.called = False             # Hubo una llamada desde el inicio del bloque
+        self.jumps = False              # Algún salto se volvió goto o desapareció
+        if reaching is None:
+            self.definitions, self.by_name = (), {}
+        else:
+            self.definitions, self.by_name = reaching.definitions, reaching.by_name
+        # Con collect: qué variables pueden valer una constante al empezar un bloque
+        self.sources = {} if collect else None  # Variable -> lo que leen sus asignaciones (None: no puede)
+        self.exposed = set()            # Variables leídas en un bloque antes de asignarse en él
+
+    def start(self, reach):
+        self.known = {}
+        self.reach = reach
+        self.called = False
+
+    def value(self, operand):
+        constants = self.constants
+        if operand not in constants:
+            constants[operand] = _constant(operand)
+        return constants[operand]
+
+    def resolve(self, operand):
+        """Literal de `operand` si su valor es constante en este punto; si no, el operando."""
+        known = self.known
+        if operand in known:
+            return known[operand] or operand
+        if not operand or self.value(operand) is not None:
+            return operand
+        self.exposed.add(operand)
+        literal = None
+        mask = self.by_name.get(operand)
+        # Después de una llamada, una variable que no es temporal pudo cambiar
+        if mask is not None and not (self.called and not is_temp(operand)):
+            for k in bits(self.reach & mask):
+                value = self.values.get(self.definitions[k])
+                if value is None or (literal is not None and value != literal):
+                    literal = None
+                    break
+                literal = value
+        known[operand] = literal
+        return literal or operand
+
+    def fold(self, i, instr):
+        """La instrucción i con los valores conocidos y calculada si se puede (None si desaparece)."""
+        op = instr.op
+        if op in READS:
+            a, b = self.resolve(instr.a), self.resolve(instr.b)
+            if a is not instr.a or b is not instr.b:
+                instr = Instr(op, instr.dest, a, instr.oper, b, instr.label)
+        if op in _FOLDABLE:
+            self.assign(i, instr)
+            va = self.value(instr.a)
+            if va is None:
+                return instr
+            value = None
+            if op == Op.ASSIGN:
+                value = va
+            elif op == Op.BINARY:
+                vb = self.value(instr.b)
+                if vb is not None and instr.oper in _FOLDS:
+                    value = _FOLDS[instr.oper](va, vb)
+            elif instr.oper in _UNARY_FOLDS:
+                value = _UNARY_FOLDS[instr.oper](va)
+            literal = None if value is None else _literal(value)
+            if literal is None:
+                return instr
+            dest = instr.dest
+            temp = is_temp(dest)
+            convert = None if temp else _CONVERSIONS.get(self.types.get(dest))
+            if convert is not None:
+                literal = _literal(convert(value))
+            if temp or convert is not None:
+                self.known[dest] = literal
+                self.values[i] = literal
+            # Si no, se guarda el valor pero no se sabe cómo lo convierte la variable
+            return instr if op == Op.ASSIGN and literal == instr.a else Instr(Op.ASSIGN, dest, literal)
+        if op == Op.NEW:
+            self.assign(i, instr)
+        elif op == Op.CALL:
+            # La función llamada puede cambiar cualquier variable que no sea un temporal
+            known = self.known
+            for name in [name for name in known if not is_temp(name)]:
+                del known[name]
+            self.assign(i, instr)
+            self.called = True
+        elif op in BRANCHES or op == Op.JUMP_TABLE:
+            va = self.value(instr.a)
+            if va is None:
+                return instr
+            target = instr.label
+            taken = None
+            if op == Op.IF_REL:
+                vb = self.value(instr.b)
+                if vb is not None:
+                    taken = _FOLDS[instr.oper](va, vb)
+            elif op == Op.JUMP_TABLE:
+                if type(va) is int and 0 <= va < len(target):
+                    taken, target = True, target[va]
+            else:
+                taken = bool(va) == (op == Op.IF_TRUE)
+            if taken is not None:
+                self.jumps = True
+                return Instr(Op.GOTO, label=target) if taken else None
+        return instr
+
+    def assign(self, i, instr):
+        """Registra una asignación cuyo valor no se conoce (fold lo corrige si es constante)."""
+        dest = cfg.defines(instr)
+        self.known[dest] = None
+        sources = self.sources
+        if sources is None:
+            return
+        if (instr.op in _FOLDABLE and sources.get(dest, ()) is not None
+                and (is_temp(dest) or self.types.get(dest) in _CONVERSIONS)):
+            read = sources.setdefault(dest, set())
+            for name in (instr.a, instr.b):
+                if name and self.value(name) is None:
+                    read.add(name)
+        else:
+            sources[dest] = None
+
+    def foldable_names(self):
+        """Variables leídas en un bloque antes de asignarse en él que pueden valer una constante.
+
+        Solo se asignan con copias u operaciones de literales y de otras
+        variables como ellas (temporales, o variables int o bool).
+        """
+        sources = self.sources
+        readers = {}
+        pending = []
+        for name, read in sources.items():
+            if read is None:
+                pending.append(name)
+                continue
+            for source in read:
+                readers.setdefault(source, []).append(name)
+                if source not in sources:
+                    pending.append(name)
+        dropped = set()
+        while pending:
+            name = pending.pop()
+            if name not in dropped:
+                dropped.add(name)
+                pending.extend(readers.get(name, ()))
+        return sorted(name for name in self.exposed if name in sources and name not in dropped)
+
+# Instrucciones sin efectos además de asignar su destino (hoist_loop_invariants)
+_HOISTABLE = frozenset((Op.ASSIGN, Op.BINARY, Op.UNARY))
+# Operadores que fallan con un divisor 0: no se calculan antes de saber si se llega a ellos
+_FAILING = frozenset(('/', '%'))
+
+# Operadores en los que a oper b == b oper a (si los dos operandos son números o bool)
+_COMMUTATIVE = frozenset(('+', '*'))
+_NUMERIC_TYPES = frozenset(('int', 'float', 'double', 'char', 'bool'))
+
+class _ValueNumbers:
+    """Numeración de valores de un bloque básico (eliminate_common_subexpressions).
+
+    Cada operando tiene el número del valor que guarda en el punto actual;
+    una expresión se busca por los números de sus operandos, así que 'x = a'
+    seguido de 'x + b' coincide con 'a + b'. Asignar una variable solo le da
+    un número nuevo a ella (y a sus campos 'obj.campo'): las expresiones que
+    la usaban quedan con el número viejo y ya no coinciden.
+    """
+    def __init__(self, types):
+        self.types = types
+        self.count = 0
+        self.literals = {}      # Literal -> su número (no cambia entre bloques)
+        self.numeric = set()    # Números de valores aritméticos o bool
+        self.number = {}        # Variable -> número de su valor
+        self.holders = {}       # Número de una expresión -> variables a las que se le dio (se revisan al usarlas)
+        self.expressions = {}   # (número, oper, número) -> número del resultado
+        self.fields = {}        # Objeto -> sus campos con número
+        self.users = []         # Variables con número que no son temporales (una llamada los cambia)
+
+    def start(self, available):
+        """Empieza un bloque en el que valen las expresiones `available` ((a, oper, b) -> variable)."""
+        # Sin variables con número, lo que quede en las tablas ya no coincide con nada
+        if self.number:
+            self.number = {}
+            self.holders = {}
+            self.expressions = {}
+        if self.users:
+            self.users = []
+            self.fields = {}
+        for (a, oper, b), holder in available.items():
+            key = self.key(a, oper, b)
+            value = self.number.get(holder)
+            if value is None:
+                value = self.expressions.get(key) or self.new(False)
+                self.bind(holder, value)
+            self.expressions.setdefault(key, value)
+
+    def new(self, numeric):
+        """Número para el resultado de una expresión."""
+        self.count += 1
+        if numeric:
+            self.numeric.add(self.count)
+        self.holders[self.count] = []
+        return self.count
+
+    def value(self, operand):
+        """Número del valor de `operand` (uno nuevo si todavía no tiene)."""
+        value = self.number.get(operand)
+        if value is not None:
+            return value
+        first = operand[0]
+        if first.isalpha() or first == '_':
+            self.count += 1
+            value = self.count
+            if self.types.get(operand) in _NUMERIC_TYPES:
+                self.numeric.add(value)
+            self.bind(operand, value)
+            return value
+        value = self.literals.get(operand)
+        if value is None:
+            self.count += 1
+            value = self.literals[operand] = self.count
+            if _constant(operand) is not None or first == "'":
+                self.numeric.add(value)
+        return value
+
+    def key(self, a, oper, b):
+        a, b = self.value(a), self.value(b)
+        if oper in _COMMUTATIVE and a > b and a in self.numeric and b in self.numeric:
+            a, b = b, a
+        return (a, oper, b)
+
+    def holder(self, value):
+        """Variable que todavía guarda el resultado `value` (None si ya no lo guarda ninguna)."""
+        number = self.number
+        holders = self.holders[value]
+        while holders and number.get(holders[0]) != value:
+            del holders[0]
+        return holders[0] if holders else None
+
+    def bind(self, name, value):
+        """`name` pasa a guardar el valor `value` (None: uno desconocido); sus campos pierden el suyo."""
+        if value is None:
+            self.number.pop(name, None)
+        else:
+            self.number[name] = value
+            holders = self.holders.get(value)
+            if holders is not None:
+                holders.append(name)
+        if is_temp(name):
+            return # Un temporal no tiene campos y las llamadas no lo cambian
+        self.users.append(name)
+        fields = self.fields
+        if fields:
+            for field in fields.pop(name, ()):
+                self.number.pop(field, None)
+        if '.' in name:
+            fields.setdefault(name[:name.index('.')], []).append(name)
+
+    def call(self):
+        """Una llamada pudo cambiar todo lo que no es un temporal."""
+        number = self.number
+        for name in self.users:
+            number.pop(name, None)
+        self.users = []
+        self.fields = {}
+
+def _int_literal(operand):
+    """Valor de un literal int (None si `operand` no es uno)."""
+    value = _constant(operand)
+    return value if type(value) is int else None
+
+def _beside(instr, value, commutative, integer):
+    """Operando int que acompaña al literal int `value` en 'a oper b' (None si no hay)."""
+    if _int_literal(instr.b) == value and integer(instr.a):
+        return instr.a
+    if commutative and _int_literal(instr.a) == value and integer(instr.b):
+        return instr.b
+    return None
+
+def _identity(value, commutative=False):
+    """Regla 'x oper value = x'."""
+    def rule(instr, integer):
+        x = _beside(instr, value, commutative, integer)
+        return None if x is None else Instr(Op.ASSIGN, instr.dest, x)
+    return rule
+
+def _absorbing(value, result, commutative=False):
+    """Regla 'x oper value = result'."""
+    def rule(instr, integer):
+        x = _beside(instr, value, commutative, integer)
+        return None if x is None else Instr(Op.ASSIGN, instr.dest, str(result))
+    return rule
+
+def _cancel(instr, integer):
+    """x - x = 0"""
+    if instr.a == instr.b and integer(instr.a):
+        return Instr(Op.ASSIGN, instr.dest, '0')
+    return None
+
+def _double(instr, integer):
+    """x * 2 = x + x"""
+    x = _beside(instr, 2, True, integer)
+    return None if x is None else Instr(Op.BINARY, instr.dest, x, '+', x)
+
+def _shift(instr, integer):
+    """x * 2^k = x << k (k >= 2)"""
+    for x, factor in ((instr.a, instr.b), (instr.b, instr.a)):
+        value = _int_literal(factor)
+        if value is not None and value > 2 and value & (value - 1) == 0 and integer(x):
+            return Instr(Op.BINARY, instr.dest, x, '<<', str(value.bit_length() - 1))
+    return None
+
+# Reglas de simplify_algebra por operador: (nombre, regla). Una regla recibe
+# 'x = a oper b' e `integer` (si un operando siempre vale un int) y devuelve la
+# instrucción que la reemplaza, o None. Se prueban en orden y se aplica la
+# primera. Solo valen con ints: con un decimal, x + 0 o x * 0 no siempre dan
+# x o 0 (-0.0, nan) y x + 0.0 ya no es un int.
+_ALGEBRA_RULES = {
+    '+': [('x + 0', _identity(0, commutative=True))],
+    '-': [('x - 0', _identity(0)), ('x - x', _cancel)],
+    '*': [('x * 1', _identity(1, commutative=True)), ('x * 0', _absorbing(0, 0, commutative=True)),
+          ('x * 2', _double), ('x * 2^k', _shift)],
+    '/': [('x / 1', _identity(1))],
+    '%': [('x % 1', _absorbing(1, 0))],
+}
+# Nombre de la multiplicación de una variable de inducción que se vuelve una suma (simplify_algebra)
+_INDUCTION_RULE = 'i * c en un ciclo'
+# Operaciones de dos ints que dan un int
+_INTEGER_OPERATORS = frozenset(('+', '-', '*', '/', '%', '<<'))
+
+def _step(instr):
+    """d si `instr` es 'i = i + d', 'i = d + i' o 'i = i - d' (-d) con d un literal int; si no, None."""
+    if instr.op != Op.BINARY:
+        return None
+    dest = instr.dest
+    if instr.oper == '+':
+        if instr.a == dest:
+            return _int_literal(instr.b)
+        if instr.b == dest:
+            return _int_literal(instr.a)
+    elif instr.oper == '-' and instr.a == dest:
+        step = _int_literal(instr.b)
+        return None if step is None else -step
+    return None
+
+# Pasos de los niveles -O2 y -O3, en el orden en que se repiten
+_FULL_PIPELINE = ('propagate_constants', 'remove_unreachable_code', 'eliminate_redundant_assignments',
+                  'eliminate_common_subexpressions', 'remove_unused_variables', 'hoist_loop_invariants',
+                  'simplify_algebra', 'simplify_jumps')
+
+# Nivel -O -> (pasos que se repiten hasta que una ronda no cambia nada, máximo de rondas, pasos del final).
+# recycle_temporaries va al final: los demás pasos suponen que cada temporal se asigna una sola vez.
+# -O2 hace una sola ronda: otra cuesta lo mismo que la primera y casi siempre solo confirma que no hay cambios.
+LEVELS = {
+    0: ((), 0, ()),
+    1: (('propagate_constants', 'remove_unreachable_code', 'remove_unused_variables'), 1, ('recycle_temporaries',)),
+    2: (_FULL_PIPELINE, 1, ('recycle_temporaries',)),
+    3: (_FULL_PIPELINE, 10, ('recycle_temporaries',)),
+}
+DEFAULT_LEVEL = 2
+
+# Paso que se salta si el atributo de Optimizer está en False
+_SWITCHES = {'hoist_loop_invariants': 'hoist_invariants', 'simplify_algebra': 'reduce_strength',
+             'simplify_jumps': 'arrange_jumps'}
+
+class PassRun:
+    """Una ejecución de un paso (Optimizer.report); `round` es 0 en los pasos del final."""
+    __slots__ = ('name', 'round', 'seconds', 'before', 'after', 'changes')
+
+    def __init__(self, name, round, seconds, before, after, changes):
+        self.name = name
+        self.round = round
+        self.seconds = seconds
+        self.before = before        # Instrucciones que recibió
+        self.after = after          # Instrucciones que dejó
+        self.changes = changes      # Instrucciones que quitó, agregó o reemplazó
+
+def _changes(old, new):
+    """Instrucciones que un paso quitó, agregó o reemplazó (las que no toca siguen siendo el mismo objeto)."""
+    if new is old:
+        return 0
+    kept = {id(instr) for instr in old}
+    added = sum(1 for instr in new if id(instr) not in kept)
+    return max(added, len(old) - (len(new) - added))
 
 class Optimizer:
-    def __init__(self, tac_code):
+    # Acortar saltos y ordenar los bloques (simplify_jumps); en False quedan en el orden del ICG
+    arrange_jumps = True
+    # Sacar de los ciclos los cálculos invariantes (hoist_loop_invariants)
+    hoist_invariants = True
+    # Simplificar operaciones con _ALGEBRA_RULES y las multiplicaciones de inducción (simplify_algebra)
+    reduce_strength = True
+
+    def __init__(self, tac_code, types=None, level=DEFAULT_LEVEL):
         self.code = tac_code
+        # Nivel de optimización: clave de LEVELS (-O0 ... -O3)
+        self.level = level
+        # Tipo declarado de cada variable (ICG.types); sin él solo se propagan constantes en temporales
+        self.types = types or {}
+        # Estadísticas de recycle_temporaries
+        self.temps_total = 0    # Temporales distintos que llegan al último paso
+        self.temps_peak = 0     # Máximo de temporales vivos a la vez (= nombres que quedan)
+        # Saltos condicionales que quitó simplify_jumps (llegaban a donde de todos modos seguía)
+        self.dropped_branches = 0
+        # Instrucciones que hoist_loop_invariants sacó de algún ciclo
+        self.hoisted = 0
+        # Veces que simplify_algebra aplicó cada regla: nombre -> cuántas
+        self.rules = {}
+        # Ejecuciones de los pasos en el último optimize (PassRun) y rondas que hizo
+        self.report = []
+        self.rounds = 0
+        self.converged = False  # True si la última ronda no cambió nada
+        # Funciones del último código optimizado: (código, [(instrucciones, CFG o None)])
+        self._functions_of = None
+        # CFG -> resultado de _loops (lo comparten los pasos mientras sus bloques no cambien)
+        self._loops_of = weakref.WeakKeyDictionary()
 
     def optimize(self):
-        # Aplicamos las optimizaciones en orden lógico
-        code = self.remove_unreachable_code(self.code)
-        code = self.eliminate_redundant_assignments(code)
-        code = self.eliminate_common_subexpressions(code)
-        code = self.remove_unused_variables(code)
+        """Aplica los pasos del nivel self.level (LEVELS) y anota cada ejecución en self.report.
+
+        Los pasos de la ronda se repiten mientras alguno cambie algo (lo que
+        deja un paso puede servirle a otro anterior, como las variables que
+        quedan sin usar tras eliminar subexpresiones) y hasta el máximo de
+        rondas del nivel; después se aplican los pasos del final.
+        """
+        passes, rounds, final = LEVELS[self.level]
+        passes = [name for name in passes if name not in _SWITCHES or getattr(self, _SWITCHES[name])]
+        self.report = []
+        self.rounds = 0
+        self.converged = False
+        code = self.code
+        with tac.building():
+            while self.rounds < rounds and not self.converged:
+                self.rounds += 1
+                changes = 0
+                for name in passes:
+                    code, changed = self._run(name, code, self.rounds)
+                    changes += changed
+                self.converged = changes == 0
+            for name in final:
+                code, _ = self._run(name, code, 0)
         return code
 
+    def _run(self, name, code, round):
+        """Aplica el paso `name` de PASSES: (código nuevo, cambios)."""
+        start = time.perf_counter()
+        optimized = PASSES[name](self, code)
+        seconds = time.perf_counter() - start
+        changes = _changes(code, optimized)
+        self.report.append(PassRun(name, round, seconds, len(code), len(optimized), changes))
+        return optimized, changes
+
+    def format_report(self):
+        """Líneas para mostrar self.report: una por ejecución de un paso y el resumen."""
+        if not self.report:
+            return [f"-O{self.level}: sin optimizar"]
+        lines = [f"{'PASO':<32} | {'RONDA':>5} | {'TIEMPO':>9} | {'ANTES':>6} | {'DESPUÉS':>7} | {'CAMBIOS':>7}"]
+        for run in self.report:
+            number = str(run.round) if run.round else 'final'
+            lines.append(f"{run.name:<32} | {number:>5} | {run.seconds * 1000:>7.2f}ms | {run.before:>6} | "
+                         f"{run.after:>7} | {run.changes:>7}")
+        total = sum(run.seconds for run in self.report)
+        state = 'punto fijo' if self.converged else 'límite de rondas'
+        rounds = f"{self.rounds} ronda" if self.rounds == 1 else f"{self.rounds} rondas"
+        lines.append(f"-O{self.level}: {rounds} ({state}), {total * 1000:.2f}ms")
+        return lines
+
+    def functions(self, code, graphs=True):
+        """Cada función de `code` con su CFG (o None, sin graphs, si hay que construirlo).
+
+        Si `code` es el resultado del paso anterior, se reutilizan los grafos
+        de las funciones cuyos bloques no cambiaron.
+        """
+        if self._functions_of is not None and self._functions_of[0] is code:
+            pieces = self._functions_of[1]
+        else:
+            pieces = [(code[start:end], None) for start, end in cfg.functions(code)]
+        result = []
+        for part, graph in pieces:
+            if graph is not None:
+                graph.code = part
+            elif graphs:
+                graph = cfg.CFG(part)
+            result.append((part, graph))
+        return result
+
+    def _join(self, pieces):
+        """Une las funciones que deja un paso; guarda los grafos (None donde cambiaron los bloques)."""
+        code = []
+        for part, _ in pieces:
+            code.extend(part)
+        self._functions_of = (code, pieces)
+        return code
+
+    def propagate_constants(self, code):
+        """Reemplaza las variables con valor constante por su valor y calcula lo que se puede.
+
+        Una variable vale una constante si todas sus asignaciones que llegan
+        guardan esa misma constante; una variable que no es temporal, solo si
+        es int o bool (el valor se convierte como al guardarlo en C++). Las
+        operaciones con constantes se vuelven asignaciones y los saltos
+        condicionales con constantes se vuelven un goto o desaparecen, para
+        que remove_unreachable_code quite la rama que ya no se toma.
+
+        Primero se recorre cada función sin pasar valores de un bloque a
+        otro; si alguna variable que puede ser constante se lee en un bloque
+        distinto del que la asigna, se recorre de nuevo por bloques en
+        postorden inverso con cfg.ReachingDefinitions (una asignación que
+        llega por un ciclo y aún no se ha visto no es constante).
+        """
+        pieces = []
+        constants = {}          # Operando -> valor del literal, compartido entre funciones
+        for part, graph in self.functions(code, graphs=False):
+            folder = _Folder(self.types, constants, collect=True)
+            optimized = []
+            for i, instr in enumerate(part):
+                op = instr.op
+                if op == Op.LABEL:
+                    folder.start(0)
+                optimized.append(folder.fold(i, instr))
+                if op in JUMPS or op == Op.RETURN:
+                    folder.start(0) # Los mismos bloques que el CFG del segundo recorrido
+            names = folder.foldable_names()
+            if names:
+                if graph is None:
+                    graph = cfg.CFG(part)
+                reaching = cfg.ReachingDefinitions(graph, names=names)
+                folder = _Folder(self.types, constants, reaching)
+                optimized = list(part)
+                for number in graph.order():
+                    block = graph.blocks[number]
+                    folder.start(reaching.reach_in[number])
+                    for i in range(block.start, block.end):
+                        optimized[i] = folder.fold(i, part[i])
+            if folder.jumps:
+                pieces.append(([instr for instr in optimized if instr is not None], None))
+            else:
+                # Cada instrucción se reemplazó por una sola que no salta: los bloques no cambian
+                pieces.append((optimized, graph))
+        return self._join(pieces)
+
     def remove_unreachable_code(self, code):
-        """Elimina instrucciones después de un 'goto' o 'return' hasta encontrar la siguiente etiqueta."""
-        optimized = []
-        is_dead = False
-        
-        for line in code:
-            stripped_line = line.strip()
-            
-            if stripped_line.endswith(':'):
-                is_dead = False
-            
-            if not is_dead:
-                optimized.append(line)
-            
-            if stripped_line.startswith('goto ') or stripped_line.startswith('return ') or stripped_line == 'return':
-                is_dead = True
-                
-        return optimized
+        """Elimina los bloques a los que no se llega desde el inicio de su función."""
+        pieces = []
+        for part, graph in self.functions(code):
+            graph.order()
+            reachable = graph.reachable
+            if all(reachable):
+                pieces.append((part, graph))
+                continue
+            optimized = []
+            for block in graph.blocks:
+                if reachable[block.index]:
+                    optimized.extend(part[block.start:block.end])
+            pieces.append((optimized, None))
+        return self._join(pieces)
 
     def eliminate_redundant_assignments(self, code):
         """Elimina reasignaciones inmediatas a la misma variable (temp = a; temp = b)."""
-        optimized = []
-        last_assigned_var = None
-        
-        for i, line in enumerate(code):
-            match = re.match(r'^\s*([a-zA-Z0-9_]+)\s*=\s*(.+)$', line)
-            if match and not line.strip().startswith('if '):
-                var_name = match.group(1)
-                
-                # Miramos la siguiente línea para ver si se sobreescribe inmediatamente
-                if i + 1 < len(code):
-                    next_match = re.match(r'^\s*([a-zA-Z0-9_]+)\s*=\s*(.+)$', code[i+1])
-                    if next_match and next_match.group(1) == var_name:
+        pieces = []
+        for part, graph in self.functions(code, graphs=False):
+            optimized = []
+            last = len(part) - 1
+
+            for i, instr in enumerate(part):
+                if instr.op in ASSIGNS and i < last:
+                    # Miramos la siguiente instrucción para ver si se sobreescribe inmediatamente
+                    following = part[i + 1]
+                    dest = instr.dest
+                    if (following.op in ASSIGNS and following.dest == dest
+                            and following.a != dest and following.b != dest):
                         continue # Saltamos esta instrucción porque es redundante
-                        
-                last_assigned_var = var_name
-            optimized.append(line)
-        return optimized
+                optimized.append(instr)
+            pieces.append((optimized, graph if len(optimized) == len(part) else None))
+        return self._join(pieces)
 
     def eliminate_common_subexpressions(self, code):
-        """Reutiliza cálculos previos si los operandos no han cambiado (t1 = a+b; t2 = a+b)."""
-        optimized = []
-        expressions = {} # Guarda { 'a + b': 't1' }
-        
-        for line in code:
-            # Buscamos asignaciones de operaciones: t1 = a + b
-            match = re.match(r'^\s*([a-zA-Z0-9_]+)\s*=\s*([a-zA-Z0-9_]+\s*[\+\-\*\/]\s*[a-zA-Z0-9_]+)$', line)
-            if match:
-                var_name = match.group(1)
-                expr = match.group(2).strip()
-                
-                if expr in expressions:
-                    # Si ya calculamos esto, reasignamos la variable al temporal anterior
-                    prev_var = expressions[expr]
-                    optimized.append(f"    {var_name} = {prev_var}")
+        """Reutiliza cálculos previos si los operandos no han cambiado (t1 = a+b; t2 = b+a).
+
+        Dentro de un bloque se numeran los valores (_ValueNumbers); al inicio
+        de cada bloque se parte de las expresiones que están disponibles en
+        todos los caminos que llegan a él (cfg.AvailableExpressions).
+        """
+        pieces = []
+        values = _ValueNumbers(self.types)
+        for part, graph in self.functions(code, graphs=False):
+            shared = cfg.shared_expressions(part)
+            starts = None
+            if shared:
+                # Expresiones al inicio de cada bloque con lo que llega de los bloques anteriores
+                if graph is None:
+                    graph = cfg.CFG(part)
+                available = cfg.AvailableExpressions(graph, shared)
+                starts = {block.start: available.at_start(block) for block in graph.blocks}
+            values.start({})
+            optimized = []
+            for i, instr in enumerate(part):
+                op = instr.op
+                if starts is not None:
+                    if i in starts:
+                        values.start(starts[i])
+                elif op == Op.LABEL:
+                    # Ninguna expresión llega calculada de otro bloque
+                    values.start({})
+                # Buscamos asignaciones de operaciones: t1 = a + b
+                if op == Op.BINARY and instr.oper in cfg.EXPRESSION_OPERATORS:
+                    key = values.key(instr.a, instr.oper, instr.b)
+                    value = values.expressions.get(key)
+                    if value is None:
+                        value = values.new(key[0] in values.numeric and key[2] in values.numeric)
+                        values.expressions[key] = value
+                    else:
+                        holder = values.holder(value)
+                        if holder is not None:
+                            # Si ya calculamos esto, reasignamos la variable al operando que lo guarda
+                            instr = Instr(Op.ASSIGN, instr.dest, holder)
+                    values.bind(instr.dest, value)
+                elif op == Op.ASSIGN:
+                    values.bind(instr.dest, values.value(instr.a))
+                elif op == Op.CALL:
+                    values.call()
+                elif op in ASSIGNS:
+                    values.bind(instr.dest, None)
+                optimized.append(instr)
+            # Cada instrucción se reemplaza por una sola: los bloques no cambian
+            pieces.append((optimized, graph))
+
+        return self._join(pieces)
+
+    def remove_unused_variables(self, code):
+        """Elimina asignaciones cuyo valor no se lee en ningún camino antes de volver a asignarse.
+
+        Cada bloque se recorre de atrás hacia adelante a partir de las
+        variables vivas al final (cfg.Liveness). Las variables que se leen en
+        otra función se consideran leídas al salir y en cada llamada.
+        """
+        functions = self.functions(code)
+        reads_of = [[cfg.uses(instr) for instr in part] for part, _ in functions]
+        # Variables (no temporales) que se leen en alguna parte del programa
+        observed = {name for reads in reads_of for names in reads for name in names}
+        observed = {name for name in observed if not is_temp(name)}
+        pieces = []
+        for (part, graph), reads in zip(functions, reads_of):
+            liveness = cfg.Liveness(graph, observed, reads)
+            index = liveness.index
+            dead = bytearray(len(part))
+            for block in graph.blocks:
+                # Vivas: bits de las variables del análisis y un conjunto con las que solo se leen en el bloque
+                live = liveness.live_out[block.index]
+                local = set()
+                for i in range(block.end - 1, block.start - 1, -1):
+                    instr = part[i]
+                    op = instr.op
+                    if op in ASSIGNS:
+                        var_name = instr.dest
+                        k = index.get(var_name)
+                        if k is None:
+                            is_live = var_name in local
+                            local.discard(var_name)
+                        else:
+                            is_live = live >> k & 1
+                            live &= ~(1 << k)
+                        # No eliminamos variables clave como 'result' u 'obj'
+                        if not is_live and not var_name.startswith('result') and var_name != 'obj':
+                            dead[i] = 1 # Es código muerto, lo saltamos
+                            continue
+                    elif op == Op.CALL:
+                        k = index.get('return_value')
+                        if k is None:
+                            local.discard('return_value')
+                        else:
+                            live &= ~(1 << k)
+                        live |= liveness.user_mask
+                    for name in reads[i]:
+                        k = index.get(name)
+                        if k is None:
+                            local.add(name)
+                        else:
+                            live |= 1 << k
+            if any(dead):
+                pieces.append(([instr for instr, is_dead in zip(part, dead) if not is_dead], None))
+            else:
+                pieces.append((part, graph))
+
+        return self._join(pieces)
+
+    def hoist_loop_invariants(self, code):
+        """Saca de cada ciclo los cálculos que dan lo mismo en todas las vueltas.
+
+        Los ciclos son los naturales del CFG (cfg.natural_loops), de afuera
+        hacia adentro. Una instrucción 'x = a', 'x = oper a' o 'x = a oper b'
+        del ciclo sale si:
+        - sus operandos no se asignan en el ciclo (o solo en instrucciones
+          que ya salieron) y, si en el ciclo hay llamadas, son temporales;
+        - es la única asignación de x en el ciclo, x no está viva al entrar a
+          la cabecera y su bloque está en todos los caminos que salen del
+          ciclo o x no está viva al salir (x no puede ser un campo, ni una
+          variable que no es temporal si hay llamadas);
+        - no puede fallar: '/' y '%' solo con un divisor literal distinto de 0.
+        Las que salen van, en el orden en que se encontraron, a un bloque
+        nuevo justo antes de la cabecera (el preheader); los saltos que
+        llegan a la cabecera desde fuera del ciclo van ahora a él.
+        """
+        fresh = self._fresh_labels(code)
+        observed = None
+        pieces = []
+        for part, graph in self.functions(code):
+            loops, dominated = self._loops(graph)
+            if not loops:
+                pieces.append((part, graph))
+                continue
+            analyses = []
+            def liveness():
+                """Vida de las variables de la función; se calcula si alguna instrucción puede salir."""
+                nonlocal observed
+                if not analyses:
+                    if observed is None:
+                        # Variables (no temporales) que se leen en alguna parte del programa
+                        observed = {name for instr in code for name in cfg.uses(instr) if not is_temp(name)}
+                    analyses.append(cfg.Liveness(graph, observed))
+                return analyses[0]
+            position = {b: k for k, b in enumerate(graph.order())}
+            hoisted = set()
+            inserts = {}            # Inicio de una cabecera -> preheader
+            replaced = {}           # Posición de un salto que entraba al ciclo -> salto al preheader
+            for loop in loops:
+                moved = self._loop_invariants(part, graph, loop, liveness, dominated, position, hoisted)
+                if not moved:
+                    continue
+                self.hoisted += len(moved)
+                inserts[graph.blocks[loop.header].start] = self._preheader(part, graph, loop, [part[i] for i in moved],
+                                                                     replaced, fresh)
+            if not inserts:
+                pieces.append((part, graph))
+                continue
+            result = []
+            for i, instr in enumerate(part):
+                if i in inserts:
+                    result.extend(inserts[i])
+                if i not in hoisted:
+                    result.append(replaced.get(i, instr))
+            pieces.append((result, None))
+        return self._join(pieces)
+
+    def _loop_invariants(self, part, graph, loop, liveness, dominated, position, hoisted):
+        """Posiciones de las instrucciones que pueden salir de `loop`, en un orden en que se pueden calcular.
+
+        `liveness()` da la vida de las variables de la función. `hoisted`
+        tiene las que ya salieron de un ciclo de afuera (ya no cuentan como
+        parte de este); se le agregan las que se encuentran.
+        """
+        blocks = graph.blocks
+        order = sorted(loop.blocks, key=position.__getitem__)
+        # Asignaciones que quedan en el ciclo: variable -> cuántas
+        assigned = {}
+        calls = False
+        for b in order:
+            for i in range(blocks[b].start, blocks[b].end):
+                instr = part[i]
+                if i in hoisted or (instr.op not in ASSIGNS and instr.op != Op.CALL):
+                    continue
+                calls = calls or instr.op == Op.CALL
+                dest = cfg.defines(instr)
+                assigned[dest] = assigned.get(dest, 0) + 1
+        # Bloques desde los que se sale del ciclo (también con return)
+        exiting = [b for b in order if b in graph.exits or any(s not in loop.blocks for s in blocks[b].succs)]
+        index = None
+
+        found = []
+        changed = True
+        while changed:
+            changed = False
+            for b in order:
+                # Lo que se calcula aquí llega a todas las salidas del ciclo
+                always = all(dominated[e] >> b & 1 for e in exiting)
+                for i in range(blocks[b].start, blocks[b].end):
+                    instr = part[i]
+                    if instr.op not in _HOISTABLE or i in hoisted:
+                        continue
+                    dest = instr.dest
+                    if assigned[dest] != 1 or '.' in dest or (calls and not is_temp(dest)):
+                        continue
+                    if instr.oper in _FAILING and _constant(instr.b) in (None, 0):
+                        continue
+                    if any(assigned.get(name) or (calls and not is_temp(name)) for name in cfg.uses(instr)):
+                        continue
+                    if index is None:
+                        # Variables vivas al entrar a la cabecera y al salir del ciclo
+                        analysis = liveness()
+                        index = analysis.index
+                        live_in = analysis.live_in[loop.header]
+                        live_out = 0
+                        for e in exiting:
+                            for s in blocks[e].succs:
+                                if s not in loop.blocks:
+                                    live_out |= analysis.live_in[s]
+                            if e in graph.exits:
+                                live_out |= analysis.user_mask
+                    k = index.get(dest)
+                    if k is not None and (live_in >> k & 1 or not always and live_out >> k & 1):
+                        continue
+                    hoisted.add(i)
+                    found.append(i)
+                    assigned[dest] = 0 # Ya no se asigna en el ciclo
+                    changed = True
+        return found
+
+    def _loops(self, graph):
+        """Ciclos naturales de la función que pueden tener un preheader, de afuera hacia adentro, y los dominadores.
+
+        Se descartan los ciclos a los que no se entra desde fuera (no hay
+        dónde poner el preheader) y los que empiezan en la entrada.
+        """
+        found = self._loops_of.get(graph)
+        if found is not None:
+            return found
+        blocks = graph.blocks
+        # Todo ciclo tiene una arista hacia un bloque anterior o hacia el mismo
+        if not any(s <= block.index for block in blocks for s in block.succs):
+            found = [], None
+        else:
+            dominated = cfg.dominators(graph)
+            reachable = graph.reachable
+            loops = [loop for loop in cfg.natural_loops(graph, dominated) if loop.header != 0
+                     and any(p not in loop.blocks and reachable[p] for p in blocks[loop.header].preds)]
+            found = loops, dominated
+        self._loops_of[graph] = found
+        return found
+
+    def _preheader(self, part, graph, loop, code, replaced, fresh):
+        """Instrucciones que van justo antes de la cabecera de `loop` para ejecutar `code` una vez al entrar.
+
+        Los saltos que llegan a la cabecera desde fuera del ciclo pasan a
+        una etiqueta nueva al inicio (se guardan en `replaced`: posición ->
+        salto nuevo); si el bloque anterior es del ciclo y sigue a la
+        cabecera sin saltar, se le agrega un goto.
+        """
+        blocks = graph.blocks
+        header = blocks[loop.header]
+        entries = set()     # Etiquetas de la cabecera
+        i = header.start
+        while part[i].op == Op.LABEL:
+            entries.add(part[i].label)
+            i += 1
+        preheader = []
+        before = loop.header - 1
+        if before in loop.blocks and part[blocks[before].end - 1].op not in cfg.ENDS:
+            preheader.append(Instr(Op.GOTO, label=part[header.start].label))
+        label = None
+        for p in header.preds:
+            if p in loop.blocks or not graph.reachable[p]:
+                continue
+            end = blocks[p].end - 1
+            jump = replaced.get(end, part[end])
+            if not entries.intersection(jump_targets(jump)):
+                continue
+            if label is None:
+                label = next(fresh)
+                preheader.append(Instr(Op.LABEL, label=label))
+            if jump.op == Op.JUMP_TABLE:
+                targets = tuple([label if target in entries else target for target in jump.label])
+            else:
+                targets = label
+            replaced[end] = Instr(jump.op, jump.dest, jump.a, jump.oper, jump.b, targets)
+        preheader.extend(code)
+        return preheader
+
+    def _fresh_labels(self, code):
+        """Etiquetas que no están en `code`: siguen la numeración L1, L2, ... del ICG.
+
+        `code` se revisa al pedir la primera.
+        """
+        last = max((int(instr.label[1:]) for instr in code if instr.op == Op.LABEL
+                    and instr.label[:1] == 'L' and instr.label[1:].isdigit()), default=0)
+        for n in itertools.count(last + 1):
+            yield f"L{n}"
+
+    def simplify_algebra(self, code):
+        """Reemplaza operaciones por otras más simples con las reglas de _ALGEBRA_RULES.
+
+        Antes, en cada ciclo, 't = i * c' con c un literal y con i una
+        variable de inducción (en el ciclo solo cambia con 'i = i + d' o
+        'i = i - d') pasa a ser 't = s': s es un temporal nuevo que vale
+        i * c desde el preheader y al que se le suma d * c después de cada
+        cambio de i. Si t solo se lee después en el mismo bloque, antes de que
+        i cambie, esas lecturas usan s directamente.
+        self.rules cuenta las veces que se aplicó cada regla.
+        """
+        labels = self._fresh_labels(code)
+        temps = self._fresh_temps(code)
+        rules = self.rules
+        pieces = []
+        for part, graph in self.functions(code):
+            integer = self._integers(part)
+            loops, _ = self._loops(graph)
+            if loops:
+                reduced = self._reduce_induction(part, graph, loops, integer, labels, temps)
+                if reduced is not part:
+                    part, graph = reduced, None
+            simplified = []
+            for instr in part:
+                if instr.op == Op.BINARY:
+                    for name, rule in _ALGEBRA_RULES.get(instr.oper, ()):
+                        new = rule(instr, integer)
+                        if new is not None:
+                            rules[name] = rules.get(name, 0) + 1
+                            instr = new
+                            break
+                simplified.append(instr)
+            # Cada instrucción se reemplaza por una sola: los bloques no cambian
+            pieces.append((simplified, graph))
+        return self._join(pieces)
+
+    def _integers(self, part):
+        """Función que dice si un operando de `part` siempre vale un int.
+
+        Son ints los literales int, las variables declaradas int y los
+        temporales que solo se asignan con copias, '-' u operaciones de
+        _INTEGER_OPERATORS de ints. Se empieza suponiendo que todos los
+        temporales lo son y se descartan los que tienen una asignación que
+        no, hasta que no cambia (así valen también las sumas de un ciclo,
+        como 's = s + 8').
+        """
+        types = self.types
+        temps = set()
+        rejected = set()
+        sources = {}            # Temporal -> operandos de sus asignaciones
+        for instr in part:
+            dest = instr.dest
+            if instr.op not in ASSIGNS or not is_temp(dest) or dest in rejected:
+                continue
+            op = instr.op
+            if op == Op.BINARY and instr.oper in _INTEGER_OPERATORS:
+                operands = (instr.a, instr.b)
+            elif op == Op.ASSIGN or (op == Op.UNARY and instr.oper == '-'):
+                operands = (instr.a,)
+            else:
+                temps.discard(dest)
+                rejected.add(dest)
+                continue
+            temps.add(dest)
+            sources.setdefault(dest, []).extend(operands)
+
+        def integer(operand):
+            if operand in temps:
+                return True
+            first = operand[0]
+            if first.isalpha() or first == '_':
+                return types.get(operand) == 'int'
+            return _int_literal(operand) is not None
+
+        readers = {}
+        pending = []
+        for dest in temps:
+            for operand in sources[dest]:
+                if operand in temps:
+                    readers.setdefault(operand, []).append(dest)
+                elif not integer(operand):
+                    pending.append(dest)
+        while pending:
+            dest = pending.pop()
+            if dest in temps:
+                temps.remove(dest)
+                pending.extend(readers.get(dest, ()))
+        return integer
+
+    def _reduce_induction(self, part, graph, loops, integer, labels, temps):
+        """Paso 1 de simplify_algebra: las multiplicaciones de una variable de inducción pasan a ser sumas.
+
+        Devuelve el código (`part` si nada cambia).
+        """
+        blocks = graph.blocks
+        reduced = set()         # Multiplicaciones ya reemplazadas (en un ciclo de afuera)
+        before = {}             # Inicio de una cabecera -> preheader
+        after = {}              # Posición de un cambio de i -> sumas que van después
+        replaced = {}           # Posición -> instrucción nueva (None: se quita)
+        reads = None            # Temporal -> cuántas veces se lee en la función
+        for loop in loops:
+            steps = {}          # Variable -> [(posición, d)] de sus cambios (None: otra asignación)
+            products = []
+            calls = False
+            for b in loop.blocks:
+                end = blocks[b].end
+                for i in range(blocks[b].start, end):
+                    instr = part[i]
+                    if instr.op == Op.CALL:
+                        calls = True
+                    if instr.op not in ASSIGNS:
+                        continue
+                    step = _step(instr)
+                    if step is None:
+                        steps[instr.dest] = None
+                    elif steps.get(instr.dest, ()) is not None:
+                        steps.setdefault(instr.dest, []).append((i, step))
+                    if instr.op == Op.BINARY and instr.oper == '*' and i not in reduced:
+                        products.append((i, end))
+            sums = {}           # (i, c) -> temporal con i * c
+            for i, end in sorted(products):
+                instr = part[i]
+                for variable, factor in ((instr.a, instr.b), (instr.b, instr.a)):
+                    c = _int_literal(factor)
+                    if (c is None or c in (0, 1) or not steps.get(variable) or not integer(variable)
+                            or '.' in variable or (calls and not is_temp(variable))):
+                        continue
+                    key = (variable, c)
+                    if key not in sums:
+                        sums[key] = next(temps)
+                    s = sums[key]
+                    reduced.add(i)
+                    self.rules[_INDUCTION_RULE] = self.rules.get(_INDUCTION_RULE, 0) + 1
+                    replaced[i] = Instr(Op.ASSIGN, instr.dest, s)
+                    # Si t solo se lee en el resto del bloque, antes de que cambien i o t, se lee s
+                    dest = instr.dest
+                    if is_temp(dest):
+                        if reads is None:
+                            reads = {}
+                            for other in part:
+                                for name in cfg.uses(other):
+                                    reads[name] = reads.get(name, 0) + 1
+                        changes = {position for position, _ in steps[variable]}
+                        window = []
+                        for j in range(i + 1, end):
+                            if j in changes:
+                                break
+                            if dest in cfg.uses(part[j]):
+                                window.append(j)
+                            if cfg.defines(part[j]) == dest:
+                                break
+                        if window and len(window) == reads.get(dest, 0):
+                            replaced[i] = None
+                            for j in window:
+                                use = replaced.get(j, part[j])
+                                replaced[j] = Instr(use.op, use.dest, s if use.a == dest else use.a, use.oper,
+                                                    s if use.b == dest else use.b, use.label)
+                    break
+            if not sums:
+                continue
+            for (variable, c), s in sums.items():
+                for position, step in steps[variable]:
+                    after.setdefault(position, []).append(Instr(Op.BINARY, s, s, '+', str(_int32(step * c))))
+            start = blocks[loop.header].start
+            code = [Instr(Op.BINARY, s, variable, '*', str(c)) for (variable, c), s in sums.items()]
+            before[start] = self._preheader(part, graph, loop, code, replaced, labels)
+        if not before:
+            return part
+        result = []
+        for i, instr in enumerate(part):
+            if i in before:
+                result.extend(before[i])
+            instr = replaced.get(i, instr)
+            if instr is not None:
+                result.append(instr)
+            if i in after:
+                result.extend(after[i])
+        return result
+
+    def _fresh_temps(self, code):
+        """Temporales que no están en `code`: siguen la numeración del ICG (tac.temp_name).
+
+        `code` se revisa al pedir el primero.
+        """
+        last = max((tac.temp_number(instr.dest) for instr in code if instr.op in ASSIGNS and is_temp(instr.dest)),
+                   default=0)
+        for n in itertools.count(last + 1):
+            yield tac.temp_name(n)
+
+    def simplify_jumps(self, code):
+        """Acorta los saltos, quita los bloques y etiquetas que sobran y ordena los bloques.
+
+        1. Un salto a un bloque que solo tiene etiquetas y un goto va directo
+           al destino final de ese goto; un salto condicional que llega a
+           donde de todos modos sigue desaparece.
+        2. Se quitan los bloques a los que ya no se llega desde la entrada.
+        3. Los bloques que siguen uno al otro sin salto forman cadenas que no
+           se separan. Después de una cadena que termina en 'goto L' va la
+           cadena que empieza en L, si no se colocó antes, y el goto
+           desaparece. Un goto que queda hacia un bloque que solo prueba una
+           condición (la prueba de un while o un for) se reemplaza por esa
+           prueba, para que cada vuelta del ciclo haga un solo salto.
+        4. Se quitan las etiquetas a las que no salta nadie (no las de entrada de los métodos).
+        5. Si desapareció algún salto condicional, lo que calculaba su
+           condición ya no se usa: se quita con remove_unused_variables.
+        """
+        dropped = self.dropped_branches
+        fresh = self._fresh_labels(code)
+        pieces = []
+        for part, graph in self.functions(code):
+            if not part:
+                # Un tramo sin instrucciones (el código global, si se quitó todo) no tiene bloques que ordenar
+                pieces.append((part, graph))
+                continue
+            threaded, moved = self._thread_jumps(part, graph)
+            if moved:
+                graph = cfg.CFG(threaded)
+            else:
+                graph.code = threaded # Solo cambiaron etiquetas del mismo bloque
+            graph.order()
+            if not all(graph.reachable):
+                threaded = [instr for block in graph.blocks if graph.reachable[block.index]
+                            for instr in threaded[block.start:block.end]]
+                graph = cfg.CFG(threaded)
+            arranged = self._arrange_blocks(threaded, graph, fresh)
+            pieces.append((arranged, graph if arranged is part else None))
+
+        # 4. Etiquetas sin saltos (un salto puede venir de otra función)
+        referenced = set()
+        for part, _ in pieces:
+            for instr in part:
+                if instr.op in JUMPS:
+                    referenced.update(jump_targets(instr))
+        for k, (part, graph) in enumerate(pieces):
+            unused = [instr for instr in part
+                      if instr.op == Op.LABEL and instr.a is None and instr.label not in referenced]
+            if unused:
+                pieces[k] = ([instr for instr in part if instr.op != Op.LABEL or instr.a is not None
+                              or instr.label in referenced], None)
+        code = self._join(pieces)
+        if self.dropped_branches > dropped:
+            code = self.remove_unused_variables(code)
+        return code
+
+    def _thread_jumps(self, part, graph):
+        """Paso 1 de simplify_jumps: cada salto va al destino final.
+
+        Devuelve el código (`part` si nada cambia) y si algún salto cambió de bloque o desapareció.
+        """
+        blocks = graph.blocks
+        labels = graph.labels
+        first_label = [part[block.start].label if part[block.start].op == Op.LABEL else None
+                       for block in blocks]
+        # Bloque al que lleva un bloque que solo tiene etiquetas y un goto
+        forward = [None] * len(blocks)
+        for block in blocks:
+            last = part[block.end - 1]
+            # Las etiquetas solo van al inicio del bloque (después de los comentarios del método)
+            if (last.op == Op.GOTO and last.label in labels
+                    and (block.end - 1 == block.start or part[block.end - 2].op == Op.LABEL)):
+                forward[block.index] = labels[last.label]
+        final = list(range(len(blocks)))
+        for b, ahead in enumerate(forward):
+            if ahead is not None:
+                seen = {b}
+                while forward[ahead] is not None and ahead not in seen:
+                    seen.add(ahead) # Un ciclo de gotos se deja como está
+                    ahead = forward[ahead]
+                final[b] = ahead
+
+        def target(label):
+            b = labels.get(label)
+            return label if b is None else first_label[final[b]]
+
+        # Los saltos son siempre la última instrucción de su bloque
+        replaced = {}               # Posición -> salto nuevo (None: se quita)
+        moved = False
+        for block in blocks:
+            i = block.end - 1
+            instr = part[i]
+            op = instr.op
+            if op not in JUMPS:
+                continue
+            if op == Op.JUMP_TABLE:
+                label = tuple([target(label) for label in instr.label])
+            else:
+                label = target(instr.label)
+            if (op in BRANCHES and block.index + 1 < len(blocks)
+                    and labels.get(label) == final[block.index + 1]):
+                replaced[i] = None # Salta a donde de todos modos sigue
+                self.dropped_branches += 1
+                moved = True
+            elif label != instr.label:
+                if op == Op.JUMP_TABLE:
+                    moved = moved or any(labels.get(new) != labels.get(old) for new, old in zip(label, instr.label))
                 else:
-                    expressions[expr] = var_name
-                    optimized.append(line)
+                    moved = moved or labels.get(label) != labels.get(instr.label)
+                replaced[i] = Instr(op, instr.dest, instr.a, instr.oper, instr.b, label)
+        if not replaced:
+            return part, False
+        threaded = []
+        for i, instr in enumerate(part):
+            instr = replaced.get(i, instr)
+            if instr is not None:
+                threaded.append(instr)
+        return threaded, moved
+
+    def _arrange_blocks(self, part, graph, fresh):
+        """Paso 3 de simplify_jumps: orden de las cadenas de bloques (devuelve `part` si nada cambia).
+
+        `fresh` da nombres de etiqueta libres para el bloque al que salta la prueba copiada de un ciclo.
+        """
+        blocks = graph.blocks
+        labels = graph.labels
+        ends = cfg.ENDS
+        # Cadenas: bloques que se siguen sin salto; la que llega al final de la función queda al final
+        chains, chain_of = [], []
+        for block in blocks:
+            if block.index == 0 or part[block.start - 1].op in ends:
+                chains.append([])
+            chain_of.append(len(chains) - 1)
+            chains[-1].append(block.index)
+        tail = len(chains) - 1 if part[-1].op not in ends else None
+
+        def ending(c):
+            """Salto con el que termina la cadena c y el bloque al que lleva (None si no es un goto de la función)."""
+            last = part[blocks[chains[c][-1]].end - 1]
+            if last.op == Op.GOTO and last.label in labels:
+                return last, labels[last.label]
+            return None, None
+
+        def lone_test(b):
+            """Salto condicional del bloque b si solo tiene etiquetas y esa prueba (None si no)."""
+            block = blocks[b]
+            test = part[block.end - 1]
+            if (test.op in BRANCHES and test.label in labels and b + 1 < len(blocks)
+                    and (block.end - 1 == block.start or part[block.end - 2].op == Op.LABEL)):
+                return test
+            return None
+
+        def heads(b, placed):
+            """Índice de la cadena que empieza en el bloque b, si todavía se puede colocar."""
+            c = chain_of[b]
+            if chains[c][0] == b and not placed[c] and c != tail:
+                return c
+            return None
+
+        # Orden: después de un goto, la cadena a la que salta; si no, la siguiente del código
+        placed = bytearray(len(chains))
+        order = []
+        inverted = set()            # Cadenas que terminan en 'if c goto L1; goto L2' con L1 a continuación
+        following = 0
+        current = 0
+        while current is not None:
+            placed[current] = 1
+            order.append(current)
+            jump, target = ending(current)
+            nxt = None
+            if jump is not None:
+                nxt = heads(target, placed)
+                test = lone_test(target) if nxt is None else None
+                if test is not None:
+                    # Goto a la prueba de un ciclo: sigue la salida, para copiar la prueba invertida
+                    nxt = heads(labels[test.label], placed)
+                    if nxt is None:
+                        nxt = heads(target + 1, placed)
+                last_block = blocks[chains[current][-1]]
+                if nxt is None and last_block.end - last_block.start == 1 and len(chains[current]) > 1:
+                    branch = part[last_block.start - 1]
+                    if branch.op in BRANCHES and branch.label in labels:
+                        nxt = heads(labels[branch.label], placed)
+                        if nxt is not None:
+                            inverted.add(current)
+            if nxt is None:
+                while following < len(chains) and placed[following]:
+                    following += 1
+                nxt = following if following < len(chains) else None
+            current = nxt
+
+        # Cómo termina cada cadena según la que va después
+        rewrite = {}                # Posición -> instrucción que la reemplaza (None: se quita)
+        added = {}                  # Bloque -> etiqueta nueva al inicio
+        for position, c in enumerate(order):
+            jump, target = ending(c)
+            if jump is None:
+                continue
+            end = blocks[chains[c][-1]].end - 1
+            after = chains[order[position + 1]][0] if position + 1 < len(order) else None
+            if target == after:
+                rewrite[end] = None
+            elif c in inverted:
+                branch = part[end - 1]
+                rewrite[end - 1] = negated(branch, jump.label)
+                rewrite[end] = None
             else:
-                optimized.append(line)
-                
-            # Si una variable base se modifica, invalida las expresiones cacheadas (simplificado)
-            assign_match = re.match(r'^\s*([a-zA-Z0-9_]+)\s*=', line)
-            if assign_match and not line.strip().startswith('if '):
-                mod_var = assign_match.group(1)
-                # Borrar expresiones que contengan la variable modificada
-                expressions = {k: v for k, v in expressions.items() if mod_var not in k}
-                
+                # Goto a un bloque que solo prueba una condición: se copia la prueba
+                test = lone_test(target)
+                if test is None:
+                    continue
+                if labels[test.label] == after:
+                    continuation = target + 1
+                    first = part[blocks[continuation].start]
+                    if first.op == Op.LABEL:
+                        label = first.label
+                    else:
+                        label = added.setdefault(continuation, next(fresh))
+                    rewrite[end] = negated(test, label)
+                elif target + 1 == after:
+                    rewrite[end] = Instr(test.op, test.dest, test.a, test.oper, test.b, test.label)
+        if not rewrite and order == sorted(order):
+            return part
+
+        # Solo cambia la última instrucción de algunos bloques
+        arranged = []
+        for c in order:
+            for b in chains[c]:
+                block = blocks[b]
+                if b in added:
+                    arranged.append(Instr(Op.LABEL, label=added[b]))
+                last = block.end - 1
+                arranged.extend(part[block.start:last])
+                instr = rewrite.get(last, part[last])
+                if instr is not None:
+                    arranged.append(instr)
+        return arranged
+
+    def recycle_temporaries(self, code):
+        """Reutiliza el nombre de un temporal (y su dirección en memoria) cuando ya está muerto.
+
+        Cada temporal vive desde su asignación hasta su último uso en el orden
+        del código; si está vivo al inicio o al final de un bloque
+        (cfg.Liveness), el rango se extiende hasta ese punto, como en un ciclo
+        cuyo valor tiene que sobrevivir a las demás vueltas. Después se
+        asignan nombres por barrido lineal; un temporal puede tomar el nombre
+        de otro cuyo último uso es la misma instrucción que lo asigna
+        (t$1 = t$1 + c). Solo se renombran los temporales del generador
+        (tac.is_temp), nunca una variable del programa.
+        """
+        # 1. Rango [definición, último uso] de los temporales asignados una sola vez
+        start, end, rejected = {}, {}, set()
+        touched = []                # Instrucciones que mencionan un temporal
+        boundary = 0                # Inicio del bloque básico actual
+        crossing = []               # Usos de un temporal asignado en otro bloque
+        for i, instr in enumerate(code):
+            op = instr.op
+            mentions = False
+            if op in READS:
+                for name in (instr.a, instr.b):
+                    if name in start:
+                        end[name] = i
+                        mentions = True
+                        if start[name] < boundary:
+                            crossing.append(i)
+                    elif name and is_temp(name):
+                        rejected.add(name) # Se usa antes de asignarse
+            if op in ASSIGNS:
+                dest = instr.dest
+                if is_temp(dest):
+                    if dest in start or dest in rejected:
+                        rejected.add(dest) # Más de una asignación
+                    else:
+                        start[dest] = end[dest] = i
+                    mentions = True
+            elif op == Op.LABEL:
+                boundary = i
+            elif op in JUMPS or op == Op.RETURN:
+                boundary = i + 1
+            if mentions:
+                touched.append(i)
+        for name in rejected:
+            start.pop(name, None)
+
+        # 2. Temporales vivos en el borde de un bloque: el rango llega hasta ese borde.
+        # Solo hace falta en las funciones donde un temporal se usa fuera de su bloque
+        for first, last in cfg.functions(code):
+            if bisect_left(crossing, first) == bisect_left(crossing, last):
+                continue
+            graph = cfg.CFG(code[first:last])
+            liveness = cfg.Liveness(graph)
+            for block in graph.blocks:
+                for name in liveness.names_of(liveness.live_in[block.index]):
+                    if name in start:
+                        start[name] = min(start[name], first + block.start)
+                for name in liveness.names_of(liveness.live_out[block.index]):
+                    if name in start:
+                        end[name] = max(end[name], first + block.end - 1)
+        intervals = [(s, end[name], name) for name, s in start.items()]
+
+        # 3. Barrido lineal: cada temporal toma el nombre libre más bajo
+        intervals.sort()
+        names = []                  # Nombres nuevos, sin chocar con los temporales que no se reciclan
+        number = 0
+        active, free = [], []       # (fin, índice del nombre) y nombres libres
+        renamed = {}
+        for s, e, name in intervals:
+            while active and active[0][0] <= s:
+                heapq.heappush(free, heapq.heappop(active)[1])
+            if free:
+                slot = heapq.heappop(free)
+            else:
+                slot = len(names)
+                number += 1
+                while tac.temp_name(number) in rejected:
+                    number += 1
+                names.append(tac.temp_name(number))
+            heapq.heappush(active, (e, slot))
+            renamed[name] = names[slot]
+        self.temps_total = len(intervals)
+        self.temps_peak = len(names)
+
+        # 4. Reescribir (sin modificar las instrucciones originales, que comparte el código sin optimizar)
+        optimized = list(code)
+        get = renamed.get
+        copies = False
+        for i in touched:
+            instr = code[i]
+            dest, a, b = get(instr.dest, instr.dest), get(instr.a, instr.a), get(instr.b, instr.b)
+            if instr.op == Op.ASSIGN and dest == a:
+                # La copia quedó como t1 = t1: no hace nada
+                optimized[i] = None
+                copies = True
+            else:
+                optimized[i] = Instr(instr.op, dest, a, instr.oper, b, instr.label)
+        if copies:
+            optimized = [instr for instr in optimized if instr is not None]
         return optimized
 
-    def remove_unused_variables(self, code):
-        """Elimina variables que se les asigna un valor pero nunca se usan."""
-        # 1. Recolectar todas las variables que se USAN (lado derecho, if, goto, return, call)
-        used_vars = set()
-        for line in code:
-            if line.strip().startswith('if ') or line.strip().startswith('return '):
-                parts = re.findall(r'[a-zA-Z_][a-zA-Z0-9_]*', line)
-                used_vars.update(parts)
-            elif '=' in line and not line.strip().startswith('if '):
-                right_side = line.split('=', 1)[1]
-                parts = re.findall(r'[a-zA-Z_][a-zA-Z0-9_]*', right_side)
-                used_vars.update(parts)
-
-        # 2. Filtrar las asignaciones a variables que no están en used_vars
-        optimized = []
-        for line in code:
-            match = re.match(r'^\s*([a-zA-Z0-9_]+)\s*=\s*(.+)$', line)
-            if match and not line.strip().startswith('if '):
-                var_name = match.group(1)
-                # No eliminamos variables clave como 'result', 'obj' o si están en uso
-                if var_name not in used_vars and not var_name.startswith('result') and var_name != 'obj':
-                    continue # Es código muerto, lo saltamos
-            optimized.append(line)
-            
-        return optimized
\ No newline at end of file
+# Pasos que pueden usar los niveles: nombre -> función(optimizer, code) que devuelve el código nuevo
+PASSES = {}
+
+def register_pass(name, function):
+    """Registra un paso para agregarlo a LEVELS (reemplaza al que tenga el mismo nombre)."""
+    PASSES[name] = function
+
+for _name in _FULL_PIPELINE + ('recycle_temporaries',):
+    register_pass(_name, getattr(Optimizer, _name))
+
+def main(argv):
+    """python optimizer.py [-O0|-O1|-O2|-O3] archivo.cpp: muestra el TAC optimizado y el informe de los pasos."""
+    import icg
+    import lexer
+
+    level = DEFAULT_LEVEL
+    paths = []
+    for arg in argv:
+        if arg.startswith('-O') and arg[2:].isdigit() and int(arg[2:]) in LEVELS:
+            level = int(arg[2:])
+        elif arg.startswith('-'):
+            paths = None
+            break
+        else:
+            paths.append(arg)
+    if not paths or len(paths) != 1:
+        print("uso: python optimizer.py [-O0|-O1|-O2|-O3] archivo.cpp")
+        return 1
+    with open(paths[0], encoding='utf-8') as f:
+        source = f.read()
+    generator = icg.ICG(lexer.tokenize(source))
+    opt = Optimizer(generator.generate(), generator.types, level)
+    optimized = opt.optimize()
+    for line in tac.format_code(optimized):
+        print(line)
+    print()
+    for line in opt.format_report():
+        print(line)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -1,21 +1,83 @@
 import lexer
+from lexer import TokenKind as K
 from typing import List
+from diagnostics import Diagnostic, Diagnostics, ErrorLimitReached, SYNTAX
+from ast_nodes import (Program, ClassDecl, Param, MethodDecl, VarDecl, Block, Assign, ExprStmt,
+                       If, While, DoWhile, For, Switch, Case, Return, Break, Continue, Goto, Label,
+                       Directive,
+                       Name, Literal, Binary, Unary, Paren, Call, Member, New)
+
+# Tipos de dato aceptados en declaraciones y los nombres en español que se reportan como inválidos
+VALID_TYPES = frozenset(["int", "float", "double", "char", "bool", "string", "const", "void"])
+INVALID_TYPES = frozenset(["entero", "flotante", "booleano", "cadena"])
+TYPE_NAMES = VALID_TYPES | INVALID_TYPES
+
+_SYNC_KINDS = frozenset((K.SEMI, K.RBRACE, K.LBRACE))
+# Operadores binarios: tipo de token -> (precedencia, código del error si falta el operando derecho)
+_LOGICAL_OP = (1, 'logical_operand')
+_REL_OP = (2, 'comparison_operand')
+_ADD_OP = (3, 'operand')
+_MUL_OP = (4, 'operand')
+_BINARY_OPS = {
+    K.AND: _LOGICAL_OP, K.OR: _LOGICAL_OP,
+    K.EQ: _REL_OP, K.NE: _REL_OP, K.GT: _REL_OP, K.LT: _REL_OP, K.GE: _REL_OP, K.LE: _REL_OP,
+    K.PLUS: _ADD_OP, K.MINUS: _ADD_OP,
+    K.STAR: _MUL_OP, K.SLASH: _MUL_OP,
+}
+_NON_ASSOCIATIVE = frozenset((_REL_OP[0],)) # a < b < c no se encadena
+# Operadores prefijos ('-x', '!listo'): ligan más que cualquier operador binario
+_UNARY_PREC = 5
+_UNARY_OPS = {K.MINUS: (_UNARY_PREC, 'operand'), K.NOT: (_UNARY_PREC, 'logical_operand')}
+_LITERAL_KINDS = frozenset((K.NUMBER, K.STRING, K.CHAR_LITERAL))
+_CASE_KINDS = _LITERAL_KINDS | {K.IDENTIFIER}
 
 class Parser:
-    """Analizador Sintáctico Descendente Recursivo Completo."""
-    def __init__(self, tokens):
-        self.tokens = [t for t in tokens if t.type not in ('WHITESPACE', 'COMMENT')]
+    """Analizador Sintáctico Descendente Recursivo Completo.
+
+    Además de los errores, construye el árbol sintáctico (self.tree) que
+    consumen el analizador semántico y el generador de código intermedio.
+    Cada parse_* regresa el nodo reconocido o None si la construcción falló.
+    """
+    def __init__(self, tokens, diagnostics=None):
+        self.tokens = lexer.significant(tokens)
+        self.source = getattr(tokens, 'text', None)  # Texto de TokenList/TokenBuffer, si lo hay
         self.pos = 0
-        self.errors = []
+        self.diagnostics = diagnostics if diagnostics is not None else Diagnostics()
+        self.panic = False
+        self.tree = None
         # Agregamos 'void' a los tipos válidos
-        self.valid_types = ["int", "float", "double", "char", "bool", "string", "const", "void"]
-        self.invalid_types = ["entero", "flotante", "booleano", "cadena"]
-        self.error_lines = set()
+        self.valid_types = VALID_TYPES
+        self.invalid_types = INVALID_TYPES
+        # Despacho de sentencias por el tipo numérico del primer token
+        self.statement_parsers = {
+            K.CLASS:  self.parse_class_declaration,
+            K.IF:     self.parse_if,
+            K.WHILE:  self.parse_while,
+            K.FOR:    self.parse_for,
+            K.RETURN: self.parse_return,
+            K.LBRACE: self.parse_block,
+            K.BREAK: self.parse_break,
+            K.CONTINUE: self.parse_break,
+            K.HASH: self.parse_directive,
+        }
+        # Sentencias cuya palabra clave el lexer reporta como identificador
+        self.contextual_parsers = {
+            'switch': (K.LPAREN, self.parse_switch),
+            'do': (K.LBRACE, self.parse_do_while),
+            'goto': (K.IDENTIFIER, self.parse_goto),
+        }
 
-    def add_error(self, msg, line):
-        if line not in self.error_lines:
-            self.errors.append(msg)
-            self.error_lines.add(line)
+    def add_error(self, code, line, column=None, *args):
+        # Modo pánico: solo se reporta el primer error de cada sentencia, los
+        # siguientes son consecuencia de ese hasta que la sentencia se recupera
+        if self.panic:
+            return
+        self.panic = True
+        self.diagnostics.add(SYNTAX, code, line, column, *args)
+
+    @property
+    def errors(self):
+        return self.diagnostics.of_stage(SYNTAX)
 
     def peek(self):
         return self.tokens[self.pos] if self.pos < len(self.tokens) else None
@@ -25,361 +87,628 @@ class Parser:
         if t: self.pos += 1
         return t
 
+    def peek_at(self, offset):
+        i = self.pos + offset
+        return self.tokens[i] if i < len(self.tokens) else None
+
     def parse(self):
-        while self.pos < len(self.tokens):
-            start_pos = self.pos
-            success = self.parse_statement()
-            
-            if not success:
-                while self.pos < len(self.tokens) and self.peek().value not in (';', '}', '{'):
-                    self.consume()
-                if self.pos == start_pos or (self.peek() and self.peek().value in (';', '}')):
-                    self.consume()
-                    
+        """Construye self.tree y regresa los diagnósticos sintácticos.
+
+        Si se alcanza el máximo de errores de self.diagnostics el análisis se
+        detiene y el árbol queda con las sentencias reconocidas hasta ahí.
+        """
+        body = []
+        try:
+            while self.pos < len(self.tokens):
+                start_pos = self.pos
+                node = self.parse_statement()
+                
+                if node is None:
+                    while self.pos < len(self.tokens) and self.peek().kind not in _SYNC_KINDS:
+                        self.consume()
+                    if self.pos == start_pos or (self.peek() and self.peek().kind in (K.SEMI, K.RBRACE)):
+                        self.consume()
+                else:
+                    body.append(node)
+        except ErrorLimitReached:
+            pass
+
+        self.tree = Program(0, len(self.tokens), body, self.tokens, self.source)
         return self.errors
 
     def parse_statement(self):
         t = self.peek()
-        if not t: return False
-
-        if t.value == 'class':
-            return self.parse_class_declaration()
-        elif t.value == 'if':
-            return self.parse_if()
-        elif t.value == 'while':
-            return self.parse_while()
-        elif t.value == 'for':
-            return self.parse_for()
-        elif t.value == 'return':              
-            return self.parse_return()
-        elif t.value == '{':
-            return self.parse_block()
-        elif t.value in self.valid_types or t.value in self.invalid_types:
+        if not t: return None
+        self.panic = False
+
+        handler = self.statement_parsers.get(t.kind)
+        if handler:
+            return handler()
+        elif t.kind == K.IDENTIFIER and t.value in self.contextual_parsers:
+            follow, handler = self.contextual_parsers[t.value]
+            next_t = self.peek_at(1)
+            if next_t and next_t.kind == follow:
+                return handler()
+            return self.parse_identifier_statement(t)
+        elif t.value in TYPE_NAMES:
             return self.parse_declaration_or_method()
-        elif t.type == 'IDENTIFIER':
-            # Si hay un identificador seguido de otro, es una declaración de un objeto (ej. MiClase obj;)
-            if self.pos + 1 < len(self.tokens):
-                next_t = self.tokens[self.pos + 1]
-                if next_t.type == 'IDENTIFIER':
-                    return self.parse_declaration_or_method()
-            return self.parse_assignment_or_expr()
+        elif t.kind == K.IDENTIFIER:
+            return self.parse_identifier_statement(t)
         else:
             return self.parse_assignment_or_expr()
 
+    def parse_identifier_statement(self, t):
+        next_t = self.peek_at(1)
+        if next_t:
+            # Si hay un identificador seguido de otro, es una declaración de un objeto (ej. MiClase obj;)
+            if next_t.kind == K.IDENTIFIER:
+                return self.parse_declaration_or_method()
+            # Etiqueta para goto (ej. L2:)
+            if next_t.value == ':':
+                start = self.pos
+                self.consume()
+                self.consume()
+                return Label(start, self.pos, t)
+        return self.parse_assignment_or_expr()
+
     # --- CLASES Y MÉTODOS ---
     def parse_return(self):
+        start = self.pos
         t_ret = self.consume() # Consume 'return'
+        value = None
         
         # Si no es un punto y coma inmediato, debe haber una expresión
-        if self.peek() and self.peek().value != ';':
-            if not self.parse_logical_expr():
-                return False
+        if self.peek() and self.peek().kind != K.SEMI:
+            value = self.parse_logical_expr()
+            if value is None:
+                return None
                 
-        if not self.peek() or self.peek().value != ';':
-            self.add_error(f"Error Sintáctico: Se esperaba ';' después de 'return' en la línea {t_ret.line}.", t_ret.line)
-            return False
+        if not self.peek() or self.peek().kind != K.SEMI:
+            self.add_error('return_semicolon', t_ret.line)
+            return None
             
         self.consume() # Consume ';'
-        return True
+        return Return(start, self.pos, t_ret, value)
 
     def parse_class_declaration(self):
+        start = self.pos
         t_class = self.consume() # Consume 'class'
         
         t_id = self.peek()
-        if not t_id or t_id.type != 'IDENTIFIER':
-            self.add_error(f"Error Sintáctico: Se esperaba el nombre de la clase en la línea {t_class.line}.", t_class.line)
-            return False
+        if not t_id or t_id.kind != K.IDENTIFIER:
+            self.add_error('class_name', t_class.line)
+            return None
         self.consume()
         
-        if not self.peek() or self.peek().value != '{':
-            self.add_error(f"Error: Cuerpo de clase inválido en la declaración de 'class' en la línea {t_class.line}, columna {t_class.column}.", t_class.line)
-            return False
+        if not self.peek() or self.peek().kind != K.LBRACE:
+            self.add_error('class_body', t_class.line, t_class.column)
+            return None
         self.consume()
         
         # Cuerpo de la clase
-        while self.peek() and self.peek().value != '}':
-            success = self.parse_statement()
-            if not success:
-                while self.peek() and self.peek().value not in ('}', ';', '{'):
+        members = []
+        while self.peek() and self.peek().kind != K.RBRACE:
+            member = self.parse_statement()
+            if member is None:
+                while self.peek() and self.peek().kind not in _SYNC_KINDS:
                     self.consume()
-                if self.peek() and self.peek().value in (';', '{'):
+                if self.peek() and self.peek().kind in (K.SEMI, K.LBRACE):
                     self.consume()
+            else:
+                members.append(member)
 
-        if not self.peek() or self.peek().value != '}':
-            self.add_error(f"Error: Cuerpo de clase inválido en la declaración de 'class' en la línea {t_class.line}, columna {t_class.column}.", t_class.line)
-            return False
+        if not self.peek() or self.peek().kind != K.RBRACE:
+            self.add_error('class_body', t_class.line, t_class.column)
+            return None
         self.consume()
-        return True
+        return ClassDecl(start, self.pos, t_class, t_id, members)
 
     def parse_declaration_or_method(self, require_semi=True):
+        start = self.pos
         t_type = self.consume() # Consume el tipo de dato
         
-        if t_type.value not in self.valid_types and t_type.type != 'IDENTIFIER':
-            self.add_error(f"Error: Tipo de retorno inválido en la declaración de método en la línea {t_type.line}, columna {t_type.column}.", t_type.line)
-            return False
+        if t_type.value not in self.valid_types and t_type.kind != K.IDENTIFIER:
+            self.add_error('return_type', t_type.line, t_type.column)
+            return None
             
         next_t = self.peek()
-        if not next_t or next_t.type != 'IDENTIFIER':
-            self.add_error(f"Error Sintáctico: Se esperaba un identificador en la línea {t_type.line}, columna {t_type.column}.", t_type.line)
-            return False
+        if not next_t or next_t.kind != K.IDENTIFIER:
+            self.add_error('expected_identifier', t_type.line, t_type.column)
+            return None
         t_id = self.consume()
         
         # ¿Es método o variable?
-        if self.peek() and self.peek().value == '(':
+        if self.peek() and self.peek().kind == K.LPAREN:
             self.consume() # Método: consume '('
             
-            if not self.parse_parameters():
-                return False
+            params = self.parse_parameters()
+            if params is None:
+                return None
                 
-            if not self.peek() or self.peek().value != ')':
-                self.add_error(f"Error Sintáctico: Paréntesis desbalanceados en la línea {t_id.line}.", t_id.line)
-                return False
+            if not self.peek() or self.peek().kind != K.RPAREN:
+                self.add_error('method_parenthesis', t_id.line)
+                return None
             self.consume() # Consume ')'
             
             # Un método exige su bloque de código { }
-            if not self.peek() or self.peek().value != '{':
-                self.add_error(f"Error Sintáctico: Se esperaba '{{' para el cuerpo del método en la línea {t_id.line}.", t_id.line)
-                return False
+            if not self.peek() or self.peek().kind != K.LBRACE:
+                self.add_error('method_body', t_id.line)
+                return None
                 
-            return self.parse_block()
+            body = self.parse_block()
+            if body is None:
+                return None
+            return MethodDecl(start, self.pos, t_type, t_id, params, body)
             
-        elif self.peek() and self.peek().value == '{':
+        elif self.peek() and self.peek().kind == K.LBRACE:
             # Caso de error: olvidó los paréntesis en el método (ej. void miMetodo { )
             t_err = self.peek()
-            self.add_error(f"Error Sintáctico: Faltan paréntesis '()' en el método en la línea {t_err.line}, columna {t_err.column}.", t_err.line)
-            return False
+            self.add_error('method_missing_parenthesis', t_err.line, t_err.column)
+            return None
             
         else:
             # Es una declaración de variable normal
-            if self.peek() and self.peek().value == '=':
+            init = None
+            if self.peek() and self.peek().kind == K.ASSIGN:
                 self.consume()
-                if not self.parse_logical_expr():
-                    return False
+                init = self.parse_logical_expr()
+                if init is None:
+                    return None
                     
             if require_semi:
-                if not self.peek() or self.peek().value != ';':
+                if not self.peek() or self.peek().kind != K.SEMI:
                     t_prev = self.tokens[self.pos - 1]
-                    self.add_error(f"Error Sintáctico: Se esperaba ';' en la línea {t_prev.line}.", t_prev.line)
-                    return False
+                    self.add_error('expected_semicolon', t_prev.line)
+                    return None
                 self.consume()
-            return True
+            return VarDecl(start, self.pos, t_type, t_id, init)
 
     def parse_parameters(self):
+        params = []
         t = self.peek()
-        if t and t.value == ')':
-            return True # Sin parámetros
+        if t and t.kind == K.RPAREN:
+            return params # Sin parámetros
 
         while True:
             t_type = self.peek()
-            if not t_type or (t_type.value not in self.valid_types and t_type.type != 'IDENTIFIER'):
+            if not t_type or (t_type.value not in self.valid_types and t_type.kind != K.IDENTIFIER):
                 err_t = t_type if t_type else self.tokens[-1]
-                self.add_error(f"Error: Parámetro inválido en la declaración de método en la línea {err_t.line}, columna {err_t.column}.", err_t.line)
-                return False
+                self.add_error('invalid_parameter', err_t.line, err_t.column)
+                return None
+            start = self.pos
             self.consume() # Consume tipo
             
             t_id = self.peek()
-            if not t_id or t_id.type != 'IDENTIFIER':
+            if not t_id or t_id.kind != K.IDENTIFIER:
                 err_t = t_id if t_id else self.tokens[-1]
-                self.add_error(f"Error: Parámetro inválido en la declaración de método en la línea {err_t.line}, columna {err_t.column}.", err_t.line)
-                return False
+                self.add_error('invalid_parameter', err_t.line, err_t.column)
+                return None
             self.consume() # Consume ID
+            params.append(Param(start, self.pos, t_type, t_id))
             
             t_comma = self.peek()
-            if t_comma and t_comma.value == ',':
+            if t_comma and t_comma.kind == K.COMMA:
                 self.consume()
-            elif t_comma and t_comma.value != ')':
+            elif t_comma and t_comma.kind != K.RPAREN:
                 # Si no hay coma, ni paréntesis de cierre, hay error de sintaxis (ej. int a float b)
-                self.add_error(f"Error: Parámetro inválido en la declaración de método en la línea {t_comma.line}, columna {t_comma.column}.", t_comma.line)
-                return False
+                self.add_error('invalid_parameter', t_comma.line, t_comma.column)
+                return None
             else:
                 break
-        return True
+        return params
 
-    # --- ESTRUCTURAS DE CONTROL (Se mantienen iguales, recortadas para ahorrar espacio en la lectura, pégalas de tu código original) ---
+    # --- ESTRUCTURAS DE CONTROL ---
     def parse_if(self):
+        start = self.pos
         t_if = self.consume()
-        if not self.peek() or self.peek().value != '(':
-            self.add_error(f"Error: Condición inválida en la estructura 'if' en la línea {t_if.line}, columna {t_if.column}.", t_if.line)
-            return False
+        if not self.peek() or self.peek().kind != K.LPAREN:
+            self.add_error('invalid_condition', t_if.line, t_if.column, 'if')
+            return None
         self.consume()
-        if not self.parse_logical_expr():
-            self.add_error(f"Error: Condición inválida en la estructura 'if' en la línea {t_if.line}, columna {t_if.column}.", t_if.line)
-            return False
-        if not self.peek() or self.peek().value != ')':
-            self.add_error(f"Error: Paréntesis desbalanceados en la estructura 'if' en la línea {t_if.line}, columna {t_if.column}.", t_if.line)
-            return False
+        cond = self.parse_logical_expr()
+        if cond is None:
+            self.add_error('invalid_condition', t_if.line, t_if.column, 'if')
+            return None
+        if not self.peek() or self.peek().kind != K.RPAREN:
+            self.add_error('unbalanced_structure', t_if.line, t_if.column, 'if')
+            return None
         self.consume()
-        if not self.parse_block():
-            self.add_error(f"Error: Bloque de sentencias faltante en la estructura 'if' en la línea {t_if.line}, columna {t_if.column}.", t_if.line)
-            return False
+        then = self.parse_block()
+        if then is None:
+            self.add_error('missing_block', t_if.line, t_if.column, 'if')
+            return None
+        orelse = None
         t_else = self.peek()
-        if t_else and t_else.value == 'else':
+        if t_else and t_else.kind == K.ELSE:
             t_else_tok = self.consume()
-            if not self.parse_block():
-                self.add_error(f"Error: Bloque de sentencias faltante en la estructura 'else' en la línea {t_else_tok.line}, columna {t_else_tok.column}.", t_else_tok.line)
-                return False
-        return True
+            orelse = self.parse_block()
+            if orelse is None:
+                self.add_error('missing_block', t_else_tok.line, t_else_tok.column, 'else')
+                return None
+        return If(start, self.pos, t_if, cond, then, orelse)
 
     def parse_while(self):
+        start = self.pos
         t_while = self.consume()
-        if not self.peek() or self.peek().value != '(':
-            self.add_error(f"Error: Paréntesis faltantes en la estructura 'while' en la línea {t_while.line}, columna {t_while.column}.", t_while.line)
-            return False
+        if not self.peek() or self.peek().kind != K.LPAREN:
+            self.add_error('missing_parenthesis', t_while.line, t_while.column, 'while')
+            return None
+        self.consume()
+        cond = self.parse_logical_expr()
+        if cond is None:
+            self.add_error('invalid_condition', t_while.line, t_while.column, 'while')
+            return None
+        if not self.peek() or self.peek().kind != K.RPAREN:
+            self.add_error('missing_parenthesis', t_while.line, t_while.column, 'while')
+            return None
+        self.consume()
+        body = self.parse_block()
+        if body is None:
+            self.add_error('missing_block', t_while.line, t_while.column, 'while')
+            return None
+        return While(start, self.pos, t_while, cond, body)
+
+    def parse_do_while(self):
+        start = self.pos
+        t_do = self.consume() # 'do'
+        body = self.parse_block()
+        if body is None:
+            self.add_error('missing_block', t_do.line, t_do.column, 'do')
+            return None
+        t_while = self.peek()
+        if not t_while or t_while.kind != K.WHILE:
+            self.add_error('do_without_while', t_do.line, t_do.column)
+            return None
+        self.consume()
+        if not self.peek() or self.peek().kind != K.LPAREN:
+            self.add_error('missing_parenthesis', t_while.line, t_while.column, 'while')
+            return None
+        self.consume()
+        cond = self.parse_logical_expr()
+        if cond is None:
+            self.add_error('invalid_condition', t_while.line, t_while.column, 'while')
+            return None
+        if not self.peek() or self.peek().kind != K.RPAREN:
+            self.add_error('missing_parenthesis', t_while.line, t_while.column, 'while')
+            return None
         self.consume()
-        if not self.parse_logical_expr():
-            self.add_error(f"Error: Condición inválida en la estructura 'while' en la línea {t_while.line}, columna {t_while.column}.", t_while.line)
-            return False
-        if not self.peek() or self.peek().value != ')':
-            self.add_error(f"Error: Paréntesis faltantes en la estructura 'while' en la línea {t_while.line}, columna {t_while.column}.", t_while.line)
-            return False
+        if not self.peek() or self.peek().kind != K.SEMI:
+            self.add_error('expected_semicolon', t_while.line)
+            return None
         self.consume()
-        if not self.parse_block():
-            self.add_error(f"Error: Bloque de sentencias faltante en la estructura 'while' en la línea {t_while.line}, columna {t_while.column}.", t_while.line)
-            return False
-        return True
+        return DoWhile(start, self.pos, t_do, body, t_while, cond)
 
     def parse_for(self):
+        start = self.pos
         t_for = self.consume()
-        if not self.peek() or self.peek().value != '(':
-            self.add_error(f"Error: Paréntesis faltantes en la estructura 'for' en la línea {t_for.line}, columna {t_for.column}.", t_for.line)
-            return False
+        if not self.peek() or self.peek().kind != K.LPAREN:
+            self.add_error('missing_parenthesis', t_for.line, t_for.column, 'for')
+            return self.skip_header(t_for)
         self.consume()
         t = self.peek()
-        if t and (t.value in self.valid_types or t.value in self.invalid_types):
-            if not self.parse_declaration_or_method(require_semi=False):
-                self.add_error(f"Error: Componente inválido en la estructura 'for' en la línea {t_for.line}, columna {t_for.column}.", t_for.line)
-                return False
+        if t and t.value in TYPE_NAMES:
+            init = self.parse_declaration_or_method(require_semi=False)
+            if init is None:
+                self.add_error('invalid_component', t_for.line, t_for.column, 'for')
+                return self.skip_header(t_for)
         else:
-            if not self.parse_assignment_or_expr(require_semi=False):
-                self.add_error(f"Error: Componente inválido en la estructura 'for' en la línea {t_for.line}, columna {t_for.column}.", t_for.line)
-                return False
-        if not self.peek() or self.peek().value != ';':
-            self.add_error(f"Error: Componente inválido en la estructura 'for' en la línea {t_for.line}, columna {t_for.column}.", t_for.line)
-            return False
+            init = self.parse_assignment_or_expr(require_semi=False)
+            if init is None:
+                self.add_error('invalid_component', t_for.line, t_for.column, 'for')
+                return self.skip_header(t_for)
+        if not self.peek() or self.peek().kind != K.SEMI:
+            self.add_error('invalid_component', t_for.line, t_for.column, 'for')
+            return self.skip_header(t_for)
         self.consume()
-        if not self.parse_logical_expr():
-            self.add_error(f"Error: Componente inválido en la estructura 'for' en la línea {t_for.line}, columna {t_for.column}.", t_for.line)
-            return False
-        if not self.peek() or self.peek().value != ';':
-            self.add_error(f"Error: Componente inválido en la estructura 'for' en la línea {t_for.line}, columna {t_for.column}.", t_for.line)
-            return False
+        cond = self.parse_logical_expr()
+        if cond is None:
+            self.add_error('invalid_component', t_for.line, t_for.column, 'for')
+            return self.skip_header(t_for)
+        if not self.peek() or self.peek().kind != K.SEMI:
+            self.add_error('invalid_component', t_for.line, t_for.column, 'for')
+            return self.skip_header(t_for)
         self.consume()
-        if not self.parse_assignment_or_expr(require_semi=False):
-            self.add_error(f"Error: Componente inválido en la estructura 'for' en la línea {t_for.line}, columna {t_for.column}.", t_for.line)
-            return False
-        if not self.peek() or self.peek().value != ')':
-            self.add_error(f"Error: Paréntesis faltantes en la estructura 'for' en la línea {t_for.line}, columna {t_for.column}.", t_for.line)
-            return False
+        step = self.parse_assignment_or_expr(require_semi=False)
+        if step is None:
+            self.add_error('invalid_component', t_for.line, t_for.column, 'for')
+            return self.skip_header(t_for)
+        if not self.peek() or self.peek().kind != K.RPAREN:
+            self.add_error('missing_parenthesis', t_for.line, t_for.column, 'for')
+            return self.skip_header(t_for)
         self.consume()
-        if not self.parse_block():
-            self.add_error(f"Error: Bloque de sentencias faltante en la estructura 'for' en la línea {t_for.line}, columna {t_for.column}.", t_for.line)
-            return False
-        return True
+        body = self.parse_block()
+        if body is None:
+            self.add_error('missing_block', t_for.line, t_for.column, 'for')
+            return None
+        return For(start, self.pos, t_for, init, cond, step, body)
+
+    def skip_header(self, t):
+        """Recuperación de un encabezado inválido: salta el resto de su línea hasta el '{' del cuerpo.
+
+        El encabezado del for tiene sus propios ';', que no sirven como punto
+        de sincronización.
+        """
+        while self.peek() and self.peek().kind not in (K.LBRACE, K.RBRACE) and self.peek().line == t.line:
+            self.consume()
+        return None
+
+    def parse_switch(self):
+        start = self.pos
+        t_switch = self.consume() # 'switch'
+        self.consume() # '('
+        expr = self.parse_logical_expr()
+        if expr is None:
+            self.add_error('invalid_condition', t_switch.line, t_switch.column, 'switch')
+            return None
+        if not self.peek() or self.peek().kind != K.RPAREN:
+            self.add_error('unbalanced_structure', t_switch.line, t_switch.column, 'switch')
+            return None
+        self.consume()
+        if not self.peek() or self.peek().kind != K.LBRACE:
+            self.add_error('missing_block', t_switch.line, t_switch.column, 'switch')
+            return None
+        self.consume()
+
+        # Cuerpo: etiquetas case/default y sentencias, en el orden del código
+        body = []
+        while self.peek() and self.peek().kind != K.RBRACE:
+            t = self.peek()
+            if t.value == 'case' or t.value == 'default':
+                node = self.parse_case()
+            else:
+                node = self.parse_statement()
+            if node is None:
+                while self.peek() and self.peek().kind not in _SYNC_KINDS:
+                    self.consume()
+                if self.peek() and self.peek().kind == K.SEMI:
+                    self.consume()
+            else:
+                body.append(node)
+        if not self.peek() or self.peek().kind != K.RBRACE:
+            self.add_error('missing_block', t_switch.line, t_switch.column, 'switch')
+            return None
+        self.consume()
+        return Switch(start, self.pos, t_switch, expr, body)
+
+    def parse_case(self):
+        start = self.pos
+        t_case = self.consume() # 'case' o 'default'
+        value = None
+        if t_case.value == 'case':
+            value = self.peek()
+            if not value or value.kind not in _CASE_KINDS:
+                self.add_error('case_value', t_case.line, t_case.column)
+                return None
+            self.consume()
+        if not self.peek() or self.peek().value != ':':
+            self.add_error('expected_colon', t_case.line)
+            return None
+        self.consume()
+        return Case(start, self.pos, t_case, value)
+
+    def parse_break(self):
+        start = self.pos
+        t = self.consume() # 'break' o 'continue'
+        if not self.peek() or self.peek().kind != K.SEMI:
+            self.add_error('expected_semicolon', t.line)
+            return None
+        self.consume()
+        if t.kind == K.BREAK:
+            return Break(start, self.pos, t)
+        return Continue(start, self.pos, t)
+
+    def parse_directive(self):
+        # Directiva del preprocesador (ej. #include <iostream>): abarca el resto de la línea
+        start = self.pos
+        t_hash = self.consume()
+        while self.peek() and self.peek().line == t_hash.line:
+            self.consume()
+        return Directive(start, self.pos, t_hash)
+
+    def parse_goto(self):
+        start = self.pos
+        t_goto = self.consume() # 'goto'
+        label = self.consume()
+        if not self.peek() or self.peek().kind != K.SEMI:
+            self.add_error('expected_semicolon', label.line)
+            return None
+        self.consume()
+        return Goto(start, self.pos, t_goto, label)
 
     def parse_block(self):
-        if not self.peek() or self.peek().value != '{':
-            return False
+        if not self.peek() or self.peek().kind != K.LBRACE:
+            return None
+        start = self.pos
         self.consume()
-        while self.peek() and self.peek().value != '}':
-            success = self.parse_statement()
-            if not success:
-                while self.peek() and self.peek().value not in (';', '}', '{'):
+        body = []
+        while self.peek() and self.peek().kind != K.RBRACE:
+            node = self.parse_statement()
+            if node is None:
+                while self.peek() and self.peek().kind not in _SYNC_KINDS:
                     self.consume()
-                if self.peek() and self.peek().value == ';':
+                if self.peek() and self.peek().kind == K.SEMI:
                     self.consume()
-        if not self.peek() or self.peek().value != '}':
-            return False
+            else:
+                body.append(node)
+        if not self.peek() or self.peek().kind != K.RBRACE:
+            return None
         self.consume()
-        return True
+        return Block(start, self.pos, body)
 
     def parse_assignment_or_expr(self, require_semi=True):
-        if not self.parse_logical_expr():
-            return False
-        if self.peek() and self.peek().value == '=':
+        start = self.pos
+        target = self.parse_logical_expr()
+        if target is None:
+            return None
+        value = None
+        if self.peek() and self.peek().kind == K.ASSIGN:
             self.consume()
-            if not self.parse_logical_expr():
-                return False
+            value = self.parse_logical_expr()
+            if value is None:
+                return None
         if require_semi:
-            if not self.peek() or self.peek().value != ';':
+            if not self.peek() or self.peek().kind != K.SEMI:
                 t_prev = self.tokens[self.pos - 1]
-                self.add_error(f"Error Sintáctico: Se esperaba ';' en la línea {t_prev.line}.", t_prev.line)
-                return False
+                self.add_error('expected_semicolon', t_prev.line)
+                return None
             self.consume()
-        return True
+        if value is None:
+            return ExprStmt(start, self.pos, target)
+        return Assign(start, self.pos, target, value)
 
     # --- EXPRESIONES LOGICAS Y MATEMÁTICAS ---
     def parse_logical_expr(self):
-        if not self.parse_logical_term(): return False
-        while self.peek() and self.peek().value in ('&&', '||'):
-            op = self.consume()
-            if not self.parse_logical_term():
-                self.add_error(f"Error: Operador lógico sin término en la línea {op.line}, columna {op.column}.", op.line)
-                return False
-        return True
-
-    def parse_logical_term(self):
-        if not self.parse_arith_expr(): return False
-        rel_ops = ('==', '!=', '>', '<', '>=', '<=')
-        t = self.peek()
-        if t and t.value in rel_ops:
-            op = self.consume()
-            if not self.parse_arith_expr():
-                self.add_error(f"Error: Comparación inválida en la línea {op.line}, columna {op.column}.", op.line)
-                return False
-        return True
-
-    def parse_arith_expr(self):
-        if not self.parse_term(): return False
-        while self.peek() and self.peek().value in ('+', '-'):
-            op = self.consume()
-            if not self.parse_term():
-                self.add_error(f"Error: Operador sin término en la línea {op.line}, columna {op.column}.", op.line)
-                return False
-        return True
-
-    def parse_term(self):
-        if not self.parse_factor(): return False
-        while self.peek() and self.peek().value in ('*', '/'):
-            op = self.consume()
-            if not self.parse_factor():
-                self.add_error(f"Error: Operador sin término en la línea {op.line}, columna {op.column}.", op.line)
-                return False
-        return True
+        """Expresión completa por precedencia de operadores (tabla _BINARY_OPS).
+
+        Usa pilas explícitas de operandos y operadores en lugar de un nivel de
+        recursión por precedencia, así los paréntesis anidados no consumen la
+        pila de Python. Un '(' se guarda en la pila de operadores con
+        precedencia 0 y funciona como barrera hasta su ')'; el fondo de la pila
+        es un centinela con precedencia -1. Los operadores prefijos se apilan
+        con _UNARY_PREC y al reducirlos toman un solo operando.
+        """
+        tokens = self.tokens
+        n = len(tokens)
+        binary_ops = _BINARY_OPS
+        operands = []
+        operators = [(-1, None, None)] # (precedencia, token, posición)
+        while True:
+            # Operando: paréntesis que abren y operadores prefijos, después un factor
+            while self.pos < n:
+                t = tokens[self.pos]
+                if t.kind == K.LPAREN:
+                    operators.append((0, t, self.pos))
+                elif t.kind in _UNARY_OPS:
+                    operators.append((_UNARY_PREC, t, self.pos))
+                else:
+                    break
+                self.pos += 1
+            operand = self.parse_factor()
+            if operand is None:
+                return self.unwind_expression(operators)
+            operands.append(operand)
+
+            # Operador binario o cierre de paréntesis
+            while True:
+                t = tokens[self.pos] if self.pos < n else None
+                entry = binary_ops.get(t.kind) if t else None
+                prec = entry[0] if entry else 0
+                # Reducir los operadores pendientes de mayor precedencia
+                while operators[-1][0] > prec:
+                    self.reduce(operators.pop(), operands)
+                if prec:
+                    if operators[-1][0] != prec:
+                        break
+                    if prec not in _NON_ASSOCIATIVE:
+                        op = operators.pop()[1]
+                        right = operands.pop()
+                        left = operands[-1]
+                        operands[-1] = Binary(left.start, right.end, op, left, right)
+                        break
+                    # Segundo relacional seguido: la expresión termina aquí
+                    while operators[-1][0] > 0:
+                        self.reduce(operators.pop(), operands)
+                _, open_paren, start = operators.pop()
+                if open_paren is None:
+                    return operands.pop()
+                if t and t.kind == K.RPAREN:
+                    self.pos += 1
+                    operands.append(Paren(start, self.pos, open_paren, operands.pop()))
+                else:
+                    self.add_error('unbalanced_parenthesis', open_paren.line)
+                    return self.unwind_expression(operators)
+            operators.append((prec, t, self.pos))
+            self.pos += 1
+
+    @staticmethod
+    def reduce(entry, operands):
+        """Aplica un operador de la pila a los operandos del tope."""
+        prec, op, pos = entry
+        right = operands.pop()
+        if prec == _UNARY_PREC:
+            operands.append(Unary(pos, right.end, op, right))
+        else:
+            left = operands[-1]
+            operands[-1] = Binary(left.start, right.end, op, left, right)
+
+    def unwind_expression(self, operators):
+        """Falta un operando: reporta cada operador pendiente y cierra los paréntesis abiertos."""
+        while len(operators) > 1:
+            prec, t, _ = operators.pop()
+            if prec:
+                table = _UNARY_OPS if prec == _UNARY_PREC else _BINARY_OPS
+                self.add_error(table[t.kind][1], t.line, t.column)
+            elif self.peek() and self.peek().kind == K.RPAREN:
+                self.consume()
+            else:
+                self.add_error('unbalanced_parenthesis', t.line)
+        return None
+
+    def parse_arguments(self, t):
+        """Argumentos de una llamada; self.pos está sobre el '('. Regresa la lista de expresiones."""
+        self.consume() # Consume '('
+        args = []
+        while self.peek() and self.peek().kind != K.RPAREN:
+            arg_pos = self.pos
+            arg = self.parse_logical_expr()
+            if arg is not None:
+                args.append(arg)
+            if self.peek() and self.peek().kind == K.COMMA:
+                self.consume()
+            elif self.pos == arg_pos:
+                break # Token que no inicia una expresión: se reporta como ')' faltante
+        if self.peek() and self.peek().kind == K.RPAREN:
+            self.consume()
+        else:
+            self.add_error('call_parenthesis', t.line)
+        return args
 
     def parse_factor(self):
         t = self.peek()
-        if not t: return False
+        if not t: return None
+        start = self.pos
         
-        if t.type == 'IDENTIFIER':
-            self.consume()
+        if t.kind == K.IDENTIFIER:
+            self.pos += 1
+            next_kind = self.tokens[self.pos].kind if self.pos < len(self.tokens) else None
             # Verificar si es una llamada a función ej. miMetodo(x, y)
-            if self.peek() and self.peek().value == '(':
-                self.consume() # Consume '('
-                while self.peek() and self.peek().value != ')':
-                    self.parse_logical_expr()
-                    if self.peek() and self.peek().value == ',':
-                        self.consume()
-                if self.peek() and self.peek().value == ')':
-                    self.consume()
-                else:
-                    self.add_error(f"Error Sintáctico: Falta ')' en la llamada al método en la línea {t.line}.", t.line)
-            return True
-        elif t.type in ('NUMBER', 'STRING', 'CHAR_LITERAL'): 
-            self.consume()
-            return True
-        elif t.value == '(':
-            open_paren = self.consume()
-            res = self.parse_logical_expr()
-            t_close = self.peek()
-            if t_close and t_close.value == ')':
-                self.consume()
-                return res
-            else:
-                self.add_error(f"Error: Paréntesis desbalanceados en la línea {open_paren.line}.", open_paren.line)
-                return False
-        return False
+            if next_kind == K.LPAREN:
+                args = self.parse_arguments(t)
+                return Call(start, self.pos, t, args)
+            # Acceso a un miembro de un objeto ej. p.edad o p.metodo(x)
+            if next_kind == K.DOT:
+                next_t = self.peek_at(1)
+                if next_t and next_t.kind == K.IDENTIFIER:
+                    self.consume() # Consume '.'
+                    self.consume() # Consume el miembro
+                    args = None
+                    if self.peek() and self.peek().kind == K.LPAREN:
+                        args = self.parse_arguments(next_t)
+                    return Member(start, self.pos, t, next_t, args)
+            return Name(start, self.pos, t)
+        elif t.kind in _LITERAL_KINDS: 
+            self.pos += 1
+            return Literal(start, self.pos, t)
+        elif t.kind == K.NEW:
+            # Creación de objetos ej. new Persona()
+            t_class = self.peek_at(1)
+            if not t_class or t_class.kind != K.IDENTIFIER:
+                return None
+            self.consume() # 'new'
+            self.consume() # Nombre de la clase
+            args = []
+            if self.peek() and self.peek().kind == K.LPAREN:
+                args = self.parse_arguments(t_class)
+            return New(start, self.pos, t, t_class, args)
+        return None
 
 # --- FUNCIÓN DE ENTRADA ---
-def parse(tokens: List[lexer.Token]) -> List[str]:
+def parse(tokens: List[lexer.Token], diagnostics: Diagnostics = None) -> List[Diagnostic]:
+    parser = Parser(tokens, diagnostics)
+    return parser.parse()
+
+def parse_tree(tokens: List[lexer.Token]) -> Program:
+    """Árbol sintáctico del programa (los errores se descartan; ver Parser.errors)."""
     parser = Parser(tokens)
-    return parser.parse()
\ No newline at end of file
+    parser.parse()
+    return parser.tree
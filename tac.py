@@ -0,0 +1,153 @@
+"""Representación intermedia de tres direcciones (TAC).
+
+Cada instrucción es un objeto Instr con un código de operación (Op), un
+destino, hasta dos operandos, el operador y la etiqueta a la que salta. El
+generador, el optimizador y el generador de código máquina trabajan sobre
+estos campos; el texto ('t$3 = a + b', 'if not t$1 goto L2') solo se arma
+para mostrarlo.
+
+Los operandos son cadenas: nombres de variables y temporales, accesos a
+miembros ('p.edad') o literales tal como aparecen en el código ('15', '-2',
+'1.5', '"hola"'). El generador descompone cada expresión en una instrucción
+por operación, así que un operando nunca es una expresión.
+"""
+
+import gc
+from contextlib import contextmanager
+
+class Op:
+    """Código de operación de una instrucción; enteros simples como lexer.TokenKind."""
+    LABEL = 0       # label:
+    COMMENT = 1     # # a
+    ASSIGN = 2      # dest = a
+    BINARY = 3      # dest = a oper b
+    NEW = 4         # dest = create a
+    GOTO = 5        # goto label
+    IF_FALSE = 6    # if not a goto label
+    IF_TRUE = 7     # if a goto label
+    IF_REL = 8      # if a oper b goto label
+    CALL = 9        # call a
+    RETURN = 10     # return a
+    UNARY = 11      # dest = oper a
+    PARAM = 12      # param a
+    JUMP_TABLE = 13 # goto (L1, L2, ...)[a]; label es la tupla de etiquetas
+
+    NAMES = ('LABEL', 'COMMENT', 'ASSIGN', 'BINARY', 'NEW', 'GOTO',
+             'IF_FALSE', 'IF_TRUE', 'IF_REL', 'CALL', 'RETURN', 'UNARY', 'PARAM',
+             'JUMP_TABLE')
+
+# Instrucciones que escriben en `dest`
+ASSIGNS = frozenset((Op.ASSIGN, Op.BINARY, Op.NEW, Op.UNARY))
+# Saltos condicionales (todos usan `a` y saltan a `label`)
+BRANCHES = frozenset((Op.IF_FALSE, Op.IF_TRUE, Op.IF_REL))
+# Todas las instrucciones que saltan
+JUMPS = BRANCHES | {Op.GOTO, Op.JUMP_TABLE}
+# Comparación contraria de cada operador relacional (para saltar cuando la condición es falsa)
+NEGATED = {'<': '>=', '>=': '<', '>': '<=', '<=': '>', '==': '!=', '!=': '=='}
+# Instrucciones que leen sus operandos a y b (NEW guarda en `a` el nombre de la clase)
+READS = BRANCHES | {Op.RETURN, Op.ASSIGN, Op.BINARY, Op.UNARY, Op.PARAM, Op.JUMP_TABLE}
+
+class Instr:
+    __slots__ = ('op', 'dest', 'a', 'oper', 'b', 'label')
+
+    def __init__(self, op, dest=None, a=None, oper=None, b=None, label=None):
+        self.op = op
+        self.dest = dest
+        self.a = a
+        self.oper = oper        # Operador de BINARY, UNARY e IF_REL
+        self.b = b
+        self.label = label      # Etiqueta que define LABEL o a la que salta un GOTO/IF (tupla en JUMP_TABLE)
+                                # En la etiqueta de entrada de un método, `a` es el nombre del método
+
+    def key(self):
+        return (self.op, self.dest, self.a, self.oper, self.b, self.label)
+
+    def __eq__(self, other):
+        return isinstance(other, Instr) and self.key() == other.key()
+
+    __hash__ = None
+
+    def __str__(self):
+        return _FORMATS[self.op](self)
+
+    def __repr__(self):
+        return f"Instr({Op.NAMES[self.op]}, {str(self)!r})"
+
+_FORMATS = {
+    Op.LABEL: lambda i: f"{i.label}:",
+    Op.COMMENT: lambda i: f"# {i.a}",
+    Op.ASSIGN: lambda i: f"{i.dest} = {i.a}",
+    Op.BINARY: lambda i: f"{i.dest} = {i.a} {i.oper} {i.b}",
+    Op.NEW: lambda i: f"{i.dest} = create {i.a}",
+    Op.GOTO: lambda i: f"goto {i.label}",
+    Op.IF_FALSE: lambda i: f"if not {i.a} goto {i.label}",
+    Op.IF_TRUE: lambda i: f"if {i.a} goto {i.label}",
+    Op.IF_REL: lambda i: f"if {i.a} {i.oper} {i.b} goto {i.label}",
+    Op.CALL: lambda i: f"call {i.a}",
+    Op.RETURN: lambda i: f"return {i.a}",
+    Op.UNARY: lambda i: f"{i.dest} = {i.oper}{i.a}",
+    Op.PARAM: lambda i: f"param {i.a}",
+    Op.JUMP_TABLE: lambda i: f"goto ({', '.join(i.label)})[{i.a}]",
+}
+
+def jump_targets(instr):
+    """Etiquetas a las que puede saltar una instrucción."""
+    if instr.op == Op.JUMP_TABLE:
+        return instr.label
+    return (instr.label,) if instr.op in JUMPS else ()
+
+def negated(instr, label):
+    """Salto condicional a `label` que se toma justo cuando `instr` no salta."""
+    if instr.op == Op.IF_REL:
+        return Instr(Op.IF_REL, a=instr.a, oper=NEGATED[instr.oper], b=instr.b, label=label)
+    return Instr(Op.IF_TRUE if instr.op == Op.IF_FALSE else Op.IF_FALSE, a=instr.a, label=label)
+
+def operand_names(operand):
+    """Variables que usa un operando: él mismo si no es un literal (y el objeto, en 'p.edad')."""
+    if not operand:
+        return ()
+    first = operand[0]
+    if not (first.isalpha() or first == '_'):
+        return ()
+    if '.' in operand:
+        return (operand, operand[:operand.index('.')])
+    return (operand,)
+
+# Prefijo de los temporales del generador (t$1, t$2, ...): '$' no puede ir en un
+# identificador, así que una variable del programa (como t1) nunca pasa por un temporal
+TEMP_PREFIX = 't$'
+
+def temp_name(number):
+    """Nombre del temporal número `number`."""
+    return f"{TEMP_PREFIX}{number}"
+
+def temp_number(name):
+    """Número de un temporal del generador."""
+    return int(name[len(TEMP_PREFIX):])
+
+def is_temp(name):
+    """Nombres de temporales del generador (t$1, t$2, ...)."""
+    return name.startswith(TEMP_PREFIX)
+
+def is_entry(instr):
+    """Etiqueta con la que empieza un método."""
+    return instr.op == Op.LABEL and instr.a is not None
+
+@contextmanager
+def building():
+    """Pausa el recolector de ciclos mientras se crean muchas instrucciones.
+
+    Las instrucciones no forman ciclos, pero con millones de objetos nuevos
+    el recolector recorre una y otra vez los tokens y el árbol ya creados.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def format_code(code):
+    """Líneas para mostrar: las etiquetas al margen y el resto con sangría."""
+    return [f"{i.label}:" if i.op == Op.LABEL else f"    {i}" for i in code]
@@ -0,0 +1,104 @@
+"""Pruebas del generador de código máquina: el código de cada nivel -O deja la memoria igual que el de -O0.
+
+python -m unittest test_codegen
+"""
+import unittest
+
+import codegen
+import icg
+import lexer
+import optimizer
+from benchmarks import _truncate
+
+_MACHINE_OPERATORS = {
+    'ADD': lambda a, b: a + b, 'SUB': lambda a, b: a - b, 'MUL': lambda a, b: a * b,
+    'DIV': lambda a, b: _truncate(a, b) if b else 0, 'SHL': lambda a, b: a << b,
+    'CMPL': lambda a, b: int(a < b), 'CMPG': lambda a, b: int(a > b), 'CMPE': lambda a, b: int(a == b),
+    'CMPLE': lambda a, b: int(a <= b), 'CMPGE': lambda a, b: int(a >= b), 'CMPNE': lambda a, b: int(a != b),
+    'AND': lambda a, b: int(bool(a and b)), 'OR': lambda a, b: int(bool(a or b)),
+}
+
+def _run_machine(machine_code, memory, limit=100_000):
+    """Ejecuta el código de CodeGenerator (un solo registro, R1) sobre `memory` (dirección -> valor)."""
+    program = {}
+    for line in machine_code:
+        addr, text = line.split(':', 1)
+        instruction, _, operands = text.strip().partition(' ')
+        program[int(addr, 16)] = (instruction, [o.strip() for o in operands.split(',')] if operands else [])
+
+    def value(operand):
+        return memory.get(operand, 0) if operand.startswith('0x') else int(operand)
+
+    r1 = 0
+    pc = 0x1000
+    for _ in range(limit):
+        if pc not in program or program[pc][0] == '.WORD':
+            return memory
+        instruction, operands = program[pc]
+        pc += 4
+        if instruction == 'LOAD':
+            r1 = value(operands[1])
+        elif instruction == 'STORE':
+            memory[operands[0]] = r1
+        elif instruction == 'NEG':
+            r1 = -r1
+        elif instruction == 'NOT':
+            r1 = int(not r1)
+        elif instruction == 'JMP':
+            pc = int(operands[0], 16)
+        elif instruction in ('JZ', 'JNZ'):
+            if bool(r1) == (instruction == 'JNZ'):
+                pc = int(operands[1], 16)
+        elif instruction == 'JMPT':
+            pc = int(program[int(operands[1], 16) + 4 * r1][1][0], 16)
+        else:
+            r1 = _MACHINE_OPERATORS[instruction](r1, value(operands[1]))
+    raise AssertionError('el código máquina no terminó')
+
+def _memory(source, level, inputs, names):
+    """Valores de las variables al terminar el código máquina de `source` optimizado con `level`.
+
+    observa() lee las variables de `names` para que remove_unused_variables no quite
+    sus asignaciones; va al final, así que el código máquina lo recorre al terminar.
+    """
+    source += "int observa() { return %s; }" % ' + '.join(names)
+    generator = icg.ICG(lexer.tokenize(source))
+    code = optimizer.Optimizer(generator.generate(), generator.types, level).optimize()
+    machine_code, symbols = codegen.CodeGenerator(code).generate()
+    memory = _run_machine(machine_code, {symbols[name]: value for name, value in inputs.items() if name in symbols})
+    return {name: memory.get(symbols.get(name)) for name in names}
+
+class LevelsTest(unittest.TestCase):
+    def assertSameMemory(self, source, inputs, expected):
+        for level in optimizer.LEVELS:
+            with self.subTest(level=level):
+                self.assertEqual(_memory(source, level, inputs, list(expected)), expected)
+
+    def test_common_subexpression_used_twice(self):
+        # a * b queda en un temporal que leen x e y: su valor no se puede perder al cambiar R1
+        self.assertSameMemory("""
+            int a; int b; int c; int d;
+            int x = a * b + c;
+            int y = a * b + d;
+            int z = x + y;
+        """, {'a': 3, 'b': 4, 'c': 5, 'd': 6}, {'x': 17, 'y': 18, 'z': 35})
+
+    def test_loop_and_branches(self):
+        self.assertSameMemory("""
+            int n; int k; int i; int s; int p;
+            s = 0; p = 0;
+            for (i = 0; i < n; i = i + 1) {
+                s = s + i * k + (i * k - 1) * 2;
+                if (i * k > 10 && s > 0) { p = p + i * k; } else { p = p - (s + 1); }
+                switch (i) {
+                    case 0: s = s + 1; break;
+                    case 1: s = s + 2;
+                    case 2: s = s * 2; break;
+                    case 3: s = s - 3; break;
+                    default: s = s + i * k;
+                }
+            }
+        """, {'n': 7, 'k': 3}, {'s': 260, 'p': -84})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""Pruebas del front end paralelo: frontend.run da lo mismo que run_sequential.
+
+python -m unittest test_frontend
+"""
+import re
+import unittest
+
+import frontend
+from benchmarks import make_source
+from tac import is_temp
+
+# Varias clases y métodos de nivel superior (uno por fragmento), con un switch
+# que se despacha con tabla de saltos y variables del programa que parecen temporales
+_SOURCE = """
+int t3;
+class Punto {
+    int x;
+    int y;
+    int suma() { return x * 2 + y * 3; }
+}
+int clasifica(int v) {
+    int r;
+    int w;
+    w = v;
+    switch (w) {
+        case 1: r = 10; break;
+        case 2: r = 20; break;
+        case 3: r = 30; break;
+        case 4: r = 40; break;
+        default: r = 0;
+    }
+    return r + t3 * 2;
+}
+class Cuenta {
+    float saldo;
+    int movimientos;
+    int deposita(float monto) { saldo = saldo + monto * 2; movimientos = movimientos + 1; return movimientos; }
+}
+int doble(int t1) { int t2; t2 = t1 * 2 + t1 * 3; return t2 + t3; }
+class Pila {
+    int tope;
+    int mete(int v) { tope = tope + v * 4; return tope; }
+}
+int main() {
+    int i;
+    t3 = 1;
+    for (i = 0; i < 5; i = i + 1) { t3 = t3 + clasifica(i) * doble(i); }
+    return t3;
+}
+"""
+
+class ParallelTest(unittest.TestCase):
+    def assertSameResult(self, source, workers):
+        sequential = frontend.run_sequential(source)
+        result = frontend.run(source, workers)
+        self.assertGreater(result.batches, 1)
+        self.assertEqual(result.syntax_errors, sequential.syntax_errors)
+        self.assertEqual(result.semantic_errors, sequential.semantic_errors)
+        self.assertEqual([str(instr) for instr in result.tac], [str(instr) for instr in sequential.tac])
+        return result
+
+    def test_classes_in_process(self):
+        result = self.assertSameResult(_SOURCE, 1)
+        # Los temporales renumerados al unir los lotes no chocan con t1, t2 y t3 del programa
+        names = {name for instr in result.tac for name in (instr.dest, instr.a, instr.b) if name}
+        self.assertTrue(any(is_temp(name) for name in names))
+        self.assertEqual({name for name in names if re.fullmatch(r't\d+', name)}, {'t1', 't2', 't3'})
+
+    def test_classes_with_processes(self):
+        self.assertSameResult(_SOURCE, 2)
+
+    def test_generated_source(self):
+        self.assertSameResult(make_source(20000), 2)
+
+if __name__ == '__main__':
+    unittest.main()
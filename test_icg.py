@@ -0,0 +1,122 @@
+"""Pruebas del generador de código intermedio: despacho de switch y condiciones en cortocircuito.
+
+python -m unittest test_icg
+"""
+import unittest
+
+import icg
+import lexer
+from benchmarks import _execute
+from tac import Op
+
+# clasifica() recorre todos sus casos, los huecos y los valores fuera de rango
+_SWITCH = """
+int clasifica(int x) {
+    int r;
+    r = 0;
+    switch (x) {
+        case A: r = 10; break;
+        case B: r = 20;
+        case C: r = r + 30; break;
+        case D: r = 40; break;
+        case E: r = 60; break;
+        default: r = 7;
+    }
+    return r;
+}
+int main() {
+    int i; int s;
+    s = 0;
+    for (i = -2; i < 1010; i = i + 1) { s = s + clasifica(i) * (i + 3); }
+    return s;
+}
+"""
+
+def _switch(cases):
+    source = _SWITCH
+    for name, value in zip('ABCDE', cases):
+        source = source.replace('case %s:' % name, 'case %d:' % value)
+    return source
+
+def _expected(cases):
+    """Lo que devuelve main() de _switch(cases), calculado en Python."""
+    a, b, c, d, e = cases
+    s = 0
+    for i in range(-2, 1010):
+        r = {a: 10, b: 50, c: 30, d: 40, e: 60}.get(i, 7)
+        s += r * (i + 3)
+    return s
+
+def _generate(source, linear=False, short_circuit=True):
+    """TAC de `source` y el generador; con `linear`, todos los switch se despachan con comparaciones en orden."""
+    saved = icg._LINEAR_MAX_CASES
+    if linear:
+        icg._LINEAR_MAX_CASES = 10 ** 9
+    try:
+        generator = icg.ICG(lexer.tokenize(source))
+        generator.short_circuit = short_circuit
+        return generator.generate(), generator
+    finally:
+        icg._LINEAR_MAX_CASES = saved
+
+def _result(source, **options):
+    code, generator = _generate(source, **options)
+    return _execute(code, generator.params)[1]
+
+class SwitchDispatchTest(unittest.TestCase):
+    def assertDispatch(self, cases, jump_table):
+        source = _switch(cases)
+        code, _ = _generate(source)
+        self.assertEqual(any(instr.op == Op.JUMP_TABLE for instr in code), jump_table)
+        self.assertEqual(_result(source), _expected(cases))
+        self.assertEqual(_result(source, linear=True), _expected(cases))
+
+    def test_jump_table(self):
+        self.assertDispatch((1, 2, 3, 4, 6), True)
+
+    def test_jump_table_from_zero(self):
+        self.assertDispatch((0, 1, 2, 5, 3), True)
+
+    def test_binary_search(self):
+        self.assertDispatch((0, 2, 3, 1000, 7), False)
+
+class ShortCircuitTest(unittest.TestCase):
+    def test_same_values_as_full_evaluation(self):
+        # Condiciones sin efectos: con y sin cortocircuito toman las mismas ramas
+        source = """
+            int main() {
+                int i; int j; int s;
+                s = 0;
+                for (i = 0; i < 4; i = i + 1) {
+                    for (j = 0; j < 4; j = j + 1) {
+                        s = s * 2;
+                        if (i < 2 && j > 1 || !(i == j) && !(j < 3)) { s = s + 1; }
+                        while (i > 0 && (j == 1 || j == 3) && s / 7 * 7 != s - 3) { s = s + 1; }
+                        if (!(i || j)) { s = s + 5; }
+                    }
+                }
+                return s;
+            }
+        """
+        self.assertEqual(_result(source), _result(source, short_circuit=False))
+
+    def test_right_operand_skipped(self):
+        # El operando derecho solo se evalúa si el izquierdo no decide: cuenta() cambia la variable global
+        source = """
+            int llamadas;
+            int cuenta(int v) { llamadas = llamadas + 1; return v; }
+            int main() {
+                int i;
+                llamadas = 0;
+                for (i = 0; i < 6; i = i + 1) {
+                    if (i > 2 && cuenta(i) > 3) { llamadas = llamadas + 100; }
+                    if (i < 4 || cuenta(i) < 0) { llamadas = llamadas + 1000; }
+                }
+                return llamadas;
+            }
+        """
+        # && llama en i = 3, 4, 5 (y suma 100 dos veces); || llama en i = 4, 5 y suma 1000 cuatro veces
+        self.assertEqual(_result(source), 3 + 200 + 2 + 4000)
+
+if __name__ == '__main__':
+    unittest.main()
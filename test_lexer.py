@@ -0,0 +1,102 @@
+"""Pruebas del lexer: índice de líneas, relex, iter_tokens y los dos motores contra tokenize.
+
+python -m unittest test_lexer
+"""
+import glob
+import io
+import os
+import random
+import unittest
+
+import lexer
+
+_PRUEBAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Pruebas')
+
+# Fragmentos que se insertan en las ediciones: abren y cierran comentarios y cadenas, unen y parten tokens
+_EDITS = ['x', '1', '.', ' ', '\n', '/*', '*/', '//', '"', "'", '==', 'if', '5.5.', '@', '']
+
+def _sources():
+    """Texto de cada programa de Pruebas."""
+    sources = []
+    for path in sorted(glob.glob(os.path.join(_PRUEBAS, '*.cpp'))):
+        with open(path, encoding='utf-8') as f:
+            sources.append((os.path.basename(path), f.read()))
+    return sources
+
+def _fields(tokens):
+    return [(t.type, t.value, t.span, t.line, t.column) for t in tokens]
+
+class LineIndexTest(unittest.TestCase):
+    def test_position_of_each_token(self):
+        for engine in lexer.ENGINES:
+            for name, text in _sources():
+                with self.subTest(engine=engine, program=name):
+                    tokens = lexer.tokenize(text, engine)
+                    index = tokens.line_index
+                    self.assertEqual([index.position(t.span[0]) for t in tokens], [(t.line, t.column) for t in tokens])
+                    buf = lexer.tokenize_buffer(text, engine)
+                    self.assertEqual([buf.line_index.position(buf.starts[i]) for i in range(len(buf))],
+                                     [(t.line, t.column) for t in tokens])
+
+    def test_line_starts(self):
+        index = lexer.tokenize('int a;\n\nfloat b;\n').line_index
+        self.assertEqual(len(index), 4)
+        self.assertEqual([index.line_start(line) for line in (1, 2, 3, 4)], [0, 7, 8, 17])
+        self.assertEqual([index.line_of(offset) for offset in (0, 6, 7, 8, 16, 17)], [1, 1, 2, 3, 3, 4])
+        self.assertEqual(index.position(12), (3, 5))
+
+class RelexTest(unittest.TestCase):
+    def test_relex_matches_tokenize(self):
+        rng = random.Random(3)
+        for engine in lexer.ENGINES:
+            for name, text in _sources():
+                with self.subTest(engine=engine, program=name):
+                    tokens = lexer.tokenize(text, engine)
+                    for _ in range(40):
+                        offset = rng.randrange(len(text) + 1)
+                        deleted = rng.randrange(min(4, len(text) - offset) + 1)
+                        inserted = rng.choice(_EDITS)
+                        tokens = lexer.relex(tokens, offset, deleted, inserted, engine)
+                        text = text[:offset] + inserted + text[offset + deleted:]
+                        self.assertEqual(_fields(tokens), _fields(lexer.tokenize(text, engine)))
+
+class EnginesTest(unittest.TestCase):
+    def assertSameTokens(self, text):
+        expected = _fields(lexer.tokenize(text, 'regex'))
+        self.assertEqual(_fields(lexer.tokenize(text, 'dfa')), expected)
+        for engine in lexer.ENGINES:
+            self.assertEqual(_fields(lexer.tokenize_buffer(text, engine)), expected)
+
+    def test_dfa_matches_regex(self):
+        for name, text in _sources():
+            with self.subTest(program=name):
+                self.assertSameTokens(text)
+
+    def test_dfa_matches_regex_on_noise(self):
+        # Texto al azar armado con los fragmentos de las ediciones y caracteres sueltos
+        rng = random.Random(5)
+        pieces = _EDITS + list('+-*/%<>=!&|;,(){}[]#\\_aZ9\t')
+        for _ in range(300):
+            text = ''.join(rng.choice(pieces) for _ in range(rng.randrange(40)))
+            with self.subTest(text=text):
+                self.assertSameTokens(text)
+
+class IterTokensTest(unittest.TestCase):
+    def test_iter_tokens_matches_tokenize(self):
+        # Bloques pequeños para que los tokens queden partidos entre lecturas
+        for name, text in _sources():
+            expected = _fields(lexer.tokenize(text))
+            with self.subTest(program=name):
+                self.assertEqual(_fields(lexer.iter_tokens(os.path.join(_PRUEBAS, name))), expected)
+                for chunk_size in (1, 7, 64):
+                    self.assertEqual(_fields(lexer.iter_tokens(io.StringIO(text), chunk_size)), expected)
+                crlf = io.BytesIO(text.replace('\n', '\r\n').encode('utf-8'))
+                self.assertEqual(_fields(lexer.iter_tokens(crlf, 5)), expected)
+
+    def test_unclosed_tokens(self):
+        for text in ('int x; /* sin cerrar', "char c = 'ab", 'x = "hola', 'y = 5.5.'):
+            with self.subTest(text=text):
+                self.assertEqual(_fields(lexer.iter_tokens(io.StringIO(text), 2)), _fields(lexer.tokenize(text)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,216 @@
+"""Pruebas del optimizador: el TAC de cada paso y de cada nivel -O hace lo mismo que el de -O0.
+
+python -m unittest test_optimizer
+"""
+import glob
+import os
+import unittest
+
+import icg
+import lexer
+import optimizer
+from benchmarks import _execute
+
+_PRUEBAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Pruebas')
+
+# Programas para cada paso: nombre -> (fuente, lo que devuelve main)
+_PROGRAMS = {
+    'constantes': ("""
+        int a; int b; float f; float g;
+        int main() {
+            int c;
+            a = 7; b = -7 / 2; f = a / 2; g = 7.0 / 2;
+            c = a * 3 - b;
+            if (c > 20) { c = c + 1; } else { c = c - 1; }
+            a = c;
+            return a * 100 + b * 10 + f * 2 + g * 2;
+        }
+    """, 2483),
+    'ciclos': ("""
+        int n;
+        int toca() { n = n + 1; return 0; }
+        int main() {
+            int i; int j; int s; int k; int x; int y;
+            n = 6; s = 0; x = 3; y = 4; k = 0;
+            for (i = 0; i < n; i = i + 1) {
+                s = s + i * 4 + x * y;
+                j = 0;
+                while (j < i) { s = s + j * 8 - i * 2; j = j + 1; }
+                if (i > 3) { x = x + 1; }
+            }
+            do { k = k + 2; s = s + k * 3 + x * y + n * 2; toca(); } while (k < 10);
+            while (n < 30) { s = s + n * 5; n = n + 1; toca(); }
+            return s;
+        }
+    """, 1456),
+    'subexpresiones': ("""
+        int g;
+        int sube() { g = g + 1; return g; }
+        int main() {
+            int a; int b; int c; int d;
+            g = 2; a = 5; b = 0;
+            c = a * g + 1;
+            sube();
+            d = a * g + 1;
+            a = a + 1;
+            b = a * g + 1;
+            return c * 10000 + d * 100 + b + (a * g + 1) * (a * g + 1);
+        }
+    """, 111980),
+    'algebra': ("""
+        int main() {
+            int a; int b; float f; int r;
+            a = 9; f = 2.5;
+            b = a * 1 + 0 - 0 * a + a * 2 + a * 8 + a / 1 - (a - a) + 2 * a;
+            r = b * 1000 + f * 4 + f * 1 + (f - f) * 3;
+            return r;
+        }
+    """, 126012.5),
+    'saltos': ("""
+        int veces;
+        int par(int v) { veces = veces + 1; return v / 2 * 2 == v; }
+        int main() {
+            int i; int s;
+            veces = 0; s = 0;
+            for (i = 0; i < 12; i = i + 1) {
+                if (1 > 2) { s = s + 1000; }
+                if (par(i) && i > 4 || i == 1) { s = s + i; } else { s = s - 1; }
+                switch (i) {
+                    case 0: s = s + 5;
+                    case 1: s = s + 7; break;
+                    case 3: s = s * 2; break;
+                    case 5: s = s - 3; break;
+                    case 9: s = s + 11; break;
+                    default: s = s + 1;
+                }
+                if (!(i < 10) || par(i + 1)) { s = s + 2; }
+            }
+            return s * 100 + veces;
+        }
+    """, 8522),
+    'copias': ("""
+        int g;
+        int usa(int v) { g = g + v; return g; }
+        int main() {
+            int x; int y; int z;
+            g = 1; x = 4; y = x; x = y; z = y;
+            usa(z);
+            y = g; g = y; x = x + y;
+            z = usa(x) + g;
+            return z * 100 + x * 10 + y;
+        }
+    """, 2895),
+}
+
+def _generate(source):
+    """TAC de `source` y el generador (sus tipos)."""
+    generator = icg.ICG(lexer.tokenize(source))
+    return generator.generate(), generator
+
+class EquivalenceTest(unittest.TestCase):
+    def assertSameResult(self, source, expected):
+        """Cada nivel devuelve `expected`, lo mismo que el TAC sin optimizar."""
+        code, generator = _generate(source)
+        for level in optimizer.LEVELS:
+            with self.subTest(level=level):
+                optimized = optimizer.Optimizer(code, generator.types, level).optimize()
+                self.assertEqual(_execute(optimized, generator.params)[1], expected)
+
+    def test_empty_global_part(self):
+        # La asignación global no se usa: el tramo del código global queda vacío
+        self.assertSameResult("int x; x = 5; int main() { return 0; }", 0)
+
+    def test_global_modified_by_call(self):
+        # t1 es una variable del programa, no un temporal: f la cambia y main la lee después de llamarla
+        self.assertSameResult("""
+            int t1;
+            int f() { int x; x = 3; t1 = x * 2; return 0; }
+            int main() { t1 = 5; f(); return t1; }
+        """, 6)
+
+    def test_arguments_and_return_value(self):
+        self.assertSameResult("""
+            int g(int a, int b) { return a * b + 1; }
+            int main() { int r; r = g(2, 3); return r * 2; }
+        """, 14)
+
+    def test_identifiers_like_temporaries(self):
+        self.assertSameResult("""
+            int t1;
+            int t2;
+            int doble(int t3) { t1 = t3 * 2; return t1 + 1; }
+            int main() { int r; t2 = 4; t1 = t2 * 3 + 1; r = doble(t1 + t2); return r + t1 * t2 + t2; }
+        """, 175)
+
+    def test_user_variables_keep_their_names(self):
+        # t1 y t2 son variables del programa: recycle_temporaries no les cambia el nombre
+        with open(os.path.join(_PRUEBAS, 'ensamblador.cpp'), encoding='utf-8') as f:
+            code, generator = _generate(f.read())
+        for level in optimizer.LEVELS:
+            with self.subTest(level=level):
+                optimized = optimizer.Optimizer(code, generator.types, level).optimize()
+                self.assertIn('result = t2', [str(instr) for instr in optimized])
+
+    def test_empty_code(self):
+        for level in optimizer.LEVELS:
+            self.assertEqual(optimizer.Optimizer([], level=level).optimize(), [])
+
+class PassTest(unittest.TestCase):
+    def assertSameResult(self, code, generator, expected):
+        self.assertEqual(_execute(code, generator.params)[1], expected)
+
+    def test_each_pass_alone(self):
+        for name, (source, expected) in _PROGRAMS.items():
+            code, generator = _generate(source)
+            self.assertSameResult(code, generator, expected)
+            for pass_name, function in optimizer.PASSES.items():
+                with self.subTest(program=name, step=pass_name):
+                    optimized = function(optimizer.Optimizer(code, generator.types), code)
+                    self.assertSameResult(optimized, generator, expected)
+
+    def test_each_pass_in_order(self):
+        # Cada paso recibe lo que dejaron los anteriores, como en dos rondas de -O3
+        passes, _, final = optimizer.LEVELS[3]
+        for name, (source, expected) in _PROGRAMS.items():
+            code, generator = _generate(source)
+            opt = optimizer.Optimizer(code, generator.types)
+            for pass_name in passes + passes + final:
+                with self.subTest(program=name, step=pass_name):
+                    code = optimizer.PASSES[pass_name](opt, code)
+                    self.assertSameResult(code, generator, expected)
+
+    def test_levels(self):
+        for name, (source, expected) in _PROGRAMS.items():
+            code, generator = _generate(source)
+            for level in optimizer.LEVELS:
+                with self.subTest(program=name, level=level):
+                    optimized = optimizer.Optimizer(code, generator.types, level).optimize()
+                    self.assertSameResult(optimized, generator, expected)
+
+    def test_passes_turned_off(self):
+        for switch in ('arrange_jumps', 'hoist_invariants', 'reduce_strength'):
+            for name, (source, expected) in _PROGRAMS.items():
+                code, generator = _generate(source)
+                opt = optimizer.Optimizer(code, generator.types, 3)
+                setattr(opt, switch, False)
+                with self.subTest(program=name, switch=switch):
+                    self.assertSameResult(opt.optimize(), generator, expected)
+
+    def test_pruebas(self):
+        # Los programas de Pruebas se optimizan en todos los niveles; los que _execute
+        # puede correr (sin objetos ni variables leídas antes de asignarlas) dan lo mismo que -O0
+        for path in sorted(glob.glob(os.path.join(_PRUEBAS, '*.cpp'))):
+            with open(path, encoding='utf-8') as f:
+                code, generator = _generate(f.read())
+            try:
+                expected = _execute(code, generator.params)[1]
+            except ValueError:
+                expected = None
+            for level in optimizer.LEVELS:
+                with self.subTest(program=os.path.basename(path), level=level):
+                    optimized = optimizer.Optimizer(code, generator.types, level).optimize()
+                    if expected is not None:
+                        self.assertSameResult(optimized, generator, expected)
+
+if __name__ == '__main__':
+    unittest.main()